@@ -0,0 +1,10 @@
+"""Synthetic load generator and benchmark suite for the CareDesk function."""
+
+import os
+import sys
+
+# Route modules import each other as top-level packages (routes, services, utils)
+FUNCTION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "functions", "ragnar_hackathon_alok_swapnil_function")
+if FUNCTION_DIR not in sys.path:
+    sys.path.insert(0, FUNCTION_DIR)
@@ -0,0 +1,75 @@
+"""
+CareDesk API benchmark.
+
+    python -m benchmarks --clinics 5 --patients 200 --appointments 400 \\
+        --mix booking_rush --requests 500 --latency-ms 5 --save run.json
+    python -m benchmarks --mix mixed --baseline run.json
+"""
+
+import argparse
+import logging
+import time
+
+
+def parse_args(argv=None):
+    from benchmarks.traffic import MIXES
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="CareDesk API benchmark")
+    parser.add_argument("--clinics", type=int, default=3)
+    parser.add_argument("--patients", type=int, default=100, help="patients per clinic")
+    parser.add_argument("--appointments", type=int, default=200, help="appointments per clinic")
+    parser.add_argument("--doctors", type=int, default=4, help="doctors per clinic")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated latency for every Catalyst call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    parser.add_argument("--baseline", help="diff against a summary saved with --save")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.disable(logging.WARNING)
+
+    from benchmarks.fake_catalyst import FakeStore, LatencyProfile, install_sms_stub
+    from benchmarks.seed import seed_store
+    from benchmarks.traffic import Driver, run_mix
+    from benchmarks import report
+
+    args = parse_args(argv)
+
+    store = FakeStore(LatencyProfile.uniform(args.latency_ms))
+    install_sms_stub(store)
+
+    started = time.perf_counter()
+    tenants = seed_store(store, args.clinics, args.patients, args.appointments,
+                         doctors_per_clinic=args.doctors, seed=args.seed)
+    print(f"Seeded {args.clinics} clinics x {args.patients} patients x "
+          f"{args.appointments} appointments in {time.perf_counter() - started:.1f}s")
+
+    driver = Driver(store, tenants, seed=args.seed)
+    started = time.perf_counter()
+    samples = run_mix(driver, args.mix, args.requests)
+    elapsed = time.perf_counter() - started
+    print(f"Sent {len(samples)} '{args.mix}' requests in {elapsed:.1f}s\n")
+
+    summary = report.summarize(samples)
+    baseline = report.load(args.baseline) if args.baseline else None
+    print(report.format_table(summary, baseline))
+
+    if args.save:
+        report.save(args.save, summary, meta={
+            "mix": args.mix,
+            "clinics": args.clinics,
+            "patients": args.patients,
+            "appointments": args.appointments,
+            "requests": args.requests,
+            "latency_ms": args.latency_ms,
+            "seed": args.seed,
+        })
+        print(f"\nSaved summary to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
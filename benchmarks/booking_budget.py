@@ -0,0 +1,104 @@
+"""
+Round-trip budget check for services.booking_service.
+
+Books appointments through the staff and public paths against the fake
+store and fails (exit code 1) if any single booking makes more ZCQL or
+Data Store calls than BOOKING_ZCQL_BUDGET / BOOKING_DATASTORE_BUDGET.
+Rosters and clinic profiles are warmed first and each clinic-day stays under
+one ZCQL page (300 appointments), the conditions the budget is stated for;
+cold caches and busier days cost more, see booking_service.
+
+    python -m benchmarks.booking_budget --bookings 200 --latency-ms 5
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.fake_catalyst import FakeApp, FakeStore, LatencyProfile, install_sms_stub
+from benchmarks.report import percentile
+from benchmarks.seed import seed_store, _time_slots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.booking_budget")
+    parser.add_argument("--bookings", type=int, default=100)
+    parser.add_argument("--clinics", type=int, default=3)
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    from services.booking_service import (
+        book_appointment, BookingError, BOOKING_ZCQL_BUDGET, BOOKING_DATASTORE_BUDGET,
+    )
+    from services.clinic_service import get_clinic_profile
+    from services.roster_service import get_roster
+    from utils.constants import ist_now
+
+    store = FakeStore(LatencyProfile.uniform(args.latency_ms))
+    install_sms_stub(store)
+    tenants = seed_store(store, args.clinics, args.patients, args.appointments, seed=args.seed)
+    rng = random.Random(args.seed)
+    tomorrow = (ist_now().date() + timedelta(days=1)).isoformat()
+
+    app = FakeApp(store)
+    # Warm the clinic profile and roster caches, as steady-state traffic would
+    clinics = {t["clinic_id"]: get_clinic_profile(app, t["clinic_id"]) for t in tenants}
+    for t in tenants:
+        get_roster(app, t["clinic_id"])
+
+    samples = {"staff": [], "public": []}
+    violations = []
+    rejected = 0
+    for i in range(args.bookings):
+        tenant = rng.choice(tenants)
+        doctor = rng.choice(tenant["doctors"])
+        slot = rng.choice(list(_time_slots(doctor["available_from"], doctor["available_to"])))
+        flow = "staff" if i % 2 == 0 else "public"
+        if flow == "staff":
+            kwargs = {"patient_id": rng.choice(tenant["patients"])["ROWID"]}
+        else:
+            kwargs = {"new_patient": {"name": "Budget Check", "phone": f"7{rng.randrange(10 ** 9):09d}",
+                                      "email": "budget@bench.example"}}
+
+        before = store.snapshot()
+        start = time.perf_counter()
+        try:
+            book_appointment(app, clinics[tenant["clinic_id"]], doctor["ROWID"], tomorrow, slot, **kwargs)
+        except BookingError:
+            rejected += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        after = store.snapshot()
+
+        zcql = after["zcql"] - before["zcql"]
+        datastore = after["datastore"] - before["datastore"]
+        samples[flow].append((elapsed_ms, zcql, datastore))
+        if zcql > BOOKING_ZCQL_BUDGET or datastore > BOOKING_DATASTORE_BUDGET:
+            violations.append((flow, zcql, datastore))
+
+    print(f"Budget: {BOOKING_ZCQL_BUDGET} ZCQL, {BOOKING_DATASTORE_BUDGET} Data Store per booking")
+    for flow, rows in samples.items():
+        if not rows:
+            continue
+        latencies = [r[0] for r in rows]
+        print(f"{flow:<7} n={len(rows):<5} p50={percentile(latencies, 50):.2f}ms "
+              f"p95={percentile(latencies, 95):.2f}ms "
+              f"zcql max={max(r[1] for r in rows)} datastore max={max(r[2] for r in rows)}")
+    print(f"Rejected by validation: {rejected}")
+
+    if violations:
+        print(f"FAIL: {len(violations)} booking(s) over budget, e.g. {violations[0]}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
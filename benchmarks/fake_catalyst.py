@@ -0,0 +1,533 @@
+"""
+In-memory stand-in for the Catalyst SDK `app` object.
+
+ZCQL is executed against SQLite (the dialect the routes use is plain SQL),
+results are reshaped into Catalyst's `[{Table: {column: value}}]` format,
+and every component call sleeps for a configurable latency and is counted
+so benchmarks can report round trips per request.
+"""
+
+import itertools
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Columns per table, mirroring _verify_tables in main.py plus system columns.
+# Tables or columns not listed here are created on first insert.
+SCHEMA = {
+    "Clinics": ["name", "slug", "address", "phone", "email", "admin_user_id", "logo_url", "logo_thumbnail_url"],
+    "Doctors": ["clinic_id", "name", "specialty", "email", "phone", "available_from",
+                "available_to", "consultation_fee", "status"],
+    "Patients": ["clinic_id", "name", "phone", "email", "age", "gender", "blood_group",
+                 "medical_history", "search_key", "phone_key"],
+    "Appointments": ["clinic_id", "doctor_id", "patient_id", "appointment_date",
+                     "appointment_time", "status", "token_number", "notes", "feedback_score",
+                     "feedback_text", "feedback_sentiment", "feedback_keywords"],
+    "Prescriptions": ["clinic_id", "appointment_id", "doctor_id", "patient_id", "diagnosis",
+                      "medicines", "advice", "follow_up_date", "prescription_url"],
+    "FeedbackRollups": ["clinic_id", "doctor_id", "week_start", "feedback_count", "score_sum",
+                        "score_1", "score_2", "score_3", "score_4", "score_5", "positive",
+                        "negative", "neutral", "pending", "keyword_counts"],
+    "PrescriptionItems": ["clinic_id", "prescription_id", "doctor_id", "patient_id",
+                          "prescribed_date", "position", "name", "name_key", "dosage", "morning",
+                          "afternoon", "night", "timing", "duration", "notes", "instructions"],
+    "MedicineCatalog": ["clinic_id", "name_key", "name", "prescribed_count", "combos",
+                        "last_prescribed"],
+    "JobRuns": ["job_name", "run_key", "status", "last_row_id", "processed", "chunks",
+                "invocations", "stats", "last_error", "error_count", "lease_owner",
+                "lease_until", "started_at", "finished_at", "resume_token"],
+    "NotificationLog": ["clinic_id", "patient_id", "kind", "ref_date", "notification_key",
+                        "channels", "sent_at"],
+}
+SYSTEM_COLUMNS = ["CREATEDTIME", "MODIFIEDTIME"]
+
+_FROM_RE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+_SELECT_RE = re.compile(r"^\s*SELECT\s+(.*?)\s+FROM\s", re.IGNORECASE | re.DOTALL)
+
+
+class LatencyProfile:
+    """Simulated per-call latency in milliseconds for each Catalyst component."""
+
+    def __init__(self, zcql=0.0, datastore=0.0, cache=0.0, mail=0.0, sms=0.0,
+                 zia=0.0, signal=0.0, search=0.0, pdf=0.0, storage=0.0):
+        self.zcql = zcql
+        self.datastore = datastore
+        self.cache = cache
+        self.mail = mail
+        self.sms = sms
+        self.zia = zia
+        self.signal = signal
+        self.search = search
+        self.pdf = pdf
+        self.storage = storage
+
+    @classmethod
+    def uniform(cls, ms):
+        """Same latency for every network-backed component."""
+        return cls(**{name: ms for name in vars(cls()).keys()})
+
+
+class FakeStore:
+    """Shared state behind every fake app: the SQLite database, cache and call counters."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or LatencyProfile()
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.lock = threading.RLock()
+        self.columns = {}
+        self.cache = {}
+        self.calls = Counter()
+        self.sent = Counter()
+        self._ids = itertools.count(3_000_000_000_000)
+        for table, cols in SCHEMA.items():
+            self._create_table(table, cols)
+
+    # ── bookkeeping ──────────────────────────────────────────────
+
+    def record(self, component, latency_ms):
+        with self.lock:
+            self.calls[component] += 1
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+
+    def snapshot(self):
+        with self.lock:
+            return Counter(self.calls)
+
+    # ── schema ───────────────────────────────────────────────────
+
+    def _create_table(self, table, cols):
+        all_cols = list(cols) + SYSTEM_COLUMNS
+        col_sql = ", ".join(f'"{c}" TEXT' for c in all_cols)
+        self.db.execute(f'CREATE TABLE "{table}" (ROWID INTEGER PRIMARY KEY, {col_sql})')
+        self.columns[table] = set(all_cols)
+
+    def _ensure_columns(self, table, cols):
+        if table not in self.columns:
+            self._create_table(table, [])
+        for col in cols:
+            if col != "ROWID" and col not in self.columns[table]:
+                self.db.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" TEXT')
+                self.columns[table].add(col)
+
+    # ── direct loading (not counted, no latency) ─────────────────
+
+    def load(self, table, rows):
+        """Insert rows without simulating latency. Returns rows with ROWIDs."""
+        with self.lock:
+            return [self._insert(table, row) for row in rows]
+
+    # ── data operations ──────────────────────────────────────────
+
+    def _insert(self, table, row):
+        row = {k: (None if v is None else str(v)) for k, v in row.items() if k != "ROWID"}
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        row.setdefault("CREATEDTIME", now)
+        row["MODIFIEDTIME"] = now
+        self._ensure_columns(table, row.keys())
+        row_id = next(self._ids)
+        cols = ["ROWID"] + list(row.keys())
+        placeholders = ", ".join("?" for _ in cols)
+        col_sql = ", ".join(f'"{c}"' for c in cols)
+        self.db.execute(f'INSERT INTO "{table}" ({col_sql}) VALUES ({placeholders})',
+                        [row_id] + list(row.values()))
+        return dict(row, ROWID=str(row_id))
+
+    def _update(self, table, row):
+        row_id = row.get("ROWID")
+        changes = {k: (None if v is None else str(v)) for k, v in row.items() if k != "ROWID"}
+        changes["MODIFIEDTIME"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._ensure_columns(table, changes.keys())
+        set_sql = ", ".join(f'"{c}" = ?' for c in changes)
+        self.db.execute(f'UPDATE "{table}" SET {set_sql} WHERE ROWID = ?',
+                        list(changes.values()) + [int(row_id)])
+        return self._get(table, row_id)
+
+    def _get(self, table, row_id):
+        cur = self.db.execute(f'SELECT * FROM "{table}" WHERE ROWID = ?', [int(row_id)])
+        values = cur.fetchone()
+        if values is None:
+            return None
+        names = [d[0] for d in cur.description]
+        row = dict(zip(names, values))
+        row["ROWID"] = str(row["ROWID"])
+        return row
+
+    def _delete(self, table, row_ids):
+        self.db.executemany(f'DELETE FROM "{table}" WHERE ROWID = ?',
+                            [(int(r),) for r in row_ids])
+        return True
+
+    def query(self, sql):
+        """Execute a ZCQL statement and reshape the result like Catalyst does."""
+        with self.lock:
+            cur = self.db.execute(sql)
+            if not sql.lstrip().upper().startswith("SELECT"):
+                return []
+            rows = cur.fetchall()
+            targets = _result_targets(sql, [d[0] for d in cur.description])
+        result = []
+        for values in rows:
+            out = {}
+            for (table, key), value in zip(targets, values):
+                if key == "ROWID" and value is not None:
+                    value = str(value)
+                out.setdefault(table, {})[key] = value
+            result.append(out)
+        return result
+
+
+def _split_select_list(select):
+    """Split a select list on top-level commas."""
+    items, depth, current = [], 0, ""
+    for ch in select:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            items.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        items.append(current.strip())
+    return items
+
+
+def _result_targets(sql, description_names):
+    """Map each result column to its (table, key) in Catalyst's nested row format."""
+    main_table = _FROM_RE.search(sql).group(1)
+    match = _SELECT_RE.match(sql)
+    items = _split_select_list(match.group(1)) if match else []
+    if items == ["*"]:
+        return [(main_table, name) for name in description_names]
+
+    targets = []
+    for item in items:
+        qualified = re.match(r"^(\w+)\.(\w+)$", item)
+        if qualified:
+            targets.append((qualified.group(1), qualified.group(2)))
+        elif "(" in item:
+            inner = re.search(r"\((\w+)\.", item)
+            targets.append((inner.group(1) if inner else main_table, item))
+        else:
+            targets.append((main_table, item))
+    return targets
+
+
+# ── Component fakes ─────────────────────────────────────────────────
+
+class FakeZcql:
+    def __init__(self, store):
+        self._store = store
+
+    def execute_query(self, query):
+        self._store.record("zcql", self._store.latency.zcql)
+        return self._store.query(query)
+
+
+class FakeTable:
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+
+    def _call(self):
+        self._store.record("datastore", self._store.latency.datastore)
+
+    def insert_row(self, row):
+        return self.insert_rows([row])[0]
+
+    def insert_rows(self, rows):
+        self._call()
+        with self._store.lock:
+            return [self._store._insert(self._name, row) for row in rows]
+
+    def update_row(self, row):
+        return self.update_rows([row])[0]
+
+    def update_rows(self, rows):
+        self._call()
+        with self._store.lock:
+            return [self._store._update(self._name, row) for row in rows]
+
+    def delete_row(self, row_id):
+        return self.delete_rows([row_id])
+
+    def delete_rows(self, row_ids):
+        self._call()
+        with self._store.lock:
+            return self._store._delete(self._name, row_ids)
+
+    def get_row(self, row_id):
+        self._call()
+        with self._store.lock:
+            return self._store._get(self._name, row_id)
+
+
+class FakeDatastore:
+    def __init__(self, store):
+        self._store = store
+
+    def table(self, name):
+        return FakeTable(self._store, name)
+
+
+class FakeSegment:
+    def __init__(self, store):
+        self._store = store
+
+    def put(self, key, value, expiry=None):
+        self._store.record("cache", self._store.latency.cache)
+        with self._store.lock:
+            self._store.cache[key] = value
+        return {"cache_name": key, "cache_value": value}
+
+    update = put
+
+    def get(self, key):
+        self._store.record("cache", self._store.latency.cache)
+        with self._store.lock:
+            value = self._store.cache.get(key)
+        return {"cache_name": key, "cache_value": value}
+
+    def get_value(self, key):
+        return self.get(key).get("cache_value")
+
+    def delete(self, key):
+        self._store.record("cache", self._store.latency.cache)
+        with self._store.lock:
+            self._store.cache.pop(key, None)
+        return True
+
+
+class FakeCache:
+    def __init__(self, store):
+        self._store = store
+
+    def segment(self, seg_id=None):
+        return FakeSegment(self._store)
+
+
+class FakeMail:
+    def __init__(self, store):
+        self._store = store
+
+    def send_mail(self, mail_obj):
+        self._store.record("mail", self._store.latency.mail)
+        with self._store.lock:
+            self._store.sent["mail"] += 1
+        return {"to_email": mail_obj.get("to_email")}
+
+
+class FakeSignal:
+    def __init__(self, store):
+        self._store = store
+
+    def emit(self, topic=None, message=None):
+        self._store.record("signal", self._store.latency.signal)
+        return True
+
+
+class FakeZia:
+    POSITIVE = ("good", "great", "excellent", "best", "thorough", "helpful", "recommend")
+    NEGATIVE = ("rude", "late", "wait", "crowded", "rushed", "unacceptable", "bad")
+
+    def __init__(self, store):
+        self._store = store
+
+    def _sentiment(self, text):
+        lowered = text.lower()
+        pos = sum(w in lowered for w in self.POSITIVE)
+        neg = sum(w in lowered for w in self.NEGATIVE)
+        if pos > neg:
+            return "Positive"
+        if neg > pos:
+            return "Negative"
+        return "Neutral"
+
+    def get_sentiment_analysis(self, docs, keywords=None):
+        self._store.record("zia", self._store.latency.zia)
+        if isinstance(docs, str):
+            return {"sentiment": self._sentiment(docs)}
+        return [{"sentiment": self._sentiment(doc)} for doc in docs]
+
+    def get_keyword_extraction(self, docs):
+        self._store.record("zia", self._store.latency.zia)
+        def extract(doc):
+            words = [w.strip(".,!").lower() for w in doc.split() if len(w) > 4]
+            return [{"keyword": w} for w in words[:3]]
+        if isinstance(docs, str):
+            return extract(docs)
+        return [{"keyword_extractor": {"keywords": [k["keyword"] for k in extract(doc)]}}
+                for doc in docs]
+
+
+class FakeSearch:
+    """Word-prefix matching ("term*") over the given columns, capped like the real engine."""
+
+    MAX_RESULTS = 100
+
+    def __init__(self, store):
+        self._store = store
+
+    def execute_search_query(self, query):
+        self._store.record("search", self._store.latency.search)
+        term = query["search"].strip("*").replace("'", "''")
+        out = {}
+        for table, cols in query["search_table_columns"].items():
+            cond = " OR ".join(f"(' ' || \"{c}\") LIKE '% {term}%'" for c in cols)
+            rows = self._store.query(f"SELECT * FROM {table} WHERE {cond} LIMIT {self.MAX_RESULTS}")
+            out[table] = [row[table] for row in rows]
+        return out
+
+
+class FakeSmartBrowz:
+    def __init__(self, store):
+        self._store = store
+
+    def convert_to_pdf(self, source=None, pdf_options=None, **kwargs):
+        self._store.record("pdf", self._store.latency.pdf)
+        return b"%PDF-1.4 fake"
+
+
+class FakeFolder:
+    def __init__(self, store):
+        self._store = store
+
+    def upload_file(self, name, file):
+        self._store.record("storage", self._store.latency.storage)
+        return {"id": f"file-{abs(hash(name)) % 10 ** 8}"}
+
+    def file(self, file_id):
+        return self
+
+    def get_download_url(self):
+        return "https://files.example.invalid/download"
+
+
+class FakeFilestore:
+    def __init__(self, store):
+        self._store = store
+
+    def folder(self, name):
+        return FakeFolder(self._store)
+
+
+class FakeBucket:
+    def __init__(self, store):
+        self._store = store
+
+    def _call(self):
+        self._store.record("storage", self._store.latency.storage)
+
+    def initiate_multipart_upload(self, key, options=None):
+        self._call()
+        return {"upload_id": f"upload-{key}"}
+
+    def upload_part(self, key, upload_id, body, part_number, overwrite=False):
+        self._call()
+        return True
+
+    def complete_multipart_upload(self, key, upload_id, overwrite=False):
+        self._call()
+        return True
+
+    def put_object(self, key, body, options=None):
+        self._call()
+        return True
+
+    def generate_presigned_url(self, key, url_action, expiry_in_sec=None, **kwargs):
+        return {"signature": f"https://stratus.example.invalid/{key}"}
+
+
+class FakeStratus:
+    def __init__(self, store):
+        self._store = store
+
+    def bucket(self, name):
+        return FakeBucket(self._store)
+
+
+class FakeJob:
+    def __init__(self, store):
+        self._store = store
+
+    def submit_job(self, job_meta):
+        self._store.record("jobs", 0)
+        return {"job_id": "fake-job", **job_meta}
+
+
+class FakeJobScheduling:
+    def __init__(self, store):
+        self.JOB = FakeJob(store)  # pylint: disable=invalid-name
+
+
+class FakeAuthentication:
+    def __init__(self, user):
+        self._user = user
+
+    def get_current_user(self):
+        if not self._user:
+            raise RuntimeError("No user logged in")
+        return self._user
+
+
+class FakeApp:
+    """Mimics the object returned by zcatalyst_sdk.initialize()."""
+
+    def __init__(self, store, user=None):
+        self._store = store
+        self._user = user
+
+    def zcql(self):
+        return FakeZcql(self._store)
+
+    def datastore(self):
+        return FakeDatastore(self._store)
+
+    def cache(self):
+        return FakeCache(self._store)
+
+    def email(self):
+        return FakeMail(self._store)
+
+    def signal(self):
+        return FakeSignal(self._store)
+
+    def zia(self):
+        return FakeZia(self._store)
+
+    def search(self):
+        return FakeSearch(self._store)
+
+    def smart_browz(self):
+        return FakeSmartBrowz(self._store)
+
+    def filestore(self):
+        return FakeFilestore(self._store)
+
+    def stratus(self):
+        return FakeStratus(self._store)
+
+    def job_scheduling(self):
+        return FakeJobScheduling(self._store)
+
+    def authentication(self):
+        return FakeAuthentication(self._user)
+
+
+def install_sms_stub(store):
+    """Route sms_service through the fake store instead of Twilio."""
+    from services import sms_service
+
+    def fake_send(to_phone, body):
+        store.record("sms", store.latency.sms)
+        with store.lock:
+            store.sent["sms"] += 1
+        return True
+
+    sms_service._send_sms = fake_send
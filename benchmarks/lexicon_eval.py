@@ -0,0 +1,135 @@
+"""
+Accuracy and coverage of the offline sentiment lexicon (utils.sentiment).
+
+By default two sets are scored: the labelled feedback shipped with the demo
+seed (routes/seed_routes.py), which the lexicon weights were tuned on, and
+HELD_OUT below, which they were not — only the held-out figures say how the
+lexicon generalises. Pass --pairs with a JSON export of
+[{"text": ..., "sentiment": ...}] rows to evaluate on real feedback.
+
+    python -m benchmarks.lexicon_eval
+    python -m benchmarks.lexicon_eval --pairs feedback.json --show-misses
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+from collections import Counter
+
+from benchmarks import FUNCTION_DIR
+
+# Written and labelled separately from the seed data; do not tune the lexicon on these
+HELD_OUT = [
+    {"text": "Could have been better.", "sentiment": "neutral"},
+    {"text": "The consultation could have been longer.", "sentiment": "neutral"},
+    {"text": "Staff should have been more polite.", "sentiment": "negative"},
+    {"text": "I wish the clinic was less crowded.", "sentiment": "negative"},
+    {"text": "Not happy with the treatment.", "sentiment": "negative"},
+    {"text": "Doctor did not listen to me.", "sentiment": "negative"},
+    {"text": "Wasn't rude at all, very patient.", "sentiment": "positive"},
+    {"text": "Not bad.", "sentiment": "neutral"},
+    {"text": "Nothing great, nothing bad.", "sentiment": "neutral"},
+    {"text": "Waited two hours for a five minute visit.", "sentiment": "negative"},
+    {"text": "Appointment started on time, thank you!", "sentiment": "positive"},
+    {"text": "Prescription worked, fever gone in two days.", "sentiment": "positive"},
+    {"text": "The nurse was sweet with my daughter.", "sentiment": "positive"},
+    {"text": "Billing counter was confusing.", "sentiment": "negative"},
+    {"text": "Fees are too high for a quick check.", "sentiment": "negative"},
+    {"text": "Very clean clinic and caring staff.", "sentiment": "positive"},
+    {"text": "Okay visit.", "sentiment": "neutral"},
+    {"text": "It was fine.", "sentiment": "positive"},
+    {"text": "Average.", "sentiment": "neutral"},
+    {"text": "Reception never picked up the phone.", "sentiment": "negative"},
+    {"text": "Dr. Mehta explained the reports patiently.", "sentiment": "positive"},
+    {"text": "Great doctor but the wait was long.", "sentiment": "neutral"},
+    {"text": "Worst experience ever.", "sentiment": "negative"},
+    {"text": "Highly recommend this clinic to everyone.", "sentiment": "positive"},
+    {"text": "Medicines given did not help.", "sentiment": "negative"},
+    {"text": "Follow up was smooth and quick.", "sentiment": "positive"},
+    {"text": "Would recommend.", "sentiment": "positive"},
+    {"text": "Doctor seemed distracted and hurried.", "sentiment": "negative"},
+    {"text": "No complaints.", "sentiment": "positive"},
+    {"text": "The online booking was easy.", "sentiment": "positive"},
+    {"text": "Should be faster at the pharmacy.", "sentiment": "negative"},
+    {"text": "Hardly any wait today, nice.", "sentiment": "positive"},
+    {"text": "Diagnosis was wrong, had to see another doctor.", "sentiment": "negative"},
+    {"text": "Decent service.", "sentiment": "neutral"},
+    {"text": "Thanks for the help with my mother's surgery.", "sentiment": "positive"},
+    {"text": "The doctor was never rude, just a little slow.", "sentiment": "neutral"},
+]
+
+
+def seed_pairs():
+    """Every {"text": ..., "sentiment": ...} literal in seed_routes.py."""
+    with open(os.path.join(FUNCTION_DIR, "routes", "seed_routes.py")) as fh:
+        tree = ast.parse(fh.read())
+    pairs = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        try:
+            literal = {k.value: v.value for k, v in zip(node.keys, node.values)
+                       if isinstance(k, ast.Constant) and isinstance(v, ast.Constant)}
+        except AttributeError:
+            continue
+        if isinstance(literal.get("text"), str) and literal.get("sentiment"):
+            pairs.append({"text": literal["text"], "sentiment": literal["sentiment"]})
+    return pairs
+
+
+def evaluate(pairs, classify, show_misses=False):
+    """Print coverage, agreement and the confusion counts for one set of pairs."""
+    answered = correct = 0
+    confusion = Counter()
+    misses = []
+    for pair in pairs:
+        label = classify(pair["text"])
+        if label is None:
+            continue
+        answered += 1
+        expected = (pair["sentiment"] or "").lower()
+        confusion[(expected, label)] += 1
+        if label == expected:
+            correct += 1
+        else:
+            misses.append((pair["text"], expected, label))
+
+    print(f"Pairs: {len(pairs)}")
+    print(f"Answered offline: {answered} ({answered / len(pairs):.0%}) — the rest fall back to Zia")
+    if answered:
+        print(f"Agreement on answered: {correct}/{answered} ({correct / answered:.0%})")
+    for (expected, label), count in sorted(confusion.items()):
+        print(f"  labelled {expected:<9} -> lexicon {label:<9} {count}")
+    if show_misses:
+        for text, expected, label in misses:
+            print(f"  MISS [{expected} -> {label}] {text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.lexicon_eval")
+    parser.add_argument("--pairs", help="JSON file of [{text, sentiment}] rows")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args(argv)
+
+    from utils.sentiment import classify
+
+    if args.pairs:
+        with open(args.pairs) as fh:
+            sets = [("Pairs from " + args.pairs, json.load(fh))]
+    else:
+        sets = [("Seed pairs (tuning set)", seed_pairs()), ("Held-out pairs", HELD_OUT)]
+
+    for title, pairs in sets:
+        print(title)
+        if not pairs:
+            print("No labelled pairs found")
+            return 1
+        evaluate(pairs, classify, args.show_misses)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
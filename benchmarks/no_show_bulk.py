@@ -0,0 +1,132 @@
+"""
+End-of-day no-show marking: per-row update_row vs the chunked bulk job.
+
+Loads a synthetic day of stale (booked / in-queue) appointments spread over
+many clinics and marks them no-show twice on separate stores:
+
+  per-row  the previous cron body: one query, then update_row and a summary
+           cache delete per appointment. Run on --legacy-sample rows and
+           projected linearly to the full day, since it is too slow to run
+           in full with realistic latency.
+  bulk     routes.cron_routes.NO_SHOW_JOB through services.batch_service:
+           300-row chunks written as parallel update_rows batches grouped by
+           clinic, then queue-cache and summary upkeep once per clinic.
+
+    python -m benchmarks.no_show_bulk --appointments 50000 --clinics 200 --latency-ms 20
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from benchmarks.fake_catalyst import FakeApp, FakeStore, LatencyProfile
+
+STALE_STATUSES = ("booked", "in-queue")
+
+
+def load_day(store, clinics, appointments, today, seed):
+    """Stale appointments for `today`, clinic sizes skewed like real tenants."""
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(clinics)]
+    clinic_ids = [str(9_000_000 + i) for i in range(clinics)]
+    rows = []
+    for i in range(appointments):
+        clinic_id = rng.choices(clinic_ids, weights)[0]
+        rows.append({
+            "clinic_id": clinic_id,
+            "doctor_id": f"{clinic_id}{rng.randrange(4)}",
+            "patient_id": str(7_000_000 + rng.randrange(appointments)),
+            "appointment_date": today,
+            "appointment_time": f"{9 + i % 9:02d}:{(i * 15) % 60:02d}",
+            "status": rng.choice(STALE_STATUSES),
+            "token_number": f"T-{i % 120 + 1:03d}",
+        })
+    store.load("Appointments", rows)
+    store.db.execute('CREATE INDEX appt_day ON "Appointments" (appointment_date, status)')
+    return clinic_ids
+
+
+def legacy_mark(app, today):
+    """The pre-batch cron body."""
+    from services.patient_summary_service import invalidate_patient_summary
+
+    stale = app.zcql().execute_query(
+        f"SELECT ROWID, status, clinic_id, patient_id FROM Appointments "
+        f"WHERE appointment_date = '{today}' AND status IN ('booked', 'in-queue')"
+    )
+    table = app.datastore().table("Appointments")
+    marked = 0
+    for row in stale or []:
+        appt = row["Appointments"]
+        table.update_row({"ROWID": appt["ROWID"], "status": "no-show"})
+        invalidate_patient_summary(app, appt["clinic_id"], appt.get("patient_id"))
+        marked += 1
+    return marked
+
+
+def bulk_mark(app, today):
+    from routes.cron_routes import NO_SHOW_JOB
+    from services.batch_service import run_batch_job, JOB_RUNNING
+
+    invocations = 0
+    while True:
+        invocations += 1
+        run = run_batch_job(app, NO_SHOW_JOB, today)
+        if run["status"] != JOB_RUNNING:
+            return run["stats"].get("marked", 0), invocations
+
+
+def measure(store, fn):
+    before = store.snapshot()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    after = store.snapshot()
+    calls = {name: after[name] - before[name] for name in ("zcql", "datastore", "cache", "signal")}
+    return result, elapsed, calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.no_show_bulk")
+    parser.add_argument("--appointments", type=int, default=50000)
+    parser.add_argument("--clinics", type=int, default=200)
+    parser.add_argument("--legacy-sample", type=int, default=500,
+                        help="rows the per-row path is timed on before projecting")
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="simulated latency of every ZCQL / Data Store / cache call")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    from utils.constants import ist_today
+
+    today = ist_today()
+    latency = LatencyProfile.uniform(args.latency_ms)
+
+    legacy_rows = min(args.legacy_sample, args.appointments)
+    legacy_store = FakeStore(latency)
+    load_day(legacy_store, args.clinics, legacy_rows, today, args.seed)
+    legacy_marked, legacy_s, legacy_calls = measure(legacy_store, lambda: legacy_mark(FakeApp(legacy_store), today))
+    scale = args.appointments / legacy_rows
+
+    bulk_store = FakeStore(latency)
+    load_day(bulk_store, args.clinics, args.appointments, today, args.seed)
+    (bulk_marked, invocations), bulk_s, bulk_calls = measure(bulk_store, lambda: bulk_mark(FakeApp(bulk_store), today))
+    left = bulk_store.db.execute(
+        "SELECT COUNT(*) FROM Appointments WHERE status IN ('booked', 'in-queue')"
+    ).fetchone()[0]
+
+    print(f"{args.appointments} stale appointments over {args.clinics} clinics, "
+          f"{args.latency_ms:g} ms per Catalyst call")
+    print(f"{'path':<10}{'marked':>9}{'seconds':>11}{'zcql':>9}{'datastore':>11}{'cache':>9}{'invocations':>13}")
+    print(f"{'per-row':<10}{legacy_marked * scale:>9.0f}{legacy_s * scale:>11.1f}"
+          f"{legacy_calls['zcql']:>9}{legacy_calls['datastore'] * scale:>11.0f}{legacy_calls['cache'] * scale:>9.0f}"
+          f"{1:>13}   (projected from {legacy_rows} rows)")
+    print(f"{'bulk':<10}{bulk_marked:>9}{bulk_s:>11.1f}{bulk_calls['zcql']:>9}"
+          f"{bulk_calls['datastore']:>11}{bulk_calls['cache']:>9}{invocations:>13}")
+    print(f"speed-up {legacy_s * scale / bulk_s:.0f}x, {left} appointment(s) left stale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latency / round-trip summaries per endpoint, saved as JSON and diffed against a baseline.
+"""
+
+import json
+from collections import defaultdict
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """Group samples by endpoint into {endpoint: stats}."""
+    grouped = defaultdict(list)
+    for sample in samples:
+        grouped[sample["endpoint"]].append(sample)
+
+    summary = {}
+    for endpoint, rows in sorted(grouped.items()):
+        latencies = [r["ms"] for r in rows]
+        summary[endpoint] = {
+            "count": len(rows),
+            "errors": sum(1 for r in rows if r["status"] >= 500),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "zcql_avg": round(sum(r["zcql"] for r in rows) / len(rows), 2),
+            "zcql_max": max(r["zcql"] for r in rows),
+            "datastore_avg": round(sum(r["datastore"] for r in rows) / len(rows), 2),
+            "cache_avg": round(sum(r["cache"] for r in rows) / len(rows), 2),
+        }
+    return summary
+
+
+def format_table(summary, baseline=None):
+    """Render a summary as a fixed-width text table, with deltas when a baseline is given."""
+    header = f"{'endpoint':<42} {'n':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'zcql':>6} {'zmax':>5}"
+    lines = [header, "-" * len(header)]
+    for endpoint, stats in summary.items():
+        line = (f"{endpoint:<42} {stats['count']:>5} {stats['errors']:>4} "
+                f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                f"{stats['zcql_avg']:>6.1f} {stats['zcql_max']:>5}")
+        lines.append(line)
+        base = (baseline or {}).get(endpoint)
+        if base:
+            lines.append(
+                f"{'  vs baseline':<42} {'':>5} {'':>4} "
+                f"{_delta(stats['p50_ms'], base['p50_ms']):>8} "
+                f"{_delta(stats['p95_ms'], base['p95_ms']):>8} "
+                f"{_delta(stats['p99_ms'], base['p99_ms']):>8} "
+                f"{_delta(stats['zcql_avg'], base['zcql_avg']):>6} "
+                f"{_delta(stats['zcql_max'], base['zcql_max']):>5}"
+            )
+    return "\n".join(lines)
+
+
+def _delta(current, previous):
+    if not previous:
+        return "new" if current else "="
+    change = (current - previous) / previous * 100.0
+    if abs(change) < 0.5:
+        return "="
+    return f"{change:+.0f}%"
+
+
+def diff(summary, baseline):
+    """Per-endpoint changes against a baseline: {endpoint: {metric: (before, after)}}."""
+    changes = {}
+    for endpoint in sorted(set(summary) | set(baseline)):
+        before = baseline.get(endpoint)
+        after = summary.get(endpoint)
+        if before is None or after is None:
+            changes[endpoint] = {"added" if before is None else "removed": True}
+            continue
+        changes[endpoint] = {
+            metric: (before[metric], after[metric])
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "zcql_avg", "zcql_max")
+            if before[metric] != after[metric]
+        }
+    return changes
+
+
+def save(path, summary, meta):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "endpoints": summary}, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["endpoints"]
@@ -0,0 +1,119 @@
+"""
+Tenant-scoped vs cross-tenant Catalyst Search for patient lookup.
+
+Seeds many small clinics into one fake store and runs the same queries
+through the previous approach (search name/phone/email across all clinics,
+then drop other clinics' rows) and through services.search_service
+(clinic-prefixed search_key). Reports latency, rows shipped per query and
+recall against the clinic's true matches, with the engine's result cap.
+The fake engine scans SQLite rather than an inverted index, so latency is
+dominated by --latency-ms and the per-row cost of what comes back.
+
+    python -m benchmarks.search_scoping --clinics 500 --patients 40 --queries 300
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from benchmarks.fake_catalyst import FakeApp, FakeSearch, FakeStore, LatencyProfile
+from benchmarks.report import percentile
+from benchmarks.seed import iter_clinics, iter_patients
+
+
+def legacy_search(app, clinic_id, query_text):
+    """The pre-scoping lookup: unscoped engine query, clinic filter applied afterwards."""
+    result = app.search().execute_search_query({
+        "search": f"{query_text}*",
+        "search_table_columns": {"Patients": ["name", "phone", "email"]},
+    })
+    rows = (result or {}).get("Patients", [])
+    return [r["ROWID"] for r in rows if r.get("clinic_id") == str(clinic_id)], len(rows)
+
+
+def scoped_search(app, clinic_id, query_text, shipped):
+    from services.search_service import search_patients
+
+    before = shipped["rows"]
+    patients = search_patients(app, clinic_id, query_text)
+    return [p["id"] for p in patients], shipped["rows"] - before
+
+
+def true_matches(patients, query_text):
+    """Patients of one clinic whose name word starts with the query, or whose phone ends with it."""
+    q = query_text.lower()
+    if q.isdigit():
+        return {p["ROWID"] for p in patients if p["phone"].endswith(q)}
+    return {p["ROWID"] for p in patients if any(w.startswith(q) for w in p["name"].lower().split())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.search_scoping")
+    parser.add_argument("--clinics", type=int, default=500)
+    parser.add_argument("--patients", type=int, default=40, help="patients per clinic")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Search round trip")
+    parser.add_argument("--row-ms", type=float, default=0.05,
+                        help="simulated transfer/decode cost per returned row")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+
+    store = FakeStore(LatencyProfile(search=args.latency_ms))
+    tenants = []
+    for clinic_index, clinic in enumerate(iter_clinics(args.clinics)):
+        clinic_id = store.load("Clinics", [clinic])[0]["ROWID"]
+        tenants.append((clinic_id, store.load("Patients", iter_patients(clinic_id, args.patients, clinic_index))))
+
+    # Count the rows the engine returns, before any filtering in the service
+    shipped = {"rows": 0}
+    execute = FakeSearch.execute_search_query
+
+    def counting_execute(self, query):
+        result = execute(self, query)
+        rows = sum(len(rows) for rows in result.values())
+        shipped["rows"] += rows
+        time.sleep(rows * args.row_ms / 1000.0)
+        return result
+
+    FakeSearch.execute_search_query = counting_execute
+    app = FakeApp(store)
+    rng = random.Random(args.seed)
+
+    stats = {name: {"ms": [], "shipped": [], "recall": []} for name in ("cross-tenant", "scoped")}
+    try:
+        for _ in range(args.queries):
+            clinic_id, patients = rng.choice(tenants)
+            patient = rng.choice(patients)
+            if rng.random() < 0.7:
+                query_text = patient["name"].split()[rng.randint(0, 1)][:3]
+            else:
+                query_text = patient["phone"][-4:]
+            truth = true_matches(patients, query_text)
+
+            for name in stats:
+                start = time.perf_counter()
+                if name == "scoped":
+                    found, rows = scoped_search(app, clinic_id, query_text, shipped)
+                else:
+                    found, rows = legacy_search(app, clinic_id, query_text)
+                stats[name]["ms"].append((time.perf_counter() - start) * 1000.0)
+                stats[name]["shipped"].append(rows)
+                stats[name]["recall"].append(len(truth & set(found)) / len(truth) if truth else 1.0)
+    finally:
+        FakeSearch.execute_search_query = execute
+
+    print(f"{args.clinics} clinics x {args.patients} patients, {args.queries} queries, "
+          f"engine cap {FakeSearch.MAX_RESULTS} rows")
+    print(f"{'approach':<14}{'p50 ms':>9}{'p95 ms':>9}{'rows/query':>12}{'recall':>9}{'full recall':>13}")
+    for name, s in stats.items():
+        full = sum(1 for r in s["recall"] if r == 1.0) / len(s["recall"])
+        print(f"{name:<14}{percentile(s['ms'], 50):>9.2f}{percentile(s['ms'], 95):>9.2f}"
+              f"{sum(s['shipped']) / len(s['shipped']):>12.1f}"
+              f"{sum(s['recall']) / len(s['recall']):>9.1%}{full:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
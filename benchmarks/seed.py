@@ -0,0 +1,175 @@
+"""
+Synthetic tenant generators, modelled on routes/seed_routes.py.
+Everything is a generator so large datasets never sit in memory twice.
+"""
+
+import json
+import random
+from datetime import timedelta
+
+from utils.constants import (
+    TABLE_CLINICS, TABLE_DOCTORS, TABLE_PATIENTS, TABLE_APPOINTMENTS, TABLE_PRESCRIPTIONS,
+    STATUS_BOOKED, STATUS_IN_QUEUE, STATUS_IN_CONSULTATION, STATUS_COMPLETED,
+    STATUS_CANCELLED, STATUS_NO_SHOW, ist_now,
+)
+from services.search_service import with_search_key
+from utils.phone import with_phone_key
+
+FIRST_NAMES = ["Amit", "Sunita", "Rahul", "Pooja", "Vikram", "Meera", "Arjun", "Kavita",
+               "Rohan", "Ananya", "Deepak", "Neha", "Sanjay", "Ritu", "Kartik", "Lakshmi"]
+LAST_NAMES = ["Kumar", "Devi", "Verma", "Singh", "Joshi", "Nair", "Reddy", "Rao",
+              "Mehta", "Pillai", "Chauhan", "Agarwal", "Tiwari", "Saxena", "Bhatt", "Iyer"]
+SPECIALTIES = ["General Medicine", "Cardiology", "Pediatrics", "Dermatology", "ENT", "Orthopedics"]
+DOCTOR_HOURS = [("09:00", "17:00"), ("10:00", "18:00"), ("08:00", "14:00"), ("11:00", "19:00")]
+FEEDBACK = [
+    (5, "Excellent doctor, very thorough.", "positive", "excellent,thorough"),
+    (4, "Good consultation, explained clearly.", "positive", "good,consultation"),
+    (3, "Had to wait a bit but okay.", "neutral", "wait,okay"),
+    (2, "Clinic was too crowded.", "negative", "crowded"),
+]
+MEDICINES = [
+    {"name": "Paracetamol 650mg", "dosage": "650mg", "morning": True, "afternoon": True,
+     "night": True, "when": "after_meal", "duration": "5 days", "notes": ""},
+    {"name": "Cetirizine", "dosage": "10mg", "morning": False, "afternoon": False,
+     "night": True, "when": "after_meal", "duration": "3 days", "notes": ""},
+]
+# Status mix for past days and for today
+PAST_STATUSES = [STATUS_COMPLETED] * 8 + [STATUS_NO_SHOW, STATUS_CANCELLED]
+TODAY_STATUSES = [STATUS_COMPLETED, STATUS_IN_CONSULTATION, STATUS_IN_QUEUE, STATUS_IN_QUEUE,
+                  STATUS_BOOKED, STATUS_BOOKED, STATUS_BOOKED, STATUS_CANCELLED]
+
+
+def _name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _time_slots(start, end):
+    """15-minute slots between HH:MM bounds."""
+    h, m = map(int, start.split(":"))
+    end_h, end_m = map(int, end.split(":"))
+    while (h, m) < (end_h, end_m):
+        yield f"{h:02d}:{m:02d}"
+        m += 15
+        if m == 60:
+            h, m = h + 1, 0
+
+
+def iter_clinics(count):
+    for i in range(count):
+        yield {
+            "name": f"Bench Clinic {i}",
+            "slug": f"bench-{i}",
+            "address": f"{i}, Bench Road",
+            "phone": f"022-{5550000 + i}",
+            "email": f"admin{i}@bench.example",
+            "admin_user_id": f"user-{i}",
+            "logo_url": "",
+        }
+
+
+def iter_doctors(clinic_id, count, rng):
+    for i in range(count):
+        start, end = DOCTOR_HOURS[i % len(DOCTOR_HOURS)]
+        yield {
+            "clinic_id": clinic_id,
+            "name": _name(rng),
+            "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+            "email": f"dr{i}.{clinic_id}@bench.example",
+            "phone": f"98{rng.randrange(10 ** 8):08d}",
+            "available_from": start,
+            "available_to": end,
+            "consultation_fee": str(400 + 100 * (i % 5)),
+            "status": "active",
+        }
+
+
+def iter_patients(clinic_id, count, clinic_index):
+    rng = random.Random(clinic_index)
+    for i in range(count):
+        yield with_search_key(clinic_id, with_phone_key({
+            "clinic_id": clinic_id,
+            "name": _name(rng),
+            "phone": f"9{clinic_index % 100:02d}{i:07d}",
+            "email": f"patient{i}.{clinic_id}@bench.example",
+            "age": str(rng.randint(1, 90)),
+            "gender": rng.choice(["Male", "Female"]),
+            "blood_group": rng.choice(["A+", "B+", "O+", "AB+"]),
+            "medical_history": "",
+        }))
+
+
+def iter_appointments(clinic_id, doctors, patient_ids, count, rng, days=7):
+    """
+    Spread `count` appointments over today and the previous days, with the
+    status mix of a real clinic. Yields (appointment_row, prescription_or_None).
+    """
+    today = ist_now().date()
+    counters = {}
+    for i in range(count):
+        offset = i % (days + 1)
+        date_str = (today - timedelta(days=offset)).isoformat()
+        doctor = doctors[i % len(doctors)]
+        slots = list(_time_slots(doctor["available_from"], doctor["available_to"]))
+        counters[date_str] = counters.get(date_str, 0) + 1
+        status = rng.choice(TODAY_STATUSES if offset == 0 else PAST_STATUSES)
+        row = {
+            "clinic_id": clinic_id,
+            "doctor_id": doctor["ROWID"],
+            "patient_id": rng.choice(patient_ids),
+            "appointment_date": date_str,
+            "appointment_time": rng.choice(slots),
+            "status": status,
+            "token_number": f"T-{counters[date_str]:03d}",
+            "notes": "",
+            "feedback_score": "",
+            "feedback_text": "",
+            "feedback_sentiment": "",
+            "feedback_keywords": "",
+        }
+        rx = None
+        if status == STATUS_COMPLETED:
+            score, text, sentiment, keywords = rng.choice(FEEDBACK)
+            if rng.random() < 0.5:
+                row.update(feedback_score=str(score), feedback_text=text,
+                           feedback_sentiment=sentiment, feedback_keywords=keywords)
+            rx = {
+                "clinic_id": clinic_id,
+                "doctor_id": doctor["ROWID"],
+                "patient_id": row["patient_id"],
+                "diagnosis": "Viral fever",
+                "medicines": json.dumps(MEDICINES),
+                "advice": "Rest and fluids.",
+                "follow_up_date": (today + timedelta(days=rng.randint(1, 14))).isoformat(),
+                "prescription_url": "",
+            }
+        yield row, rx
+
+
+def seed_store(store, clinics, patients, appointments, doctors_per_clinic=4, seed=42):
+    """
+    Load N clinics x M patients x K appointments straight into a FakeStore.
+    Returns a list of tenant dicts used by the traffic generator.
+    """
+    rng = random.Random(seed)
+    tenants = []
+    for clinic_index, clinic in enumerate(iter_clinics(clinics)):
+        clinic_row = store.load(TABLE_CLINICS, [clinic])[0]
+        clinic_id = clinic_row["ROWID"]
+        doctors = store.load(TABLE_DOCTORS, iter_doctors(clinic_id, doctors_per_clinic, rng))
+        patient_rows = store.load(TABLE_PATIENTS, iter_patients(clinic_id, patients, clinic_index))
+        patient_ids = [p["ROWID"] for p in patient_rows]
+
+        for appt, rx in iter_appointments(clinic_id, doctors, patient_ids, appointments, rng):
+            appt_row = store.load(TABLE_APPOINTMENTS, [appt])[0]
+            if rx:
+                rx["appointment_id"] = appt_row["ROWID"]
+                store.load(TABLE_PRESCRIPTIONS, [rx])
+
+        tenants.append({
+            "clinic_id": clinic_id,
+            "slug": clinic["slug"],
+            "user": {"user_id": clinic["admin_user_id"], "email_id": clinic["email"]},
+            "doctors": doctors,
+            "patients": patient_rows,
+        })
+    return tenants
@@ -0,0 +1,134 @@
+"""
+Rendering follow-up reminders: per-send f-strings vs parsed templates.
+
+Renders the mail and SMS body of --reminders synthetic reminders spread
+over --clinics clinics, three ways:
+
+  f-string         the previous per-send f-string bodies, nothing escaped
+  f-string+escape  the same, with every value passed through html.escape
+                   (what the f-strings would cost made safe)
+  template         services.mail_service / sms_service templates, parsed
+                   once at import into literal pieces and slots, with the
+                   clinic header from template_service.clinic_header (built
+                   once per clinic)
+
+No Catalyst calls are made; this times the rendering alone. Templates are
+not a speed-up over escaped f-strings: the generic slot loop costs one or two
+microseconds per reminder more (str.format/format_map, which rescans the
+literal text on every call, is slower still). They exist so every value is
+escaped and each body is defined once; this shows what that costs next to
+a send, which is a network call taking milliseconds.
+
+    python -m benchmarks.template_render --reminders 100000 --clinics 200
+"""
+
+import argparse
+import html
+import random
+import time
+
+
+def make_reminders(count, clinics, seed):
+    rng = random.Random(seed)
+    clinic_rows = [
+        {"ROWID": str(9_000_000 + i), "name": f"Sunrise Clinic & Diagnostics {i}"}
+        for i in range(clinics)
+    ]
+    weights = [1.0 / (i + 1) for i in range(clinics)]
+    reminders = []
+    for i in range(count):
+        clinic = rng.choices(clinic_rows, weights)[0]
+        reminders.append({
+            "clinic_id": clinic["ROWID"],
+            "clinic_name": clinic["name"],
+            "patient_name": f"Patient <{i}> O'Neil",
+            "doctor_name": rng.choice(["Asha Rao", "Vikram Mehta", "Pooja Kumar", "Kartik Pillai"]),
+            "follow_up_date": f"2025-01-{1 + i % 28:02d}",
+        })
+    return reminders
+
+
+def legacy_render(r, esc):
+    """The former inline cron body and SMS text."""
+    clinic_name = esc(r["clinic_name"])
+    mail = f"""
+                <html>
+                <body style="font-family:Arial,sans-serif;max-width:600px;margin:0 auto;">
+                    <div style="background:#0d9488;color:white;padding:20px;text-align:center;">
+                        <h1 style="margin:0;">{clinic_name}</h1>
+                        <p style="margin:5px 0 0;">Follow-up Reminder</p>
+                    </div>
+                    <div style="padding:20px;background:#f8fafc;">
+                        <p>Dear <strong>{esc(r['patient_name'])}</strong>,</p>
+                        <p>This is a friendly reminder that you have a follow-up appointment scheduled for <strong>{esc(r['follow_up_date'])}</strong> with <strong>Dr. {esc(r['doctor_name'])}</strong>.</p>
+                        <p>Please book your appointment at your earliest convenience.</p>
+                        <p style="color:#64748b;font-size:14px;">Wishing you good health!</p>
+                    </div>
+                </body>
+                </html>
+                """
+    sms = (
+        f"Hi {r['patient_name']}! Reminder: Your follow-up with Dr. {r['doctor_name']} "
+        f"is on {r['follow_up_date']}.\n\n"
+        f"Please book your appointment at {r['clinic_name']}.\n\n"
+        f"Stay healthy! - CareDesk"
+    )
+    return mail, sms
+
+
+def template_renderer():
+    """Importing the senders parses their templates, once, before timing starts."""
+    from services.mail_service import FOLLOW_UP_MAIL
+    from services.sms_service import FOLLOW_UP_SMS
+    from services.template_service import clinic_header
+
+    def render(r):
+        mail = FOLLOW_UP_MAIL.render({
+            "clinic_header": clinic_header(r["clinic_id"], r["clinic_name"]),
+            "patient_name": r["patient_name"],
+            "doctor_name": r["doctor_name"],
+            "follow_up_date": r["follow_up_date"],
+        })
+        sms = FOLLOW_UP_SMS.render(r)
+        return mail, sms
+
+    return render
+
+
+def timed(reminders, render, repeat):
+    """Best of `repeat` passes over all reminders: (seconds, characters rendered)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = 0
+        for r in reminders:
+            mail, sms = render(r)
+            size += len(mail) + len(sms)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.template_render")
+    parser.add_argument("--reminders", type=int, default=100000)
+    parser.add_argument("--clinics", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="passes per path; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    reminders = make_reminders(args.reminders, args.clinics, args.seed)
+    results = [
+        ("f-string", timed(reminders, lambda r: legacy_render(r, lambda v: v), args.repeat)),
+        ("f-string+escape", timed(reminders, lambda r: legacy_render(r, html.escape), args.repeat)),
+        ("template", timed(reminders, template_renderer(), args.repeat)),
+    ]
+
+    print(f"{args.reminders} follow-up reminders (mail + SMS) over {args.clinics} clinics")
+    print(f"{'path':<18}{'seconds':>9}{'us/reminder':>13}{'MB rendered':>13}")
+    for name, (seconds, size) in results:
+        print(f"{name:<18}{seconds:>9.2f}{seconds / args.reminders * 1e6:>13.1f}{size / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
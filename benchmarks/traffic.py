@@ -0,0 +1,165 @@
+"""
+Traffic mixes that drive main.handler through Flask test request contexts.
+"""
+
+import random
+import re
+import time
+from datetime import timedelta
+
+from flask import Flask, request as flask_request
+
+import main
+from utils.constants import ist_now
+from benchmarks.fake_catalyst import FakeApp
+from benchmarks.seed import _time_slots
+
+_flask_app = Flask("caredesk-bench")
+
+# Endpoint label normalisation: ids and slugs collapse into placeholders
+_LABEL_RULES = [
+    (re.compile(r"/\d+(?=/|$)"), "/:id"),
+    (re.compile(r"^(/api/public/(?:clinic|queue))/[a-z0-9\-]+$"), r"\1/:slug"),
+]
+
+
+def endpoint_label(method, path):
+    label = path
+    for pattern, repl in _LABEL_RULES:
+        label = pattern.sub(repl, label)
+    return f"{method} {label}"
+
+
+class Driver:
+    """Sends requests through main.handler against a FakeStore and records samples."""
+
+    def __init__(self, store, tenants, seed=7):
+        self.store = store
+        self.tenants = tenants
+        self.rng = random.Random(seed)
+        self.samples = []
+        self._current_user = None
+        main.zcatalyst_sdk.initialize = lambda req=None, **kwargs: FakeApp(store, self._current_user)
+
+    def call(self, method, path, user=None, json=None, query=None):
+        self._current_user = user
+        before = self.store.snapshot()
+        with _flask_app.test_request_context(path, method=method, json=json, query_string=query):
+            start = time.perf_counter()
+            response = main.handler(flask_request)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+        after = self.store.snapshot()
+        self.samples.append({
+            "endpoint": endpoint_label(method, path),
+            "status": response.status_code,
+            "ms": elapsed_ms,
+            "zcql": after["zcql"] - before["zcql"],
+            "datastore": after["datastore"] - before["datastore"],
+            "cache": after["cache"] - before["cache"],
+        })
+        return response
+
+    # ── request builders ─────────────────────────────────────────
+
+    def _tenant(self):
+        return self.rng.choice(self.tenants)
+
+    def book_public(self):
+        tenant = self._tenant()
+        doctor = self.rng.choice(tenant["doctors"])
+        tomorrow = (ist_now().date() + timedelta(days=1)).isoformat()
+        slot = self.rng.choice(list(_time_slots(doctor["available_from"], doctor["available_to"])))
+        if self.rng.random() < 0.6:
+            patient = self.rng.choice(tenant["patients"])
+            name, phone = patient["name"], patient["phone"]
+        else:
+            name, phone = "Walk In", f"7{self.rng.randrange(10 ** 9):09d}"
+        return self.call("POST", "/api/public/book", json={
+            "clinic_slug": tenant["slug"],
+            "doctor_id": doctor["ROWID"],
+            "patient_name": name,
+            "patient_phone": phone,
+            "patient_email": "walkin@bench.example",
+            "appointment_date": tomorrow,
+            "appointment_time": slot,
+        })
+
+    def book_staff(self):
+        tenant = self._tenant()
+        doctor = self.rng.choice(tenant["doctors"])
+        patient = self.rng.choice(tenant["patients"])
+        tomorrow = (ist_now().date() + timedelta(days=1)).isoformat()
+        slot = self.rng.choice(list(_time_slots(doctor["available_from"], doctor["available_to"])))
+        return self.call("POST", "/api/appointments", user=tenant["user"], json={
+            "doctor_id": doctor["ROWID"],
+            "patient_id": patient["ROWID"],
+            "appointment_date": tomorrow,
+            "appointment_time": slot,
+        })
+
+    def public_clinic(self):
+        return self.call("GET", f"/api/public/clinic/{self._tenant()['slug']}")
+
+    def public_queue(self):
+        return self.call("GET", f"/api/public/queue/{self._tenant()['slug']}")
+
+    def staff_queue(self):
+        return self.call("GET", "/api/appointments/queue", user=self._tenant()["user"])
+
+    def dashboard(self):
+        return self.call("GET", "/api/dashboard/stats", user=self._tenant()["user"])
+
+    def appointments_today(self):
+        return self.call("GET", "/api/appointments", user=self._tenant()["user"])
+
+    def doctors(self):
+        return self.call("GET", "/api/doctors", user=self._tenant()["user"])
+
+    def patient_search(self):
+        tenant = self._tenant()
+        q = self.rng.choice(tenant["patients"])["name"].split()[0][:3]
+        return self.call("GET", "/api/patients/search", user=tenant["user"], query={"q": q})
+
+    def my_appointments(self):
+        tenant = self._tenant()
+        phone = self.rng.choice(tenant["patients"])["phone"]
+        return self.call("POST", "/api/public/my-appointments", json={"phone": phone})
+
+    def cron_no_shows(self):
+        return self.call("GET", "/api/cron/mark-no-shows")
+
+    def cron_digest(self):
+        return self.call("GET", "/api/cron/daily-digest")
+
+    def cron_reminders(self):
+        return self.call("GET", "/api/cron/follow-up-reminders")
+
+    def cron_enrich_feedback(self):
+        return self.call("GET", "/api/cron/enrich-feedback")
+
+
+# Traffic mixes: (builder name, weight)
+MIXES = {
+    "booking_rush": [("book_public", 6), ("book_staff", 3), ("public_clinic", 4), ("my_appointments", 1)],
+    "lobby_polling": [("public_queue", 8), ("staff_queue", 2)],
+    "dashboard_refresh": [("dashboard", 4), ("appointments_today", 3), ("doctors", 1), ("patient_search", 2)],
+    "cron": [("cron_reminders", 1), ("cron_digest", 1), ("cron_no_shows", 1), ("cron_enrich_feedback", 1)],
+}
+MIXES["mixed"] = (MIXES["booking_rush"] + MIXES["lobby_polling"]
+                  + MIXES["dashboard_refresh"])
+
+
+def run_mix(driver, mix, requests):
+    """Send `requests` requests drawn from the weighted mix."""
+    if mix == "cron":
+        # Cron jobs are platform-wide; run each once per pass in schedule order
+        builders = [name for name, _ in MIXES["cron"]]
+        for i in range(requests):
+            getattr(driver, builders[i % len(builders)])()
+        return driver.samples
+
+    names = [name for name, _ in MIXES[mix]]
+    weights = [weight for _, weight in MIXES[mix]]
+    for _ in range(requests):
+        getattr(driver, driver.rng.choices(names, weights)[0])()
+    return driver.samples
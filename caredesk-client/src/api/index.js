@@ -1,5 +1,19 @@
 import { API_BASE } from '../utils/constants';
 
+// One per page load: retries of an identical submission share a key, so the
+// server replays the first response instead of booking / prescribing twice.
+const SESSION_NONCE = `${Date.now().toString(36)}${Math.random().toString(36).slice(2, 10)}`;
+
+export function idempotencyKey(scope, body) {
+  // FNV-1a hash of the request body
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < body.length; i += 1) {
+    hash ^= body.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193) >>> 0;
+  }
+  return `${scope}-${SESSION_NONCE}-${hash.toString(16)}`;
+}
+
 export async function fetchAPI(path, options = {}) {
   try {
     const res = await fetch(`${API_BASE}${path}`, {
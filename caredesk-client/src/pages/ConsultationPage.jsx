@@ -1,6 +1,6 @@
-import { useState } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { fetchAPI } from '../api';
+import { fetchAPI, idempotencyKey } from '../api';
 import { Plus, Trash2, FileText, Pill, Sun, CloudSun, Moon } from 'lucide-react';
 import { useToast } from '../components/Toast';
 
@@ -15,6 +15,92 @@ const EMPTY_MED = {
   notes: '',
 };
 
+const WHEN_VALUES = ['before_meal', 'after_meal'];
+const SUGGEST_DELAY_MS = 150;
+
+function MedicineNameInput({ value, onChange, onPick }) {
+  const [suggestions, setSuggestions] = useState([]);
+  const [open, setOpen] = useState(false);
+  const [active, setActive] = useState(0);
+  const latest = useRef(0);
+
+  useEffect(() => {
+    const q = value.trim();
+    if (!open || !q) {
+      setSuggestions([]);
+      return undefined;
+    }
+    // Only the newest request may update the list
+    const requestId = ++latest.current;
+    const timer = setTimeout(async () => {
+      const res = await fetchAPI(`/api/medicines/suggest?q=${encodeURIComponent(q)}`);
+      if (requestId === latest.current && res.status === 'success') {
+        setSuggestions(res.data || []);
+        setActive(0);
+      }
+    }, SUGGEST_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [value, open]);
+
+  const pick = (suggestion) => {
+    onPick(suggestion);
+    setOpen(false);
+    setSuggestions([]);
+  };
+
+  const handleKeyDown = (e) => {
+    if (!open || suggestions.length === 0) return;
+    if (e.key === 'ArrowDown') {
+      e.preventDefault();
+      setActive((active + 1) % suggestions.length);
+    } else if (e.key === 'ArrowUp') {
+      e.preventDefault();
+      setActive((active - 1 + suggestions.length) % suggestions.length);
+    } else if (e.key === 'Enter') {
+      e.preventDefault();
+      pick(suggestions[active]);
+    } else if (e.key === 'Escape') {
+      setOpen(false);
+    }
+  };
+
+  return (
+    <div className="relative">
+      <input
+        placeholder="e.g. Paracetamol"
+        value={value}
+        autoComplete="off"
+        onChange={(e) => { onChange(e.target.value); setOpen(true); }}
+        onKeyDown={handleKeyDown}
+        onBlur={() => setOpen(false)}
+        className="w-full rounded-lg border border-gray-300 px-3 py-2 text-sm focus:border-teal-500 focus:outline-none"
+      />
+      {open && suggestions.length > 0 && (
+        <ul className="absolute z-10 mt-1 w-full overflow-hidden rounded-lg border border-gray-200 bg-white shadow-lg">
+          {suggestions.map((s, i) => (
+            <li
+              key={s.name}
+              // onMouseDown fires before the input's blur closes the list
+              onMouseDown={(e) => { e.preventDefault(); pick(s); }}
+              onMouseEnter={() => setActive(i)}
+              className={`cursor-pointer px-3 py-2 text-sm ${i === active ? 'bg-teal-50' : ''}`}
+            >
+              <div className="flex items-center justify-between">
+                <span className="font-medium text-gray-800">{s.name}</span>
+                <span className="text-[10px] text-gray-400">{s.count}x</span>
+              </div>
+              <div className="text-xs text-gray-500">
+                {[s.dosage, s.duration, [s.morning && 'M', s.afternoon && 'A', s.night && 'N'].filter(Boolean).join('-')]
+                  .filter(Boolean).join(' · ')}
+              </div>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+}
+
 function FrequencyToggle({ label, icon: Icon, active, onClick }) {
   return (
     <button
@@ -58,6 +144,22 @@ export default function ConsultationPage() {
     setForm({ ...form, medicines: updated });
   };
 
+  // Fill a medicine row from a catalog suggestion (its most common combination)
+  const applySuggestion = (idx, suggestion) => {
+    const updated = [...form.medicines];
+    updated[idx] = {
+      ...updated[idx],
+      name: suggestion.name,
+      dosage: suggestion.dosage,
+      duration: suggestion.duration,
+      morning: suggestion.morning,
+      afternoon: suggestion.afternoon,
+      night: suggestion.night,
+      when: WHEN_VALUES.includes(suggestion.when) ? suggestion.when : '',
+    };
+    setForm({ ...form, medicines: updated });
+  };
+
   const toggleFrequency = (idx, period) => {
     const updated = [...form.medicines];
     updated[idx][period] = !updated[idx][period];
@@ -99,15 +201,17 @@ export default function ConsultationPage() {
     });
 
     setSubmitting(true);
+    const body = JSON.stringify({
+      appointment_id: appointmentId,
+      diagnosis: form.diagnosis,
+      medicines: medicinesPayload,
+      advice: form.advice,
+      follow_up_date: form.follow_up_date,
+    });
     const res = await fetchAPI('/api/prescriptions', {
       method: 'POST',
-      body: JSON.stringify({
-        appointment_id: appointmentId,
-        diagnosis: form.diagnosis,
-        medicines: medicinesPayload,
-        advice: form.advice,
-        follow_up_date: form.follow_up_date,
-      }),
+      headers: { 'Idempotency-Key': idempotencyKey('rx', body) },
+      body,
     });
     setSubmitting(false);
     if (res.status === 'success') {
@@ -159,11 +263,10 @@ export default function ConsultationPage() {
                 <div className="mb-3 flex flex-col sm:flex-row gap-2">
                   <div className="flex-1">
                     <label className="mb-1 block text-[10px] font-semibold uppercase text-gray-400">Medicine Name</label>
-                    <input
-                      placeholder="e.g. Paracetamol"
+                    <MedicineNameInput
                       value={med.name}
-                      onChange={(e) => updateMedicine(idx, 'name', e.target.value)}
-                      className="w-full rounded-lg border border-gray-300 px-3 py-2 text-sm focus:border-teal-500 focus:outline-none"
+                      onChange={(value) => updateMedicine(idx, 'name', value)}
+                      onPick={(suggestion) => applySuggestion(idx, suggestion)}
                     />
                   </div>
                   <div className="sm:w-28">
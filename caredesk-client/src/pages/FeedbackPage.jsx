@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect } from 'react';
 import { fetchAPI } from '../api';
 import LoadingSpinner from '../components/LoadingSpinner';
 import { MessageSquare, Star, ThumbsUp, ThumbsDown, Minus, RefreshCw, BarChart3, Brain, Filter, X, Tag } from 'lucide-react';
@@ -29,6 +29,7 @@ const SentimentBadge = ({ sentiment }) => {
     positive: { bg: 'bg-green-50 border-green-200', text: 'text-green-700', label: 'Positive' },
     negative: { bg: 'bg-red-50 border-red-200', text: 'text-red-700', label: 'Negative' },
     neutral: { bg: 'bg-gray-50 border-gray-200', text: 'text-gray-600', label: 'Neutral' },
+    pending: { bg: 'bg-amber-50 border-amber-200', text: 'text-amber-700', label: 'Analysing' },
   };
   const c = config[sentiment] || config.neutral;
   return (
@@ -53,28 +54,81 @@ const KeywordTags = ({ keywords }) => {
   );
 };
 
+const PAGE_SIZE = 50;
+// Default window, matching the server's analytics default
+const DEFAULT_WEEKS = 12;
+
+const isoDate = (d) => d.toISOString().slice(0, 10);
+const defaultFrom = () => isoDate(new Date(Date.now() - DEFAULT_WEEKS * 7 * 24 * 60 * 60 * 1000));
+const defaultTo = () => isoDate(new Date());
+
 export default function FeedbackPage() {
   const [feedbacks, setFeedbacks] = useState([]);
+  const [analytics, setAnalytics] = useState(null);
+  const [doctors, setDoctors] = useState([]);
+  const [hasMore, setHasMore] = useState(false);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [refreshing, setRefreshing] = useState(false);
 
   // Filters
   const [filterDoctor, setFilterDoctor] = useState('');
   const [filterSentiment, setFilterSentiment] = useState('');
-  const [filterDateFrom, setFilterDateFrom] = useState('');
-  const [filterDateTo, setFilterDateTo] = useState('');
+  const [filterDateFrom, setFilterDateFrom] = useState(defaultFrom);
+  const [filterDateTo, setFilterDateTo] = useState(defaultTo);
+
+  useEffect(() => {
+    fetchAPI('/api/doctors').then((res) => {
+      if (res.status === 'success') {
+        setDoctors(res.data.map((d) => ({ id: d.id, name: d.name })).sort((a, b) => a.name.localeCompare(b.name)));
+      }
+    });
+  }, []);
+
+  useEffect(() => { loadFeedback(); }, [filterDoctor, filterSentiment, filterDateFrom, filterDateTo]);
+
+  const rangeParams = () => {
+    const params = new URLSearchParams();
+    if (filterDoctor) params.set('doctor_id', filterDoctor);
+    if (filterDateFrom) params.set('from', filterDateFrom);
+    if (filterDateTo) params.set('to', filterDateTo);
+    return params;
+  };
 
-  useEffect(() => { loadFeedback(); }, []);
+  const listPath = (offset) => {
+    const params = rangeParams();
+    if (filterSentiment) params.set('sentiment', filterSentiment);
+    params.set('limit', PAGE_SIZE);
+    params.set('offset', offset);
+    return `/api/appointments/feedback?${params}`;
+  };
 
   const loadFeedback = async () => {
-    const res = await fetchAPI('/api/appointments/feedback');
-    if (res.status === 'success') {
-      setFeedbacks(res.data);
+    const [listRes, statsRes] = await Promise.all([
+      fetchAPI(listPath(0)),
+      fetchAPI(`/api/feedback/analytics?${rangeParams()}`),
+    ]);
+    if (listRes.status === 'success') {
+      setFeedbacks(listRes.data);
+      setHasMore(listRes.data.length === PAGE_SIZE);
+    }
+    if (statsRes.status === 'success') {
+      setAnalytics(statsRes.data);
     }
     setLoading(false);
     setRefreshing(false);
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    const res = await fetchAPI(listPath(feedbacks.length));
+    if (res.status === 'success') {
+      setFeedbacks((prev) => [...prev, ...res.data]);
+      setHasMore(res.data.length === PAGE_SIZE);
+    }
+    setLoadingMore(false);
+  };
+
   const handleRefresh = () => {
     setRefreshing(true);
     loadFeedback();
@@ -83,45 +137,22 @@ export default function FeedbackPage() {
   const clearFilters = () => {
     setFilterDoctor('');
     setFilterSentiment('');
-    setFilterDateFrom('');
-    setFilterDateTo('');
+    setFilterDateFrom(defaultFrom());
+    setFilterDateTo(defaultTo());
   };
 
-  // Unique doctors for dropdown
-  const doctors = useMemo(() => {
-    const map = new Map();
-    feedbacks.forEach((f) => {
-      if (f.doctor_id && f.doctor_name && !map.has(f.doctor_id)) {
-        map.set(f.doctor_id, f.doctor_name);
-      }
-    });
-    return Array.from(map, ([id, name]) => ({ id, name })).sort((a, b) => a.name.localeCompare(b.name));
-  }, [feedbacks]);
-
-  // Filtered feedbacks
-  const filtered = useMemo(() => {
-    return feedbacks.filter((f) => {
-      if (filterDoctor && f.doctor_id !== filterDoctor) return false;
-      if (filterSentiment && (f.feedback_sentiment || 'neutral') !== filterSentiment) return false;
-      if (filterDateFrom && f.appointment_date < filterDateFrom) return false;
-      if (filterDateTo && f.appointment_date > filterDateTo) return false;
-      return true;
-    });
-  }, [feedbacks, filterDoctor, filterSentiment, filterDateFrom, filterDateTo]);
-
-  const hasActiveFilters = filterDoctor || filterSentiment || filterDateFrom || filterDateTo;
+  const hasActiveFilters = filterDoctor || filterSentiment
+    || filterDateFrom !== defaultFrom() || filterDateTo !== defaultTo();
 
   if (loading) return <LoadingSpinner />;
 
-  // Compute summary stats from filtered data
-  const totalFeedback = filtered.length;
-  const scores = filtered.map((f) => Number(f.feedback_score) || 0);
-  const avgScore = totalFeedback > 0 ? (scores.reduce((a, b) => a + b, 0) / totalFeedback).toFixed(1) : '0';
-  const sentimentCounts = { positive: 0, negative: 0, neutral: 0 };
-  filtered.forEach((f) => {
-    const s = f.feedback_sentiment || 'neutral';
-    if (sentimentCounts[s] !== undefined) sentimentCounts[s]++;
-  });
+  // Summary stats come from the server-side weekly rollups
+  const totalFeedback = analytics?.total || 0;
+  const avgScore = analytics?.average_score != null ? analytics.average_score.toFixed(1) : '0';
+  const sentimentCounts = analytics?.sentiment || { positive: 0, negative: 0, neutral: 0, pending: 0 };
+  const scoreCounts = analytics?.score_distribution || {};
+  const topKeywords = analytics?.top_keywords || [];
+  const doctorStats = analytics?.doctors || [];
 
   return (
     <div>
@@ -129,7 +160,7 @@ export default function FeedbackPage() {
         <div>
           <h1 className="text-2xl font-bold text-gray-900">Patient Feedback</h1>
           <p className="text-sm text-gray-500">
-            {totalFeedback} feedback(s){hasActiveFilters ? ' (filtered)' : ''} — {feedbacks.length} total
+            {totalFeedback} feedback(s){hasActiveFilters ? ' (filtered)' : ''} — {filterDateFrom || 'start'} to {filterDateTo || 'today'}
           </p>
         </div>
         <button onClick={handleRefresh} disabled={refreshing} className="flex items-center gap-2 rounded-lg border border-gray-200 px-4 py-2 text-sm font-medium text-gray-600 hover:bg-gray-50 disabled:opacity-50">
@@ -204,7 +235,7 @@ export default function FeedbackPage() {
         </div>
       </div>
 
-      {totalFeedback === 0 ? (
+      {totalFeedback === 0 && feedbacks.length === 0 ? (
         <div className="rounded-xl border-2 border-dashed border-gray-200 p-12 text-center">
           <MessageSquare className="mx-auto mb-3 text-gray-300" size={40} />
           {hasActiveFilters ? (
@@ -267,7 +298,7 @@ export default function FeedbackPage() {
               </div>
               <div className="space-y-1.5">
                 {[5, 4, 3, 2, 1].map((s) => {
-                  const count = scores.filter((sc) => sc === s).length;
+                  const count = scoreCounts[s] || 0;
                   const pct = totalFeedback > 0 ? Math.round((count / totalFeedback) * 100) : 0;
                   return (
                     <div key={s} className="flex items-center gap-2">
@@ -283,9 +314,60 @@ export default function FeedbackPage() {
             </div>
           </div>
 
+          {(topKeywords.length > 0 || doctorStats.length > 1) && (
+            <div className="mb-6 grid gap-4 lg:grid-cols-2">
+              {/* Top Keywords */}
+              {topKeywords.length > 0 && (
+                <div className="rounded-xl border border-gray-100 bg-white p-5 shadow-sm">
+                  <div className="mb-3 flex items-center gap-2 text-xs font-semibold uppercase text-gray-400">
+                    <Tag size={13} /> Top Keywords
+                  </div>
+                  <div className="flex flex-wrap gap-1.5">
+                    {topKeywords.map(({ keyword, count }) => (
+                      <span key={keyword} className="inline-flex items-center gap-1 rounded-full bg-teal-50 border border-teal-200 px-2 py-0.5 text-xs text-teal-700">
+                        {keyword} <span className="text-teal-500">{count}</span>
+                      </span>
+                    ))}
+                  </div>
+                </div>
+              )}
+
+              {/* Per-doctor NPS */}
+              {doctorStats.length > 1 && (
+                <div className="rounded-xl border border-gray-100 bg-white p-5 shadow-sm">
+                  <div className="mb-3 flex items-center gap-2 text-xs font-semibold uppercase text-gray-400">
+                    <BarChart3 size={13} /> By Doctor
+                  </div>
+                  <table className="w-full text-xs">
+                    <thead>
+                      <tr className="text-left text-gray-400">
+                        <th className="pb-1 font-medium">Doctor</th>
+                        <th className="pb-1 text-right font-medium">Feedback</th>
+                        <th className="pb-1 text-right font-medium">Avg</th>
+                        <th className="pb-1 text-right font-medium">NPS</th>
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {doctorStats.map((d) => (
+                        <tr key={d.doctor_id} className="border-t border-gray-50 text-gray-600">
+                          <td className="py-1">Dr. {d.doctor_name || d.doctor_id}</td>
+                          <td className="py-1 text-right">{d.total}</td>
+                          <td className="py-1 text-right">{d.average_score != null ? d.average_score.toFixed(1) : '—'}</td>
+                          <td className={`py-1 text-right font-medium ${d.nps > 0 ? 'text-green-600' : d.nps < 0 ? 'text-red-600' : ''}`}>
+                            {d.nps != null ? Math.round(d.nps) : '—'}
+                          </td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                </div>
+              )}
+            </div>
+          )}
+
           {/* Feedback List */}
           <div className="space-y-3">
-            {filtered.map((a) => (
+            {feedbacks.map((a) => (
               <div key={a.id} className="rounded-xl border border-gray-100 bg-white p-5 shadow-sm">
                 <div className="flex items-start justify-between gap-4">
                   <div className="flex-1">
@@ -317,6 +399,14 @@ export default function FeedbackPage() {
               </div>
             ))}
           </div>
+
+          {hasMore && (
+            <div className="mt-4 text-center">
+              <button onClick={loadMore} disabled={loadingMore} className="rounded-lg border border-gray-200 px-4 py-2 text-sm font-medium text-gray-600 hover:bg-gray-50 disabled:opacity-50">
+                {loadingMore ? 'Loading…' : 'Load more'}
+              </button>
+            </div>
+          )}
         </>
       )}
     </div>
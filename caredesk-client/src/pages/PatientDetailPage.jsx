@@ -5,28 +5,43 @@ import StatusBadge from '../components/StatusBadge';
 import LoadingSpinner from '../components/LoadingSpinner';
 import { ArrowLeft, User, Phone, Mail, Calendar, FileText } from 'lucide-react';
 
+const PAGE_SIZE = 20;
+
 export default function PatientDetailPage() {
   const { patientId } = useParams();
   const [patient, setPatient] = useState(null);
-  const [appointments, setAppointments] = useState([]);
-  const [prescriptions, setPrescriptions] = useState([]);
+  const [counts, setCounts] = useState({ appointments: 0, prescriptions: 0 });
+  const [timeline, setTimeline] = useState([]);
+  const [hasMore, setHasMore] = useState(false);
   const [loading, setLoading] = useState(true);
-  const [tab, setTab] = useState('appointments');
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => { loadAll(); }, [patientId]);
 
+  const loadPage = (offset) => fetchAPI(`/api/patients/${patientId}/summary?limit=${PAGE_SIZE}&offset=${offset}`);
+
   const loadAll = async () => {
-    const [patRes, apptRes, rxRes] = await Promise.all([
-      fetchAPI(`/api/patients/${patientId}`),
-      fetchAPI(`/api/appointments/patient/${patientId}`),
-      fetchAPI(`/api/prescriptions/patient/${patientId}`),
-    ]);
-    if (patRes.status === 'success') setPatient(patRes.data);
-    if (apptRes.status === 'success') setAppointments(apptRes.data);
-    if (rxRes.status === 'success') setPrescriptions(rxRes.data);
+    setLoading(true);
+    const res = await loadPage(0);
+    if (res.status === 'success') {
+      setPatient(res.data.patient);
+      setCounts(res.data.counts);
+      setTimeline(res.data.timeline);
+      setHasMore(res.data.has_more);
+    }
     setLoading(false);
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    const res = await loadPage(timeline.length);
+    if (res.status === 'success') {
+      setTimeline((prev) => [...prev, ...res.data.timeline]);
+      setHasMore(res.data.has_more);
+    }
+    setLoadingMore(false);
+  };
+
   if (loading) return <LoadingSpinner />;
   if (!patient) return <p className="text-center text-gray-500 py-12">Patient not found.</p>;
 
@@ -59,90 +74,59 @@ export default function PatientDetailPage() {
         </div>
       </div>
 
-      {/* Tabs */}
-      <div className="mb-4 flex gap-1 rounded-lg bg-gray-100 p-1">
-        <button
-          onClick={() => setTab('appointments')}
-          className={`flex-1 rounded-md px-3 py-2 text-sm font-medium transition ${tab === 'appointments' ? 'bg-white text-teal-600 shadow-sm' : 'text-gray-500 hover:text-gray-700'}`}
-        >
-          <Calendar size={14} className="mr-1 inline" /> Appointments ({appointments.length})
-        </button>
-        <button
-          onClick={() => setTab('prescriptions')}
-          className={`flex-1 rounded-md px-3 py-2 text-sm font-medium transition ${tab === 'prescriptions' ? 'bg-white text-teal-600 shadow-sm' : 'text-gray-500 hover:text-gray-700'}`}
-        >
-          <FileText size={14} className="mr-1 inline" /> Prescriptions ({prescriptions.length})
-        </button>
+      {/* Timeline */}
+      <div className="mb-3 flex items-center gap-4 text-sm text-gray-500">
+        <span className="flex items-center gap-1"><Calendar size={14} /> {counts.appointments} appointment(s)</span>
+        <span className="flex items-center gap-1"><FileText size={14} /> {counts.prescriptions} prescription(s)</span>
       </div>
 
-      {/* Appointments tab */}
-      {tab === 'appointments' && (
-        appointments.length === 0 ? (
-          <div className="rounded-xl border-2 border-dashed border-gray-200 p-8 text-center">
-            <p className="text-gray-500">No appointments found for this patient.</p>
-          </div>
-        ) : (
-          <div className="overflow-x-auto rounded-xl border border-gray-100 bg-white shadow-sm">
-            <table className="w-full min-w-[600px] text-sm">
-              <thead className="bg-gray-50">
-                <tr>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Date</th>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Time</th>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Doctor</th>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Token</th>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Status</th>
-                  <th className="px-4 py-3 text-left font-medium text-gray-600">Rating</th>
-                </tr>
-              </thead>
-              <tbody className="divide-y divide-gray-50">
-                {appointments.map((a) => (
-                  <tr key={a.id} className="hover:bg-gray-50">
-                    <td className="px-4 py-3 font-medium text-gray-900">{a.appointment_date}</td>
-                    <td className="px-4 py-3 text-gray-600">{a.appointment_time || '—'}</td>
-                    <td className="px-4 py-3 text-gray-600">Dr. {a.doctor_name}</td>
-                    <td className="px-4 py-3 font-bold text-teal-600">{a.token_number}</td>
-                    <td className="px-4 py-3"><StatusBadge status={a.status} /></td>
-                    <td className="px-4 py-3 text-gray-600">
-                      {a.feedback_score ? `${a.feedback_score}/5` : '—'}
-                    </td>
-                  </tr>
-                ))}
-              </tbody>
-            </table>
-          </div>
-        )
-      )}
-
-      {/* Prescriptions tab */}
-      {tab === 'prescriptions' && (
-        prescriptions.length === 0 ? (
-          <div className="rounded-xl border-2 border-dashed border-gray-200 p-8 text-center">
-            <p className="text-gray-500">No prescriptions found for this patient.</p>
-          </div>
-        ) : (
-          <div className="space-y-3">
-            {prescriptions.map((rx) => (
-              <div key={rx.id} className="rounded-xl border border-gray-100 bg-white p-4 shadow-sm">
+      {timeline.length === 0 ? (
+        <div className="rounded-xl border-2 border-dashed border-gray-200 p-8 text-center">
+          <p className="text-gray-500">No appointments or prescriptions found for this patient.</p>
+        </div>
+      ) : (
+        <div className="space-y-3">
+          {timeline.map((item) => (
+            item.type === 'appointment' ? (
+              <div key={`a-${item.id}`} className="flex flex-wrap items-center gap-4 rounded-xl border border-gray-100 bg-white p-4 shadow-sm">
+                <Calendar size={16} className="text-teal-600" />
+                <div className="flex-1">
+                  <p className="font-medium text-gray-900">{item.date} {item.time && <span className="text-gray-500">&middot; {item.time}</span>}</p>
+                  <p className="text-sm text-gray-500">Dr. {item.doctor_name} &middot; Token <span className="font-bold text-teal-600">{item.token_number}</span></p>
+                </div>
+                <StatusBadge status={item.status} />
+                <span className="text-sm text-gray-600">{item.feedback_score ? `${item.feedback_score}/5` : '—'}</span>
+              </div>
+            ) : (
+              <div key={`rx-${item.id}`} className="ml-6 rounded-xl border border-gray-100 bg-white p-4 shadow-sm">
                 <div className="flex items-start justify-between">
                   <div>
-                    <p className="font-medium text-gray-900">{rx.diagnosis}</p>
-                    <p className="text-sm text-gray-500">Dr. {rx.doctor_name} &middot; {rx.appointment_date || rx.created_at || ''}</p>
+                    <p className="flex items-center gap-1 font-medium text-gray-900"><FileText size={14} className="text-teal-600" /> {item.diagnosis}</p>
+                    <p className="text-sm text-gray-500">Dr. {item.doctor_name} &middot; {item.date}</p>
                   </div>
                   <Link
-                    to={`/prescription/${rx.id}`}
+                    to={`/prescription/${item.id}`}
                     className="rounded bg-teal-50 px-3 py-1 text-xs font-medium text-teal-700 hover:bg-teal-100"
                   >
                     View Rx
                   </Link>
                 </div>
-                {rx.advice && <p className="mt-2 text-sm text-gray-600">{rx.advice}</p>}
-                {rx.follow_up_date && (
-                  <p className="mt-1 text-xs text-orange-600">Follow-up: {rx.follow_up_date}</p>
+                {item.advice && <p className="mt-2 text-sm text-gray-600">{item.advice}</p>}
+                {item.follow_up_date && (
+                  <p className="mt-1 text-xs text-orange-600">Follow-up: {item.follow_up_date}</p>
                 )}
               </div>
-            ))}
-          </div>
-        )
+            )
+          ))}
+        </div>
+      )}
+
+      {hasMore && (
+        <div className="mt-4 text-center">
+          <button onClick={loadMore} disabled={loadingMore} className="rounded-lg border border-gray-200 px-4 py-2 text-sm font-medium text-gray-600 hover:bg-gray-50 disabled:opacity-50">
+            {loadingMore ? 'Loading…' : 'Load more'}
+          </button>
+        </div>
       )}
     </div>
   );
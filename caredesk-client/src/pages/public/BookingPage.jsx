@@ -1,6 +1,6 @@
 import { useState, useEffect } from 'react';
 import { useParams } from 'react-router-dom';
-import { fetchPublicAPI } from '../../api';
+import { fetchPublicAPI, idempotencyKey } from '../../api';
 import LoadingSpinner from '../../components/LoadingSpinner';
 import ConvoKraftBot from '../../components/ConvoKraftBot';
 import { CalendarDays, CheckCircle, ListOrdered, CalendarSearch, Clock, MessageSquare } from 'lucide-react';
@@ -67,9 +67,11 @@ export default function BookingPage() {
     }
 
     setSubmitting(true);
+    const body = JSON.stringify({ clinic_slug: slug, ...form });
     const res = await fetchPublicAPI('/api/public/book', {
       method: 'POST',
-      body: JSON.stringify({ clinic_slug: slug, ...form }),
+      headers: { 'Idempotency-Key': idempotencyKey('book', body) },
+      body,
     });
     setSubmitting(false);
     if (res.status === 'success') {
@@ -46,6 +46,43 @@ def _query(zcql, query_str):
         return []
 
 
+def _phone_key(phone):
+    """
+    E.164 form of a phone number, matching Patients.phone_key. Mirrors
+    utils/phone.py in the CareDesk function (functions deploy separately).
+    """
+    raw = (phone or '').strip()
+    digits = ''.join(c for c in raw if c.isdigit())
+    if not digits:
+        return ''
+    if raw.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = '91' + digits[1:]
+    elif len(digits) == 10:
+        digits = '91' + digits
+    elif not (digits.startswith('91') and len(digits) == 12):
+        digits = '91' + digits.lstrip('0')
+    if not 8 <= len(digits) <= 15:
+        return ''
+    return f'+{digits}'
+
+
+def _phone_match(phone):
+    """
+    ZCQL condition on phone_key, or on the raw phone for rows not yet
+    backfilled with a phone_key. Mirrors utils/phone.phone_match.
+    """
+    key = _phone_key(phone)
+    forms = {(phone or '').strip(), key, key[1:]}
+    if key.startswith('+91') and len(key) == 13:
+        forms.update({key[-10:], '0' + key[-10:]})
+    in_list = ', '.join("'{}'".format(form.replace("'", "''")) for form in sorted(forms) if form)
+    return f"(phone_key = '{key}' OR phone IN ({in_list}))"
+
+
 def _respond(message, custom_followup=None):
     """Build a standard response with followup suggestions."""
     resp = {'message': message}
@@ -290,7 +327,10 @@ def _action_track_appointments(phone):
     if not zcql:
         return _respond(f"Visit the My Appointments page on CareDesk and search with: {phone}")
 
-    patients = _query(zcql, f"SELECT ROWID, clinic_id, name FROM Patients WHERE phone = '{phone}'")
+    if not _phone_key(phone):
+        return _respond(f"{phone} doesn't look like a phone number. Please enter the 10-digit number you booked with.")
+
+    patients = _query(zcql, f"SELECT ROWID, clinic_id, name FROM Patients WHERE {_phone_match(phone)}")
     if not patients:
         return _respond(
             f"No appointments found for {phone}.\n\n"
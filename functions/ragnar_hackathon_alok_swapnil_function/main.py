@@ -1,4 +1,5 @@
 import re
+import json
 import logging
 from flask import Request, make_response, jsonify
 import zcatalyst_sdk
@@ -6,7 +7,9 @@ import zcatalyst_sdk
 from routes import clinic_routes, doctor_routes, patient_routes
 from routes import appointment_routes, prescription_routes
 from routes import public_routes, dashboard_routes, cron_routes, seed_routes
+from routes import feedback_routes, export_routes, medicine_routes, job_routes
 from utils.response import error, not_found
+from utils.instrumentation import RequestStats, InstrumentedApp
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,14 +18,33 @@ logger = logging.getLogger(__name__)
 def handler(request: Request):
     """
     Main request router for CareDesk HMS.
-    Routes incoming requests to the appropriate handler based on path and method.
+    Routes incoming requests to the appropriate handler based on path and method,
+    counting every ZCQL / Data Store round trip made while serving the request.
     """
-    app = zcatalyst_sdk.initialize(req=request)
+    stats = RequestStats()
+    app = InstrumentedApp(zcatalyst_sdk.initialize(req=request), stats)
     path = request.path
     method = request.method.upper()
 
     logger.info(f"{method} {path}")
 
+    response = _route(app, request, path, method)
+
+    # A streamed body (CSV export) runs after this returns: log its summary on close
+    streamed = response.is_streamed
+    response.headers["Server-Timing"] = stats.server_timing(partial=streamed)
+    if streamed:
+        response.call_on_close(
+            lambda: logger.info(json.dumps(stats.summary(method, path, response.status_code, streamed=True)))
+        )
+    else:
+        logger.info(json.dumps(stats.summary(method, path, response.status_code)))
+    return response
+
+
+def _route(app, request, path, method):
+    """Dispatch to the route handler for path and method."""
+
     # ── Public Routes (no auth required) ────────────────────────────
 
     # GET /api/public/clinics — List all clinics
@@ -94,6 +116,12 @@ def handler(request: Request):
     if path == "/api/patients" and method == "POST":
         return patient_routes.create(app, request)
 
+    if path == "/api/patients/import" and method == "POST":
+        return patient_routes.import_patients(app, request)
+
+    if path == "/api/patients/reindex" and method == "POST":
+        return patient_routes.reindex(app, request)
+
     match = re.match(r"^/api/patients/(\d+)$", path)
     if match and method == "GET":
         return patient_routes.get_one(app, request, match.group(1))
@@ -101,6 +129,10 @@ def handler(request: Request):
     if match and method == "PUT":
         return patient_routes.update(app, request, match.group(1))
 
+    match = re.match(r"^/api/patients/(\d+)/summary$", path)
+    if match and method == "GET":
+        return patient_routes.summary(app, request, match.group(1))
+
     # ── Appointment Routes ──────────────────────────────────────────
 
     if path == "/api/appointments/queue" and method == "GET":
@@ -129,6 +161,12 @@ def handler(request: Request):
     if path == "/api/prescriptions" and method == "POST":
         return prescription_routes.create(app, request)
 
+    if path == "/api/prescriptions/drug-usage" and method == "GET":
+        return prescription_routes.drug_usage(app, request)
+
+    if path == "/api/prescriptions/items/rebuild" and method == "POST":
+        return prescription_routes.rebuild_items(app, request)
+
     match = re.match(r"^/api/prescriptions/patient/(\d+)$", path)
     if match and method == "GET":
         return prescription_routes.by_patient(app, request, match.group(1))
@@ -141,11 +179,34 @@ def handler(request: Request):
     if match and method == "GET":
         return prescription_routes.get_one(app, request, match.group(1))
 
+    # ── Medicine Catalog Routes ─────────────────────────────────────
+
+    if path == "/api/medicines/suggest" and method == "GET":
+        return medicine_routes.suggest(app, request)
+
+    if path == "/api/medicines/rebuild" and method == "POST":
+        return medicine_routes.rebuild(app, request)
+
     # ── Clinic Logo Upload ─────────────────────────────────────────
 
     if path == "/api/clinics/me/logo" and method == "POST":
         return clinic_routes.upload_logo(app, request)
 
+    # ── Feedback Analytics Routes ───────────────────────────────────
+
+    if path == "/api/feedback/analytics" and method == "GET":
+        return feedback_routes.get_analytics(app, request)
+
+    if path == "/api/feedback/analytics/rebuild" and method == "POST":
+        return feedback_routes.rebuild_analytics(app, request)
+
+    # ── Export Routes ───────────────────────────────────────────────
+
+    # GET /api/export/appointments|feedback?from&to&format=csv
+    match = re.match(r"^/api/export/(appointments|feedback)$", path)
+    if match and method == "GET":
+        return export_routes.export(app, request, match.group(1))
+
     # ── Dashboard Routes ────────────────────────────────────────────
 
     if path == "/api/dashboard/stats" and method == "GET":
@@ -170,6 +231,21 @@ def handler(request: Request):
     if path == "/api/cron/mark-no-shows" and method == "GET":
         return cron_routes.mark_no_shows(app, request)
 
+    if path == "/api/cron/rebuild-rollups" and method == "GET":
+        return cron_routes.rebuild_feedback_rollups(app, request)
+
+    if path == "/api/cron/enrich-feedback" and method == "GET":
+        return cron_routes.enrich_feedback(app, request)
+
+    # ── Batch Job Progress (app administrators) ────────────────────
+
+    if path == "/api/admin/jobs" and method == "GET":
+        return job_routes.list_runs(app, request)
+
+    match = re.match(r"^/api/admin/jobs/(\d+)$", path)
+    if match and method == "GET":
+        return job_routes.get_run(app, request, match.group(1))
+
     # ── Verify Tables ───────────────────────────────────────────────
 
     if path == "/api/verify-tables" and method == "GET":
@@ -269,7 +345,7 @@ def _verify_tables(app):
 
     expected = {
         "Clinics": {
-            "columns": ["name", "slug", "address", "phone", "email", "admin_user_id", "logo_url"],
+            "columns": ["name", "slug", "address", "phone", "email", "admin_user_id", "logo_url", "logo_thumbnail_url"],
             "fk_count": 0,
         },
         "Doctors": {
@@ -277,7 +353,7 @@ def _verify_tables(app):
             "fk_count": 1,
         },
         "Patients": {
-            "columns": ["clinic_id", "name", "phone", "email", "age", "gender", "blood_group", "medical_history"],
+            "columns": ["clinic_id", "name", "phone", "email", "age", "gender", "blood_group", "medical_history", "search_key", "phone_key"],
             "fk_count": 1,
         },
         "Appointments": {
@@ -288,6 +364,26 @@ def _verify_tables(app):
             "columns": ["clinic_id", "appointment_id", "doctor_id", "patient_id", "diagnosis", "medicines", "advice", "follow_up_date", "prescription_url"],
             "fk_count": 4,
         },
+        "FeedbackRollups": {
+            "columns": ["clinic_id", "doctor_id", "week_start", "feedback_count", "score_sum", "score_1", "score_2", "score_3", "score_4", "score_5", "positive", "negative", "neutral", "pending", "keyword_counts"],
+            "fk_count": 2,
+        },
+        "PrescriptionItems": {
+            "columns": ["clinic_id", "prescription_id", "doctor_id", "patient_id", "prescribed_date", "position", "name", "name_key", "dosage", "morning", "afternoon", "night", "timing", "duration", "notes", "instructions"],
+            "fk_count": 4,
+        },
+        "MedicineCatalog": {
+            "columns": ["clinic_id", "name_key", "name", "prescribed_count", "combos", "last_prescribed"],
+            "fk_count": 1,
+        },
+        "JobRuns": {
+            "columns": ["job_name", "run_key", "status", "last_row_id", "processed", "chunks", "invocations", "stats", "last_error", "error_count", "lease_owner", "lease_until", "started_at", "finished_at", "resume_token"],
+            "fk_count": 0,
+        },
+        "NotificationLog": {
+            "columns": ["clinic_id", "patient_id", "kind", "ref_date", "notification_key", "channels", "sent_at"],
+            "fk_count": 2,
+        },
     }
 
     all_ok = True
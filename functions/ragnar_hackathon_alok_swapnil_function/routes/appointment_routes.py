@@ -1,50 +1,27 @@
 import logging
+import re
 from utils.constants import (
     TABLE_APPOINTMENTS, TABLE_DOCTORS, TABLE_PATIENTS,
     STATUS_BOOKED, STATUS_IN_QUEUE, STATUS_TRANSITIONS, VALID_STATUSES,
-    ist_today, ist_time_now,
+    SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE, SENTIMENT_NEUTRAL, SENTIMENT_PENDING,
+    ist_today,
 )
 from utils.response import success, created, error, not_found, server_error
 from services.auth_service import require_clinic
 from services.cache_service import set_queue_state
-from services.mail_service import send_appointment_confirmation
 from services.signals_service import emit_queue_update, emit_appointment_event
-from services.sms_service import send_booking_sms
+from services.clinic_service import get_clinic_profile
+from services.booking_service import book_appointment, BookingError
+from services.rollup_service import split_keywords
+from services.patient_summary_service import invalidate_patient_summary
 
 logger = logging.getLogger(__name__)
 
+FEEDBACK_PAGE_SIZE = 50
+FEEDBACK_MAX_PAGE_SIZE = 200
+FEEDBACK_SENTIMENTS = {SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE, SENTIMENT_NEUTRAL, SENTIMENT_PENDING}
 
-def _get_doctor_initials(doctor_name):
-    """Get initials from doctor name. 'Alok Shukla' -> 'AS'."""
-    parts = doctor_name.strip().split()
-    if len(parts) >= 2:
-        return (parts[0][0] + parts[-1][0]).upper()
-    if parts:
-        return parts[0][:2].upper()
-    return "DR"
-
-
-def _generate_token(app, clinic_id, appointment_date, doctor_name=""):
-    """Generate next token number for the clinic on given date, using doctor initials."""
-    prefix = _get_doctor_initials(doctor_name) if doctor_name else "T"
-    try:
-        zcql = app.zcql()
-        result = zcql.execute_query(
-            f"SELECT token_number FROM {TABLE_APPOINTMENTS} "
-            f"WHERE clinic_id = '{clinic_id}' AND appointment_date = '{appointment_date}'"
-        )
-        max_num = 0
-        for row in (result or []):
-            token = row[TABLE_APPOINTMENTS].get("token_number", "")
-            try:
-                num = int(token.split("-")[1])
-                if num > max_num:
-                    max_num = num
-            except (IndexError, ValueError):
-                pass
-        return f"{prefix}-{str(max_num + 1).zfill(3)}"
-    except Exception:
-        return f"{prefix}-001"
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 
 def list_today(app, request):
@@ -119,123 +96,14 @@ def create(app, request):
         if not doctor_id or not patient_id:
             return error("Doctor and patient are required")
 
-        if not appt_time:
-            return error("Appointment time is required. Please select a time slot.")
-
-        zcql = app.zcql()
-
-        # Validate: appointment date is not in the past
-        today_str = ist_today()
-        if appt_date < today_str:
-            return error("Cannot book appointment for a past date. Please select today or a future date.")
-
-        # Validate: same-day past time check
-        if appt_date == today_str and appt_time:
-            now = ist_time_now()
-            if appt_time <= now:
-                return error("Selected time has already passed. Please choose a later time for today's appointment.")
-
-        # Validate: doctor exists, belongs to this clinic, and is active
-        doc_check = zcql.execute_query(
-            f"SELECT ROWID, status, available_from, available_to, name FROM {TABLE_DOCTORS} "
-            f"WHERE ROWID = '{doctor_id}' AND clinic_id = '{clinic_id}'"
-        )
-        if not doc_check or len(doc_check) == 0:
-            return error("Doctor not found in this clinic.")
-        doc = doc_check[0][TABLE_DOCTORS]
-        if doc.get("status") == "inactive":
-            return error(f"Dr. {doc.get('name', '')} is currently inactive. Please choose another doctor.")
-
-        # Validate: appointment time is within doctor's available hours
-        avail_from = doc.get("available_from", "")
-        avail_to = doc.get("available_to", "")
-        if avail_from and avail_to and appt_time:
-            if appt_time < avail_from or appt_time > avail_to:
-                return error(
-                    f"Dr. {doc.get('name', '')} is available only from {avail_from} to {avail_to}. "
-                    f"Please select a time within these hours."
-                )
-
-        # Validate: patient exists and belongs to this clinic
-        pat_check = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_PATIENTS} "
-            f"WHERE ROWID = '{patient_id}' AND clinic_id = '{clinic_id}'"
-        )
-        if not pat_check or len(pat_check) == 0:
-            return error("Patient not found in this clinic")
-
-        # Validate: no duplicate booking for same doctor at same date+time
-        conflict = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
-            f"WHERE clinic_id = '{clinic_id}' AND doctor_id = '{doctor_id}' "
-            f"AND appointment_date = '{appt_date}' AND appointment_time = '{appt_time}' "
-            f"AND status != 'cancelled'"
-        )
-        if conflict and len(conflict) > 0:
-            return error("This doctor already has an appointment at this time")
-
-        token = _generate_token(app, clinic_id, appt_date, doc.get("name", ""))
-
-        table = app.datastore().table(TABLE_APPOINTMENTS)
-        row = table.insert_row({
-            "clinic_id": clinic_id,
-            "doctor_id": doctor_id,
-            "patient_id": patient_id,
-            "appointment_date": appt_date,
-            "appointment_time": appt_time,
-            "status": STATUS_BOOKED,
-            "token_number": token,
-            "notes": body.get("notes", ""),
-            "feedback_score": "",
-            "feedback_text": "",
-            "feedback_sentiment": "",
-        })
-
-        # Try to send confirmation email (non-blocking)
+        clinic = get_clinic_profile(app, clinic_id) or {"ROWID": clinic_id}
         try:
-            zcql = app.zcql()
-            patient_res = zcql.execute_query(
-                f"SELECT name, email FROM {TABLE_PATIENTS} WHERE ROWID = '{patient_id}'"
-            )
-            doctor_res = zcql.execute_query(
-                f"SELECT name FROM {TABLE_DOCTORS} WHERE ROWID = '{doctor_id}'"
+            row, ctx, token = book_appointment(
+                app, clinic, doctor_id, appt_date, appt_time,
+                patient_id=patient_id, notes=body.get("notes", ""),
             )
-            clinic_res = zcql.execute_query(
-                f"SELECT name FROM Clinics WHERE ROWID = '{clinic_id}'"
-            )
-            if patient_res and doctor_res and clinic_res:
-                p_email = patient_res[0][TABLE_PATIENTS].get("email", "")
-                if p_email:
-                    send_appointment_confirmation(
-                        app,
-                        patient_email=p_email,
-                        patient_name=patient_res[0][TABLE_PATIENTS]["name"],
-                        doctor_name=doctor_res[0][TABLE_DOCTORS]["name"],
-                        clinic_name=clinic_res[0]["Clinics"]["name"],
-                        appointment_date=appt_date,
-                        appointment_time=appt_time,
-                        token_number=token,
-                    )
-        except Exception as mail_err:
-            logger.warning(f"Mail send failed (non-critical): {mail_err}")
-
-        # Send booking confirmation SMS
-        try:
-            if patient_res:
-                p_data = patient_res[0][TABLE_PATIENTS]
-                p_phone = p_data.get("phone", "") if patient_res else ""
-                c_name = clinic_res[0]["Clinics"]["name"] if clinic_res else "CareDesk"
-                d_name = doctor_res[0][TABLE_DOCTORS]["name"] if doctor_res else ""
-                if p_phone:
-                    send_booking_sms(p_phone, p_data.get("name", ""), d_name, token, appt_time, appt_date, c_name)
-        except Exception as sms_err:
-            logger.warning(f"SMS send failed (non-critical): {sms_err}")
-
-        # Emit signal for new booking
-        emit_appointment_event(app, clinic_id, "booked", {
-            "appointment_id": row["ROWID"],
-            "token_number": token,
-        })
+        except BookingError as booking_err:
+            return error(str(booking_err))
 
         return created({
             "id": row["ROWID"],
@@ -306,6 +174,7 @@ def update_status(app, request, appointment_id):
             "ROWID": appointment_id,
             "status": new_status,
         })
+        invalidate_patient_summary(app, clinic_id, row.get("patient_id"))
 
         # Update queue cache
         _refresh_queue_cache(app, clinic_id)
@@ -425,12 +294,47 @@ def _build_queue_response(app, clinic_id):
 
 
 def list_feedback(app, request):
-    """GET /api/appointments/feedback — All appointments with feedback."""
+    """
+    GET /api/appointments/feedback — Appointments with feedback, newest first.
+    Optional filters: from, to (YYYY-MM-DD), doctor_id, sentiment; paged with
+    limit (default 50, max 200) and offset. Totals and charts come from
+    /api/feedback/analytics.
+    """
     try:
         clinic_id, user = require_clinic(app, request)
         if not clinic_id:
             return error("No clinic found", 403)
 
+        conditions = [
+            f"{TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}'",
+            f"{TABLE_APPOINTMENTS}.feedback_score != ''",
+        ]
+        date_from = request.args.get("from", "")
+        date_to = request.args.get("to", "")
+        doctor_id = request.args.get("doctor_id", "")
+        sentiment = request.args.get("sentiment", "")
+        for value in (date_from, date_to):
+            if value and not _DATE_RE.match(value):
+                return error("from and to must be dates in YYYY-MM-DD format")
+        if doctor_id and not doctor_id.isdigit():
+            return error("Invalid doctor_id")
+        if sentiment and sentiment not in FEEDBACK_SENTIMENTS:
+            return error("Invalid sentiment")
+        try:
+            limit = min(max(int(request.args.get("limit", FEEDBACK_PAGE_SIZE)), 1), FEEDBACK_MAX_PAGE_SIZE)
+            offset = max(int(request.args.get("offset", 0)), 0)
+        except (TypeError, ValueError):
+            return error("limit and offset must be numbers")
+
+        if date_from:
+            conditions.append(f"{TABLE_APPOINTMENTS}.appointment_date >= '{date_from}'")
+        if date_to:
+            conditions.append(f"{TABLE_APPOINTMENTS}.appointment_date <= '{date_to}'")
+        if doctor_id:
+            conditions.append(f"{TABLE_APPOINTMENTS}.doctor_id = '{doctor_id}'")
+        if sentiment:
+            conditions.append(f"{TABLE_APPOINTMENTS}.feedback_sentiment = '{sentiment}'")
+
         zcql = app.zcql()
         result = zcql.execute_query(
             f"SELECT {TABLE_APPOINTMENTS}.ROWID, {TABLE_APPOINTMENTS}.appointment_date, "
@@ -442,10 +346,10 @@ def list_feedback(app, request):
             f"FROM {TABLE_APPOINTMENTS} "
             f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_APPOINTMENTS}.doctor_id = {TABLE_DOCTORS}.ROWID "
             f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_APPOINTMENTS}.patient_id = {TABLE_PATIENTS}.ROWID "
-            f"WHERE {TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}' "
-            f"AND {TABLE_APPOINTMENTS}.feedback_score != '' "
+            f"WHERE {' AND '.join(conditions)} "
             f"ORDER BY {TABLE_APPOINTMENTS}.appointment_date DESC, "
-            f"{TABLE_APPOINTMENTS}.appointment_time DESC"
+            f"{TABLE_APPOINTMENTS}.appointment_time DESC "
+            f"LIMIT {offset}, {limit}"
         )
 
         feedbacks = []
@@ -453,7 +357,6 @@ def list_feedback(app, request):
             a = row[TABLE_APPOINTMENTS]
             d = row.get(TABLE_DOCTORS, {})
             p = row.get(TABLE_PATIENTS, {})
-            kw_str = a.get("feedback_keywords", "")
             feedbacks.append({
                 "id": a["ROWID"],
                 "patient_name": p.get("name", ""),
@@ -466,7 +369,7 @@ def list_feedback(app, request):
                 "feedback_score": a.get("feedback_score", ""),
                 "feedback_text": a.get("feedback_text", ""),
                 "feedback_sentiment": a.get("feedback_sentiment", ""),
-                "feedback_keywords": [k.strip() for k in kw_str.split(",") if k.strip()] if kw_str else [],
+                "feedback_keywords": split_keywords(a.get("feedback_keywords", "")),
             })
 
         return success(feedbacks)
@@ -3,7 +3,10 @@ import logging
 from utils.constants import TABLE_CLINICS
 from utils.response import success, created, error, not_found, server_error
 from services.auth_service import get_current_user, get_clinic_id
-from services.stratus_service import upload_clinic_logo
+from services.clinic_service import invalidate_clinic_profile
+from services.stratus_service import (
+    upload_clinic_logo, upload_logo_thumbnail, UploadTooLargeError, LOGO_MAX_BYTES,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -77,7 +80,7 @@ def get_mine(app, request):
 
         zcql = app.zcql()
         result = zcql.execute_query(
-            f"SELECT ROWID, name, slug, address, phone, email, logo_url, CREATEDTIME "
+            f"SELECT ROWID, name, slug, address, phone, email, logo_url, logo_thumbnail_url, CREATEDTIME "
             f"FROM {TABLE_CLINICS} WHERE ROWID = '{clinic_id}'"
         )
 
@@ -93,6 +96,7 @@ def get_mine(app, request):
             "phone": clinic["phone"],
             "email": clinic["email"],
             "logo_url": clinic["logo_url"],
+            "logo_thumbnail_url": clinic.get("logo_thumbnail_url") or "",
             "created_time": clinic["CREATEDTIME"],
             "_debug_user_id": user_id,
         })
@@ -118,6 +122,7 @@ def update_mine(app, request):
 
         table = app.datastore().table(TABLE_CLINICS)
         row = table.update_row(update_data)
+        invalidate_clinic_profile(app, clinic_id)
 
         return success({
             "id": row["ROWID"],
@@ -134,28 +139,43 @@ def update_mine(app, request):
 
 
 def upload_logo(app, request):
-    """POST /api/clinics/me/logo — Upload clinic logo to Stratus."""
+    """POST /api/clinics/me/logo — Store the clinic logo and its thumbnail in Stratus."""
     try:
         clinic_id, user = get_clinic_id(app, request)
         if not clinic_id:
             return not_found("No clinic found")
 
+        # Reject oversized bodies before the multipart form is parsed
+        max_kb = LOGO_MAX_BYTES // 1024
+        if request.content_length and request.content_length > LOGO_MAX_BYTES + 64 * 1024:
+            return error(f"Logo must be smaller than {max_kb} KB", 413)
+
         file = request.files.get("logo")
         if not file:
             return error("Logo file is required")
 
-        file_content = file.read()
-        file_name = file.filename or "logo.png"
+        try:
+            logo_key, content_type = upload_clinic_logo(app, file.stream, clinic_id)
+        except UploadTooLargeError:
+            return error(f"Logo must be smaller than {max_kb} KB", 413)
 
-        file_id = upload_clinic_logo(app, file_content, clinic_id, file_name)
-        if not file_id:
+        if not content_type:
+            return error("Logo must be a PNG, JPEG, GIF or WebP image", 415)
+        if not logo_key:
             return error("Failed to upload logo")
 
-        # Update clinic record with logo file ID
+        thumbnail_key = upload_logo_thumbnail(app, file.stream, clinic_id)
+
+        # Update clinic record with the logo and thumbnail object keys
         table = app.datastore().table(TABLE_CLINICS)
-        table.update_row({"ROWID": clinic_id, "logo_url": str(file_id)})
+        table.update_row({"ROWID": clinic_id, "logo_url": logo_key, "logo_thumbnail_url": thumbnail_key or ""})
+        invalidate_clinic_profile(app, clinic_id)
 
-        return success({"logo_url": str(file_id)}, "Logo uploaded successfully")
+        return success({
+            "logo_url": logo_key,
+            "logo_thumbnail_url": thumbnail_key or "",
+            "content_type": content_type,
+        }, "Logo uploaded successfully")
 
     except Exception as e:
         logger.error(f"Logo upload error: {e}")
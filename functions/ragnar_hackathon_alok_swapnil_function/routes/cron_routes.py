@@ -1,100 +1,196 @@
 import logging
+import re
+from collections import defaultdict
+from datetime import date as _date_type, timedelta
 from utils.constants import (
-    TABLE_PRESCRIPTIONS, TABLE_PATIENTS, TABLE_DOCTORS, TABLE_APPOINTMENTS,
+    TABLE_PRESCRIPTIONS, TABLE_PATIENTS, TABLE_DOCTORS, TABLE_APPOINTMENTS, TABLE_CLINICS,
     STATUS_BOOKED, STATUS_IN_QUEUE, STATUS_NO_SHOW,
     ist_today, ist_tomorrow,
 )
-from utils.response import success, server_error
-from services.mail_service import send_appointment_confirmation
+from utils.response import success, error, server_error
+from services.mail_service import send_daily_digest, send_follow_up_reminder
 from services.sms_service import send_followup_reminder_sms
+from services.feedback_service import enrich_pending_feedback, MAX_ENRICH_PER_RUN
+from services.patient_summary_service import invalidate_clinic_summaries
+from services.batch_service import BatchJob, run_batch_job, resumed_run_key, DEFAULT_CHUNK_SIZE
+from services.notification_log_service import (
+    KIND_FOLLOW_UP, KIND_DAILY_DIGEST, notification_key, sent_keys, record_sent,
+)
+from services.digest_service import day_aggregates, doctor_names, busiest_doctor_id, build_digest
+from services.bulk_service import bulk_update, ZCQL_PAGE_SIZE
+from services.cache_service import get_queue_state, set_queue_state
+from services.signals_service import emit_queue_update
+from services.rollup_service import rebuild_rollups
+from utils.parallel import run_parallel
 
 logger = logging.getLogger(__name__)
 
+# Clinics whose end-of-day cache upkeep runs at once
+NO_SHOW_CLINIC_CONCURRENCY = 8
+# Digest mails in flight at once
+DIGEST_MAIL_CONCURRENCY = 8
+# Follow-up reminders (mail + SMS each) in flight at once
+REMINDER_SEND_CONCURRENCY = 8
+# Clinics whose feedback rollups are recounted per chunk (each reads all its rated appointments)
+ROLLUP_REBUILD_CHUNK_SIZE = 10
+# Days of follow-ups one daily run reminds, starting tomorrow
+FOLLOW_UP_WINDOW_DAYS = 1
+
+# "YYYY-MM-DD", or "YYYY-MM-DD+N" for a follow-up window
+_RUN_KEY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(\+\d{1,2})?$")
+
+
+def _run_key(app, request, job, default):
+    """
+    The run a cron call advances: the one a continuation names (?run_key=,
+    accepted only with that run's ?resume_token=), otherwise `default`. The
+    dates a job covers are never taken from an unauthenticated query string.
+    """
+    run_key = request.args.get("run_key", "")
+    if _RUN_KEY_RE.match(run_key):
+        resumed = resumed_run_key(app, job, run_key, request.args.get("resume_token", ""))
+        if resumed:
+            return resumed
+    return default
+
+
+# ── Follow-up reminders ──────────────────────────────────────────
+
+
+def _window_dates(run_key):
+    """Dates covered by a follow-up run key: "YYYY-MM-DD" or "YYYY-MM-DD+N" (N days from that date)."""
+    start, _, days = run_key.partition("+")
+    first = _date_type.fromisoformat(start)
+    return [(first + timedelta(days=i)).isoformat() for i in range(int(days or 1))]
+
+
+def _follow_up_where(run_key):
+    # The whole lookahead window in one condition, so a chunk spans every day of it
+    in_list = ", ".join(f"'{day}'" for day in _window_dates(run_key))
+    return f"{TABLE_PRESCRIPTIONS}.follow_up_date IN ({in_list})"
+
+
+def _clinic_names(app, clinic_ids):
+    """{clinic_id: name} for every clinic referenced by a chunk, in one IN query."""
+    ids = sorted({cid for cid in clinic_ids if cid})
+    if not ids:
+        return {}
+    in_list = ", ".join(f"'{cid}'" for cid in ids)
+    rows = app.zcql().execute_query(f"SELECT ROWID, name FROM {TABLE_CLINICS} WHERE ROWID IN ({in_list})")
+    return {row[TABLE_CLINICS]["ROWID"]: row[TABLE_CLINICS].get("name", "") for row in (rows or [])}
+
+
+def _deliver_reminder(app, reminder):
+    """Send one reminder by mail and SMS. Returns the channels it was delivered on."""
+    channels = []
+    if reminder["email"] and send_follow_up_reminder(
+        app, reminder["email"], reminder["patient_name"], reminder["doctor_name"],
+        reminder["ref_date"], reminder["clinic_name"], clinic_id=reminder["clinic_id"],
+    ):
+        channels.append("email")
+    if reminder["phone"]:
+        try:
+            if send_followup_reminder_sms(
+                reminder["phone"], reminder["patient_name"], reminder["doctor_name"],
+                reminder["ref_date"], reminder["clinic_name"],
+            ):
+                channels.append("sms")
+        except Exception as sms_err:
+            logger.warning(f"Follow-up SMS failed for {reminder['phone']}: {sms_err}")
+    return channels
+
+
+def _send_reminder_chunk(app, rows, run_key):
+    # One reminder per patient per follow-up date; a later prescription wins
+    reminders = {}
+    for row in rows:
+        rx = row[TABLE_PRESCRIPTIONS]
+        patient = row.get(TABLE_PATIENTS, {})
+        if not rx.get("patient_id") or not (patient.get("email") or patient.get("phone")):
+            continue
+        key = notification_key(KIND_FOLLOW_UP, rx["patient_id"], rx["follow_up_date"])
+        reminders[key] = {
+            "clinic_id": rx.get("clinic_id", ""),
+            "patient_id": rx["patient_id"],
+            "kind": KIND_FOLLOW_UP,
+            "ref_date": rx["follow_up_date"],
+            "email": patient.get("email", ""),
+            "phone": patient.get("phone", ""),
+            "patient_name": patient.get("name", ""),
+            "doctor_name": row.get(TABLE_DOCTORS, {}).get("name", ""),
+        }
+    if not reminders:
+        return {}
+
+    # Already sent by an earlier (retried or overlapping) run
+    done = sent_keys(app, list(reminders))
+    pending = {key: r for key, r in reminders.items() if key not in done}
+    names = _clinic_names(app, [r["clinic_id"] for r in pending.values()])
+    for reminder in pending.values():
+        reminder["clinic_name"] = names.get(reminder["clinic_id"]) or "Your Clinic"
+
+    results = run_parallel({
+        key: (lambda reminder=reminder: _deliver_reminder(app, reminder))
+        for key, reminder in pending.items()
+    }, max_concurrency=REMINDER_SEND_CONCURRENCY)
+
+    delivered = []
+    for key, channels in results.items():
+        if channels:
+            delivered.append({**pending[key], "channels": channels})
+    record_sent(app, delivered)
+
+    return {
+        "reminders_sent": sum(1 for r in delivered if "email" in r["channels"]),
+        "sms_sent": sum(1 for r in delivered if "sms" in r["channels"]),
+        "already_sent": len(reminders) - len(pending),
+        "failed": len(pending) - len(delivered),
+    }
+
+
+FOLLOW_UP_JOB = BatchJob(
+    "follow_up_reminders",
+    TABLE_PRESCRIPTIONS,
+    f"SELECT {TABLE_PRESCRIPTIONS}.ROWID, {TABLE_PRESCRIPTIONS}.patient_id, "
+    f"{TABLE_PRESCRIPTIONS}.doctor_id, {TABLE_PRESCRIPTIONS}.follow_up_date, "
+    f"{TABLE_PRESCRIPTIONS}.clinic_id, "
+    f"{TABLE_PATIENTS}.name, {TABLE_PATIENTS}.email, {TABLE_PATIENTS}.phone, "
+    f"{TABLE_DOCTORS}.name "
+    f"FROM {TABLE_PRESCRIPTIONS} "
+    f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_PRESCRIPTIONS}.patient_id = {TABLE_PATIENTS}.ROWID "
+    f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_PRESCRIPTIONS}.doctor_id = {TABLE_DOCTORS}.ROWID",
+    _follow_up_where,
+    _send_reminder_chunk,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+)
+
 
 def send_follow_up_reminders(app, request):
     """
     GET /api/cron/follow-up-reminders
     Called by Catalyst Job Scheduling (CRON) daily.
-    Sends reminder emails to patients whose follow-up date is tomorrow.
+    Reminds patients whose follow-up date is tomorrow (or within
+    FOLLOW_UP_WINDOW_DAYS from tomorrow) by mail and SMS, in checkpointed
+    chunks (see batch_service). Every delivered reminder is recorded in NotificationLog,
+    so a retried or overlapping run never reminds a patient twice for the
+    same date.
     """
     try:
         tomorrow = ist_tomorrow()
-        zcql = app.zcql()
-
-        # Find prescriptions with follow-up date = tomorrow
-        result = zcql.execute_query(
-            f"SELECT {TABLE_PRESCRIPTIONS}.ROWID, {TABLE_PRESCRIPTIONS}.patient_id, "
-            f"{TABLE_PRESCRIPTIONS}.doctor_id, {TABLE_PRESCRIPTIONS}.follow_up_date, "
-            f"{TABLE_PRESCRIPTIONS}.clinic_id, "
-            f"{TABLE_PATIENTS}.name, {TABLE_PATIENTS}.email, {TABLE_PATIENTS}.phone, "
-            f"{TABLE_DOCTORS}.name "
-            f"FROM {TABLE_PRESCRIPTIONS} "
-            f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_PRESCRIPTIONS}.patient_id = {TABLE_PATIENTS}.ROWID "
-            f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_PRESCRIPTIONS}.doctor_id = {TABLE_DOCTORS}.ROWID "
-            f"WHERE {TABLE_PRESCRIPTIONS}.follow_up_date = '{tomorrow}'"
-        )
-
-        sent_count = 0
-        for row in (result or []):
-            rx = row[TABLE_PRESCRIPTIONS]
-            patient = row.get(TABLE_PATIENTS, {})
-            doctor = row.get(TABLE_DOCTORS, {})
-
-            patient_email = patient.get("email", "")
-            if not patient_email:
-                continue
-
-            # Get clinic name
-            clinic_id = rx.get("clinic_id", "")
-            clinic_res = zcql.execute_query(
-                f"SELECT name FROM Clinics WHERE ROWID = '{clinic_id}'"
-            )
-            clinic_name = clinic_res[0]["Clinics"]["name"] if clinic_res else "Your Clinic"
-
-            try:
-                mail = app.email()
-                mail.send_mail({
-                    "from_email": "noreply@catalystmailer.com",
-                    "to_email": patient_email,
-                    "subject": f"Follow-up Reminder - {clinic_name}",
-                    "content": f"""
-                    <html>
-                    <body style="font-family:Arial,sans-serif;max-width:600px;margin:0 auto;">
-                        <div style="background:#0d9488;color:white;padding:20px;text-align:center;">
-                            <h1 style="margin:0;">{clinic_name}</h1>
-                            <p style="margin:5px 0 0;">Follow-up Reminder</p>
-                        </div>
-                        <div style="padding:20px;background:#f8fafc;">
-                            <p>Dear <strong>{patient.get('name', 'Patient')}</strong>,</p>
-                            <p>This is a friendly reminder that you have a follow-up appointment scheduled for <strong>{tomorrow}</strong> with <strong>Dr. {doctor.get('name', '')}</strong>.</p>
-                            <p>Please book your appointment at your earliest convenience.</p>
-                            <p style="color:#64748b;font-size:14px;">Wishing you good health!</p>
-                        </div>
-                    </body>
-                    </html>
-                    """,
-                })
-                sent_count += 1
-            except Exception as mail_err:
-                logger.warning(f"Follow-up mail failed for {patient_email}: {mail_err}")
-
-            # Also send SMS reminder
-            try:
-                patient_phone = patient.get("phone", "")
-                if patient_phone:
-                    send_followup_reminder_sms(
-                        patient_phone,
-                        patient.get("name", ""),
-                        doctor.get("name", ""),
-                        tomorrow,
-                        clinic_name,
-                    )
-            except Exception as sms_err:
-                logger.warning(f"Follow-up SMS failed for {patient_phone}: {sms_err}")
+        default = tomorrow if FOLLOW_UP_WINDOW_DAYS == 1 else f"{tomorrow}+{FOLLOW_UP_WINDOW_DAYS}"
+        run_key = _run_key(app, request, FOLLOW_UP_JOB, default)
+        dates = _window_dates(run_key)
 
+        run = run_batch_job(app, FOLLOW_UP_JOB, run_key, request.base_url)
+        sent_count = run["stats"].get("reminders_sent", 0)
         return success({
             "reminders_sent": sent_count,
-            "check_date": tomorrow,
+            "sms_sent": run["stats"].get("sms_sent", 0),
+            "already_sent": run["stats"].get("already_sent", 0),
+            "failed": run["stats"].get("failed", 0),
+            "check_date": dates[0],
+            "dates": dates,
+            "run": run,
         }, f"Sent {sent_count} follow-up reminder(s)")
 
     except Exception as e:
@@ -102,72 +198,69 @@ def send_follow_up_reminders(app, request):
         return server_error(str(e))
 
 
+# ── Daily digest ─────────────────────────────────────────────────
+
+
+def _send_digest_chunk(app, rows, today):
+    clinics = [row[TABLE_CLINICS] for row in rows if row[TABLE_CLINICS].get("email")]
+    # Already sent by an earlier (retried or overlapping) invocation
+    done = sent_keys(app, [notification_key(KIND_DAILY_DIGEST, c["ROWID"], today) for c in clinics])
+    already_sent = len(clinics)
+    clinics = [c for c in clinics if notification_key(KIND_DAILY_DIGEST, c["ROWID"], today) not in done]
+    already_sent -= len(clinics)
+    if not clinics:
+        return {"digests_sent": 0, "digests_failed": 0, "already_sent": already_sent}
+
+    # One grouped query for the whole chunk, then one lookup for the busiest doctors' names
+    days = day_aggregates(app, [clinic["ROWID"] for clinic in clinics], today)
+    names = doctor_names(app, [busiest_doctor_id(days[clinic["ROWID"]]) for clinic in clinics])
+
+    results = run_parallel({
+        clinic["ROWID"]: (lambda clinic=clinic: send_daily_digest(
+            app, clinic["email"], clinic.get("name", ""), today,
+            build_digest(days[clinic["ROWID"]], names),
+        ))
+        for clinic in clinics
+    }, max_concurrency=DIGEST_MAIL_CONCURRENCY)
+
+    record_sent(app, [
+        {"clinic_id": clinic_id, "patient_id": "", "kind": KIND_DAILY_DIGEST, "ref_date": today, "channels": ["email"]}
+        for clinic_id, ok in results.items() if ok is True
+    ])
+    sent = sum(1 for ok in results.values() if ok is True)
+    return {"digests_sent": sent, "digests_failed": len(clinics) - sent, "already_sent": already_sent}
+
+
+DIGEST_JOB = BatchJob(
+    "daily_digest",
+    TABLE_CLINICS,
+    f"SELECT ROWID, name, email FROM {TABLE_CLINICS}",
+    None,
+    _send_digest_chunk,
+    # One aggregate query per chunk of clinics; the mails go out in parallel
+    chunk_size=DEFAULT_CHUNK_SIZE,
+)
+
+
 def generate_daily_digest(app, request):
     """
     GET /api/cron/daily-digest
     Called by Catalyst Job Scheduling daily at end of day.
-    Sends a summary email to clinic admins.
+    Sends each clinic admin a summary of the day (status counts, no-shows,
+    average feedback, busiest doctor), a chunk of clinics at a time. Sent
+    digests are recorded in NotificationLog, so a retried chunk does not
+    mail a clinic twice.
     """
     try:
-        today = ist_today()
-        zcql = app.zcql()
-
-        # Get all clinics
-        clinics = zcql.execute_query("SELECT ROWID, name, email FROM Clinics")
-        sent_count = 0
-
-        for row in (clinics or []):
-            clinic = row["Clinics"]
-            clinic_id = clinic["ROWID"]
-            clinic_email = clinic.get("email", "")
-            if not clinic_email:
-                continue
-
-            # Count today's stats
-            total = zcql.execute_query(
-                f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
-                f"WHERE clinic_id = '{clinic_id}' AND appointment_date = '{today}'"
-            )
-            completed = zcql.execute_query(
-                f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
-                f"WHERE clinic_id = '{clinic_id}' AND appointment_date = '{today}' AND status = 'completed'"
-            )
-
-            total_count = len(total) if total else 0
-            completed_count = len(completed) if completed else 0
-
-            try:
-                mail = app.email()
-                mail.send_mail({
-                    "from_email": "noreply@catalystmailer.com",
-                    "to_email": clinic_email,
-                    "subject": f"Daily Summary - {clinic.get('name', 'CareDesk')} ({today})",
-                    "content": f"""
-                    <html>
-                    <body style="font-family:Arial,sans-serif;max-width:600px;margin:0 auto;">
-                        <div style="background:#0d9488;color:white;padding:20px;text-align:center;">
-                            <h1 style="margin:0;">Daily Summary</h1>
-                            <p style="margin:5px 0 0;">{clinic.get('name', '')} — {today}</p>
-                        </div>
-                        <div style="padding:20px;background:#f8fafc;">
-                            <div style="background:white;border-radius:8px;padding:16px;margin:16px 0;">
-                                <p><strong>Total Appointments:</strong> {total_count}</p>
-                                <p><strong>Completed:</strong> {completed_count}</p>
-                                <p><strong>Pending:</strong> {total_count - completed_count}</p>
-                            </div>
-                            <p style="color:#64748b;font-size:14px;">This is an automated daily digest from CareDesk.</p>
-                        </div>
-                    </body>
-                    </html>
-                    """,
-                })
-                sent_count += 1
-            except Exception as mail_err:
-                logger.warning(f"Digest mail failed for clinic {clinic_id}: {mail_err}")
-
+        today = _run_key(app, request, DIGEST_JOB, ist_today())
+        run = run_batch_job(app, DIGEST_JOB, today, request.base_url)
+        sent_count = run["stats"].get("digests_sent", 0)
         return success({
             "digests_sent": sent_count,
+            "digests_failed": run["stats"].get("digests_failed", 0),
+            "already_sent": run["stats"].get("already_sent", 0),
             "date": today,
+            "run": run,
         }, f"Sent {sent_count} daily digest(s)")
 
     except Exception as e:
@@ -175,6 +268,58 @@ def generate_daily_digest(app, request):
         return server_error(str(e))
 
 
+# ── No-shows ─────────────────────────────────────────────────────
+
+
+def _mark_no_show_chunk(app, rows, today):
+    appts = sorted((row[TABLE_APPOINTMENTS] for row in rows), key=lambda a: a["clinic_id"])
+    # update_rows batches of up to 200, grouped by clinic and written in parallel
+    updated, _ = bulk_update(app, TABLE_APPOINTMENTS, [
+        {"ROWID": appt["ROWID"], "status": STATUS_NO_SHOW} for appt in appts
+    ])
+
+    by_clinic = defaultdict(int)
+    for appt, row in zip(appts, updated):
+        if row is not None:
+            by_clinic[appt["clinic_id"]] += 1
+    marked = sum(by_clinic.values())
+    if marked < len(appts):
+        logger.warning(f"Failed to mark {len(appts) - marked} no-show(s) for {today}")
+    return {"marked": marked, "failed": len(appts) - marked, "by_clinic": dict(by_clinic)}
+
+
+def _close_clinic_day(app, clinic_id, marked, live):
+    """Per-clinic upkeep after its no-shows are written, once per run."""
+    if live:
+        # Nobody is waiting any more; only an unfinished consultation stays on the live queue
+        queue = get_queue_state(app, clinic_id)
+        if queue and any(entry.get("status") == STATUS_IN_QUEUE for entry in queue):
+            set_queue_state(app, clinic_id, [entry for entry in queue if entry.get("status") != STATUS_IN_QUEUE])
+        emit_queue_update(app, clinic_id, {"no_shows_marked": marked})
+    invalidate_clinic_summaries(app, clinic_id)
+
+
+def _finish_no_shows(app, day, stats):
+    # The cached queue is today's; a catch-up run for an earlier day leaves it alone
+    live = day == ist_today()
+    run_parallel({
+        clinic_id: (lambda clinic_id=clinic_id, marked=marked: _close_clinic_day(app, clinic_id, marked, live))
+        for clinic_id, marked in stats.get("by_clinic", {}).items() if marked
+    }, max_concurrency=NO_SHOW_CLINIC_CONCURRENCY)
+
+
+NO_SHOW_JOB = BatchJob(
+    "mark_no_shows",
+    TABLE_APPOINTMENTS,
+    f"SELECT ROWID, status, clinic_id, patient_id FROM {TABLE_APPOINTMENTS}",
+    # Booked or in-queue but the day is over
+    lambda today: f"appointment_date = '{today}' AND status IN ('{STATUS_BOOKED}', '{STATUS_IN_QUEUE}')",
+    _mark_no_show_chunk,
+    chunk_size=ZCQL_PAGE_SIZE,
+    finish=_finish_no_shows,
+)
+
+
 def mark_no_shows(app, request):
     """
     GET /api/cron/mark-no-shows
@@ -183,41 +328,90 @@ def mark_no_shows(app, request):
     (patient never showed up or left without seeing doctor) as 'no-show'.
     """
     try:
-        today = ist_today()
-        zcql = app.zcql()
-
-        # Find all stale appointments: booked or in-queue but day is over
-        stale = zcql.execute_query(
-            f"SELECT ROWID, status, clinic_id FROM {TABLE_APPOINTMENTS} "
-            f"WHERE appointment_date = '{today}' "
-            f"AND status IN ('{STATUS_BOOKED}', '{STATUS_IN_QUEUE}')"
-        )
-
-        if not stale or len(stale) == 0:
-            return success({
-                "marked": 0,
-                "date": today,
-            }, "No stale appointments found")
-
-        table = app.datastore().table(TABLE_APPOINTMENTS)
-        marked = 0
-        for row in stale:
-            appt = row[TABLE_APPOINTMENTS]
-            try:
-                table.update_row({
-                    "ROWID": appt["ROWID"],
-                    "status": STATUS_NO_SHOW,
-                })
-                marked += 1
-            except Exception as upd_err:
-                logger.warning(f"Failed to mark no-show for {appt['ROWID']}: {upd_err}")
+        today = _run_key(app, request, NO_SHOW_JOB, ist_today())
+        if today > ist_today():
+            # A day that has not ended yet has no no-shows
+            return error("Cannot mark no-shows for a future date")
 
+        run = run_batch_job(app, NO_SHOW_JOB, today, request.base_url)
+        marked = run["stats"].get("marked", 0)
         logger.info(f"Marked {marked} appointment(s) as no-show for {today}")
         return success({
             "marked": marked,
+            "failed": run["stats"].get("failed", 0),
+            "clinics": [
+                {"clinic_id": clinic_id, "marked": count}
+                for clinic_id, count in sorted(run["stats"].get("by_clinic", {}).items())
+            ],
             "date": today,
+            "run": run,
         }, f"Marked {marked} appointment(s) as no-show")
 
     except Exception as e:
         logger.error(f"Mark no-shows cron error: {e}")
         return server_error(str(e))
+
+
+# ── Feedback rollups ─────────────────────────────────────────────
+
+
+def _rebuild_rollup_chunk(app, rows, today):
+    written = 0
+    for row in rows:
+        written += rebuild_rollups(app, row[TABLE_CLINICS]["ROWID"])
+    return {"clinics": len(rows), "rollups_written": written}
+
+
+ROLLUP_REBUILD_JOB = BatchJob(
+    "rebuild_rollups",
+    TABLE_CLINICS,
+    f"SELECT ROWID FROM {TABLE_CLINICS}",
+    None,
+    _rebuild_rollup_chunk,
+    chunk_size=ROLLUP_REBUILD_CHUNK_SIZE,
+)
+
+
+def rebuild_feedback_rollups(app, request):
+    """
+    GET /api/cron/rebuild-rollups
+    Called by Catalyst Job Scheduling nightly, off-peak.
+    Recounts every clinic's weekly feedback rollups from its appointments,
+    correcting increments lost when two instances updated the same rollup
+    row at once (see rollup_service.apply_delta).
+    """
+    try:
+        today = _run_key(app, request, ROLLUP_REBUILD_JOB, ist_today())
+        run = run_batch_job(app, ROLLUP_REBUILD_JOB, today, request.base_url)
+        return success({
+            "clinics": run["stats"].get("clinics", 0),
+            "rollups_written": run["stats"].get("rollups_written", 0),
+            "date": today,
+            "run": run,
+        }, f"Rebuilt feedback rollups of {run['stats'].get('clinics', 0)} clinic(s)")
+
+    except Exception as e:
+        logger.error(f"Rollup rebuild cron error: {e}")
+        return server_error(str(e))
+
+
+def enrich_feedback(app, request):
+    """
+    GET /api/cron/enrich-feedback
+    Called by Catalyst Job Scheduling every few minutes.
+    Runs Zia sentiment and keyword analysis for feedback submitted since the
+    last run (stored with sentiment 'pending'). Optional ?limit= caps the rows.
+    """
+    try:
+        try:
+            limit = int(request.args.get("limit", MAX_ENRICH_PER_RUN))
+        except (TypeError, ValueError):
+            limit = MAX_ENRICH_PER_RUN
+        limit = max(1, min(limit, MAX_ENRICH_PER_RUN))
+
+        summary = enrich_pending_feedback(app, limit=limit)
+        return success(summary, f"Enriched {summary['enriched']} feedback entries")
+
+    except Exception as e:
+        logger.error(f"Feedback enrichment cron error: {e}")
+        return server_error(str(e))
@@ -9,22 +9,17 @@ from utils.constants import (
 )
 from utils.response import success, error, server_error
 from services.auth_service import require_clinic
+from services.roster_service import get_active_doctors
+from utils.parallel import run_parallel, query_task
 
 logger = logging.getLogger(__name__)
 
 
-def get_stats(app, request):
-    """GET /api/dashboard/stats — Rich dashboard statistics."""
-    try:
-        clinic_id, user = require_clinic(app, request)
-        if not clinic_id:
-            return error("No clinic found", 403)
-
-        today = request.args.get("date", ist_today())
-        zcql = app.zcql()
-
-        # ── 1. All appointments for the selected date (single query) ──
-        day_result = zcql.execute_query(
+def _stats_queries(clinic_id, today):
+    """Independent dashboard queries for a clinic and date, keyed by name."""
+    return {
+        # All appointments for the selected date
+        "day": (
             f"SELECT {TABLE_APPOINTMENTS}.ROWID, {TABLE_APPOINTMENTS}.status, "
             f"{TABLE_APPOINTMENTS}.appointment_time, {TABLE_APPOINTMENTS}.doctor_id, "
             f"{TABLE_APPOINTMENTS}.patient_id, "
@@ -34,7 +29,70 @@ def get_stats(app, request):
             f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_APPOINTMENTS}.doctor_id = {TABLE_DOCTORS}.ROWID "
             f"WHERE {TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}' "
             f"AND {TABLE_APPOINTMENTS}.appointment_date = '{today}'"
+        ),
+        # Total patients (lifetime)
+        "patients": f"SELECT ROWID FROM {TABLE_PATIENTS} WHERE clinic_id = '{clinic_id}'",
+        # Prescriptions today (via appointment date)
+        "prescriptions": (
+            f"SELECT {TABLE_PRESCRIPTIONS}.ROWID FROM {TABLE_PRESCRIPTIONS} "
+            f"LEFT JOIN {TABLE_APPOINTMENTS} ON {TABLE_PRESCRIPTIONS}.appointment_id = {TABLE_APPOINTMENTS}.ROWID "
+            f"WHERE {TABLE_PRESCRIPTIONS}.clinic_id = '{clinic_id}' "
+            f"AND {TABLE_APPOINTMENTS}.appointment_date = '{today}'"
+        ),
+        # Recent activity (today's appointments with patient names)
+        "recent": (
+            f"SELECT {TABLE_APPOINTMENTS}.ROWID, {TABLE_APPOINTMENTS}.status, "
+            f"{TABLE_APPOINTMENTS}.appointment_time, {TABLE_APPOINTMENTS}.token_number, "
+            f"{TABLE_DOCTORS}.name, {TABLE_PATIENTS}.name "
+            f"FROM {TABLE_APPOINTMENTS} "
+            f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_APPOINTMENTS}.doctor_id = {TABLE_DOCTORS}.ROWID "
+            f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_APPOINTMENTS}.patient_id = {TABLE_PATIENTS}.ROWID "
+            f"WHERE {TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}' "
+            f"AND {TABLE_APPOINTMENTS}.appointment_date = '{today}' "
+            f"ORDER BY {TABLE_APPOINTMENTS}.MODIFIEDTIME DESC"
+        ),
+    }
+
+
+def _count_day(app, clinic_id, day):
+    """Appointment count for one day of the weekly trend (0 if the query fails)."""
+    try:
+        r = app.zcql().execute_query(
+            f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
+            f"WHERE clinic_id = '{clinic_id}' AND appointment_date = '{day}'"
         )
+        return len(r) if r else 0
+    except Exception:
+        return 0
+
+
+def get_stats(app, request):
+    """GET /api/dashboard/stats — Rich dashboard statistics."""
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        today = request.args.get("date", ist_today())
+
+        base_date = ist_now().date()
+        try:
+            parts = today.split("-")
+            base_date = _date_type(int(parts[0]), int(parts[1]), int(parts[2]))
+        except Exception:
+            pass
+        trend_dates = [base_date - timedelta(days=i) for i in range(6, -1, -1)]
+
+        # All queries below are independent — issue them concurrently
+        tasks = {name: query_task(app, query) for name, query in _stats_queries(clinic_id, today).items()}
+        tasks["doctors"] = lambda: get_active_doctors(app, clinic_id)
+        for d in trend_dates:
+            if d.isoformat() != today:
+                tasks[d.isoformat()] = (lambda day=d.isoformat(): _count_day(app, clinic_id, day))
+        results = run_parallel(tasks)
+
+        # ── 1. All appointments for the selected date (single query) ──
+        day_result = results["day"]
 
         # Status counts
         status_counts = defaultdict(int)
@@ -92,24 +150,14 @@ def get_stats(app, request):
         completion_rate = round((completed / total_today * 100), 0) if total_today > 0 else 0
 
         # ── 2. Total patients & doctors (lifetime) ──
-        patients_result = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_PATIENTS} WHERE clinic_id = '{clinic_id}'"
-        )
+        patients_result = results["patients"]
         total_patients = len(patients_result) if patients_result else 0
 
-        doctors_result = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_DOCTORS} "
-            f"WHERE clinic_id = '{clinic_id}' AND status = 'active'"
-        )
+        doctors_result = results["doctors"]
         total_doctors = len(doctors_result) if doctors_result else 0
 
         # ── 3. Prescriptions today (via appointment date) ──
-        rx_result = zcql.execute_query(
-            f"SELECT {TABLE_PRESCRIPTIONS}.ROWID FROM {TABLE_PRESCRIPTIONS} "
-            f"LEFT JOIN {TABLE_APPOINTMENTS} ON {TABLE_PRESCRIPTIONS}.appointment_id = {TABLE_APPOINTMENTS}.ROWID "
-            f"WHERE {TABLE_PRESCRIPTIONS}.clinic_id = '{clinic_id}' "
-            f"AND {TABLE_APPOINTMENTS}.appointment_date = '{today}'"
-        )
+        rx_result = results["prescriptions"]
         prescriptions_today = len(rx_result) if rx_result else 0
 
         # ── 4. Doctor performance list ──
@@ -132,17 +180,7 @@ def get_stats(app, request):
             peak_hours.append({"hour": label, "count": hour_counts[hour]})
 
         # ── 6. Recent activity (today's appointments with patient names) ──
-        recent_result = zcql.execute_query(
-            f"SELECT {TABLE_APPOINTMENTS}.ROWID, {TABLE_APPOINTMENTS}.status, "
-            f"{TABLE_APPOINTMENTS}.appointment_time, {TABLE_APPOINTMENTS}.token_number, "
-            f"{TABLE_DOCTORS}.name, {TABLE_PATIENTS}.name "
-            f"FROM {TABLE_APPOINTMENTS} "
-            f"LEFT JOIN {TABLE_DOCTORS} ON {TABLE_APPOINTMENTS}.doctor_id = {TABLE_DOCTORS}.ROWID "
-            f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_APPOINTMENTS}.patient_id = {TABLE_PATIENTS}.ROWID "
-            f"WHERE {TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}' "
-            f"AND {TABLE_APPOINTMENTS}.appointment_date = '{today}' "
-            f"ORDER BY {TABLE_APPOINTMENTS}.MODIFIEDTIME DESC"
-        )
+        recent_result = results["recent"]
         recent_activity = []
         for row in (recent_result or [])[:8]:
             a = row[TABLE_APPOINTMENTS]
@@ -156,29 +194,12 @@ def get_stats(app, request):
             })
 
         # ── 7. Weekly trend (last 7 days appointment counts) ──
-        base_date = ist_now().date()
-        try:
-            parts = today.split("-")
-            base_date = _date_type(int(parts[0]), int(parts[1]), int(parts[2]))
-        except Exception:
-            pass
-
         weekly_trend = []
-        for i in range(6, -1, -1):
-            d = (base_date - timedelta(days=i)).isoformat()
-            day_label = (base_date - timedelta(days=i)).strftime("%a")
-            if d == today:
-                # We already have today's count
-                weekly_trend.append({"date": d, "day": day_label, "count": total_today})
-            else:
-                try:
-                    r = zcql.execute_query(
-                        f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
-                        f"WHERE clinic_id = '{clinic_id}' AND appointment_date = '{d}'"
-                    )
-                    weekly_trend.append({"date": d, "day": day_label, "count": len(r) if r else 0})
-                except Exception:
-                    weekly_trend.append({"date": d, "day": day_label, "count": 0})
+        for trend_date in trend_dates:
+            d = trend_date.isoformat()
+            # We already have today's count
+            count = total_today if d == today else results[d]
+            weekly_trend.append({"date": d, "day": trend_date.strftime("%a"), "count": count})
 
         stats = {
             "date": today,
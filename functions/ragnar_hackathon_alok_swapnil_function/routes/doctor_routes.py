@@ -2,6 +2,8 @@ import logging
 from utils.constants import TABLE_DOCTORS
 from utils.response import success, created, error, not_found, server_error
 from services.auth_service import require_clinic
+from services.roster_service import get_roster, get_doctor, invalidate_roster
+from services.patient_summary_service import invalidate_clinic_summaries
 
 logger = logging.getLogger(__name__)
 
@@ -13,16 +15,8 @@ def list_all(app, request):
         if not clinic_id:
             return error("No clinic found. Register first.", 403)
 
-        zcql = app.zcql()
-        result = zcql.execute_query(
-            f"SELECT ROWID, name, specialty, email, phone, available_from, "
-            f"available_to, consultation_fee, status "
-            f"FROM {TABLE_DOCTORS} WHERE clinic_id = '{clinic_id}' ORDER BY name ASC"
-        )
-
         doctors = []
-        for row in (result or []):
-            d = row[TABLE_DOCTORS]
+        for d in get_roster(app, clinic_id):
             doctors.append({
                 "id": d["ROWID"],
                 "name": d["name"],
@@ -68,6 +62,7 @@ def create(app, request):
             "consultation_fee": body.get("consultation_fee", "500"),
             "status": "active",
         })
+        invalidate_roster(app, clinic_id)
 
         return created({
             "id": row["ROWID"],
@@ -94,12 +89,7 @@ def update(app, request, doctor_id):
             return error("No clinic found", 403)
 
         # Verify doctor belongs to this clinic
-        zcql = app.zcql()
-        check = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_DOCTORS} "
-            f"WHERE ROWID = '{doctor_id}' AND clinic_id = '{clinic_id}'"
-        )
-        if not check or len(check) == 0:
+        if not get_doctor(app, clinic_id, doctor_id):
             return not_found("Doctor not found")
 
         body = request.get_json(silent=True) or {}
@@ -112,6 +102,10 @@ def update(app, request, doctor_id):
 
         table = app.datastore().table(TABLE_DOCTORS)
         row = table.update_row(update_data)
+        invalidate_roster(app, clinic_id)
+        # Cached patient summaries carry the doctor's name
+        if "name" in update_data:
+            invalidate_clinic_summaries(app, clinic_id)
 
         return success({
             "id": row["ROWID"],
@@ -133,16 +127,13 @@ def delete(app, request, doctor_id):
             return error("No clinic found", 403)
 
         # Verify doctor belongs to this clinic
-        zcql = app.zcql()
-        check = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_DOCTORS} "
-            f"WHERE ROWID = '{doctor_id}' AND clinic_id = '{clinic_id}'"
-        )
-        if not check or len(check) == 0:
+        if not get_doctor(app, clinic_id, doctor_id):
             return not_found("Doctor not found")
 
         table = app.datastore().table(TABLE_DOCTORS)
         table.delete_row(doctor_id)
+        invalidate_roster(app, clinic_id)
+        invalidate_clinic_summaries(app, clinic_id)
 
         return success(message="Doctor removed successfully")
 
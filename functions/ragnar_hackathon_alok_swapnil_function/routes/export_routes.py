@@ -0,0 +1,112 @@
+import logging
+import re
+from datetime import date as _date_type
+from flask import Response
+from utils.constants import ist_now
+from utils.response import success, error, server_error
+from services.auth_service import require_clinic
+from services.export_service import (
+    DATASETS, iter_csv, iter_export_rows, export_to_stratus,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {"csv"}
+# Longer CSV ranges are written to Stratus and returned as a link,
+# so the request does not hold a connection open for the whole scan
+EXPORT_STREAM_MAX_DAYS = 93
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _parse_range(request):
+    """Validated (from, to) from the query string, or an error message."""
+    date_from = request.args.get("from", "")
+    date_to = request.args.get("to", "")
+    if not date_from or not date_to:
+        return None, None, "from and to are required (YYYY-MM-DD)"
+    try:
+        if not _DATE_RE.match(date_from) or not _DATE_RE.match(date_to):
+            raise ValueError
+        start = _date_type.fromisoformat(date_from)
+        end = _date_type.fromisoformat(date_to)
+    except ValueError:
+        return None, None, "from and to must be dates in YYYY-MM-DD format"
+    if start > end:
+        return None, None, "from must not be after to"
+    return date_from, date_to, None
+
+
+def _stream_csv(chunks, counter, filename):
+    """
+    A streamed CSV response. The first chunk (at least the first page of rows)
+    is produced before the response starts, so an early failure is still a
+    500. Once bytes are sent the status cannot change: a later failure is
+    logged and the body ends with an EXPORT INCOMPLETE line instead of
+    stopping silently mid-file.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b"")
+
+    def body():
+        yield first
+        try:
+            for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            logger.error(f"Export {filename} failed after {counter['rows']} row(s): {e}")
+            yield f"# EXPORT INCOMPLETE: failed after {counter['rows']} row(s)\r\n".encode("utf-8")
+
+    return Response(body(), mimetype="text/csv", headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    })
+
+
+def export(app, request, dataset):
+    """
+    GET /api/export/appointments?from=&to=&format=csv
+    GET /api/export/feedback?from=&to=&format=csv
+    Short ranges stream back as the response body, one page of ZCQL at a
+    time (see _stream_csv for how a failure mid-stream shows up). Ranges over
+    EXPORT_STREAM_MAX_DAYS (or ?delivery=link) are written to Stratus and a
+    download link is returned.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+        if dataset not in DATASETS:
+            return error("Unknown export", 404)
+
+        date_from, date_to, err = _parse_range(request)
+        if err:
+            return error(err)
+        fmt = request.args.get("format", "csv").lower()
+        if fmt not in EXPORT_FORMATS:
+            return error("format must be csv")
+
+        days = (_date_type.fromisoformat(date_to) - _date_type.fromisoformat(date_from)).days + 1
+        filename = f"{dataset}_{date_from}_{date_to}.{fmt}"
+
+        if days <= EXPORT_STREAM_MAX_DAYS and request.args.get("delivery") != "link":
+            counter = {"rows": 0}
+            chunks = iter_csv(iter_export_rows(app, clinic_id, dataset, date_from, date_to),
+                              DATASETS[dataset]["columns"], counter)
+            return _stream_csv(chunks, counter, filename)
+
+        key = f"exports/{clinic_id}/{ist_now().strftime('%Y%m%d%H%M%S')}_{filename}"
+        url, rows = export_to_stratus(app, clinic_id, dataset, date_from, date_to, key)
+        if not url:
+            return server_error("Export upload failed")
+        return success({
+            "url": url,
+            "key": key,
+            "format": fmt,
+            "rows": rows,
+            "from": date_from,
+            "to": date_to,
+        }, f"Exported {rows} row(s)")
+
+    except Exception as e:
+        logger.error(f"Export {dataset} error: {e}")
+        return server_error(str(e))
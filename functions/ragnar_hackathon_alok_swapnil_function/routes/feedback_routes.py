@@ -0,0 +1,83 @@
+import logging
+import re
+from datetime import timedelta, date as _date_type
+from utils.constants import ist_today
+from utils.response import success, error, server_error
+from services.auth_service import require_clinic
+from services.roster_service import get_roster
+from services.rollup_service import get_feedback_analytics, rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+# Range shown when the caller gives no dates
+DEFAULT_ANALYTICS_WEEKS = 12
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _valid_date(value):
+    if not value or not _DATE_RE.match(value):
+        return False
+    try:
+        _date_type.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def get_analytics(app, request):
+    """
+    GET /api/feedback/analytics?from=YYYY-MM-DD&to=YYYY-MM-DD&doctor_id=
+    Score distribution, average, NPS, sentiment counts, top keywords, weekly
+    series and per-doctor breakdown, served from the weekly rollups.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        date_to = request.args.get("to", "") or ist_today()
+        if not _valid_date(date_to):
+            return error("from and to must be dates in YYYY-MM-DD format")
+        date_from = request.args.get("from", "") or (
+            _date_type.fromisoformat(date_to) - timedelta(weeks=DEFAULT_ANALYTICS_WEEKS)
+        ).isoformat()
+        if not _valid_date(date_from):
+            return error("from and to must be dates in YYYY-MM-DD format")
+        doctor_id = request.args.get("doctor_id", "").strip()
+        if date_from > date_to:
+            return error("from must not be after to")
+        if doctor_id and not doctor_id.isdigit():
+            return error("Invalid doctor_id")
+
+        analytics = get_feedback_analytics(app, clinic_id, date_from, date_to, doctor_id or None)
+
+        names = {d["ROWID"]: d["name"] for d in get_roster(app, clinic_id)}
+        for doc in analytics["doctors"]:
+            doc["doctor_name"] = names.get(doc["doctor_id"], "")
+        analytics["doctors"].sort(key=lambda d: d["doctor_name"])
+
+        return success(analytics)
+
+    except Exception as e:
+        logger.error(f"Feedback analytics error: {e}")
+        return server_error(str(e))
+
+
+def rebuild_analytics(app, request):
+    """
+    POST /api/feedback/analytics/rebuild
+    Recompute the clinic's feedback rollups from its appointments
+    (backfills feedback given before rollups existed).
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        written = rebuild_rollups(app, clinic_id)
+        return success({"rollups": written}, f"Rebuilt {written} weekly rollup(s)")
+
+    except Exception as e:
+        logger.error(f"Feedback rollup rebuild error: {e}")
+        return server_error(str(e))
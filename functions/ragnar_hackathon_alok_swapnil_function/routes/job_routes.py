@@ -0,0 +1,51 @@
+import logging
+import re
+from utils.response import success, error, not_found, server_error
+from services.auth_service import require_app_admin
+from services.batch_service import list_runs as fetch_runs, get_run as fetch_run
+
+logger = logging.getLogger(__name__)
+
+MAX_RUNS = 100
+
+_JOB_NAME_RE = re.compile(r"^[a-z_]+$")
+
+
+def list_runs(app, request):
+    """
+    GET /api/admin/jobs?job=&limit=
+    Recent batch job runs (cron jobs) with their checkpoint and counters.
+    """
+    try:
+        if not require_app_admin(app):
+            return error("App administrator access required", 403)
+
+        job_name = request.args.get("job", "").strip()
+        if job_name and not _JOB_NAME_RE.match(job_name):
+            return error("Invalid job name")
+        try:
+            limit = min(max(int(request.args.get("limit", 20)), 1), MAX_RUNS)
+        except (TypeError, ValueError):
+            limit = 20
+
+        return success(fetch_runs(app, job_name or None, limit))
+
+    except Exception as e:
+        logger.error(f"List job runs error: {e}")
+        return server_error(str(e))
+
+
+def get_run(app, request, run_id):
+    """GET /api/admin/jobs/:id — Progress of one batch job run."""
+    try:
+        if not require_app_admin(app):
+            return error("App administrator access required", 403)
+
+        run = fetch_run(app, run_id)
+        if not run:
+            return not_found("Job run not found")
+        return success(run)
+
+    except Exception as e:
+        logger.error(f"Get job run error: {e}")
+        return server_error(str(e))
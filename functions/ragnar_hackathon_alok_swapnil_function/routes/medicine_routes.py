@@ -0,0 +1,55 @@
+import logging
+from utils.response import success, error, server_error
+from services.auth_service import require_clinic
+from services.medicine_catalog_service import suggest_medicines, rebuild_medicine_catalog, DEFAULT_LIMIT
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 20
+
+
+def suggest(app, request):
+    """
+    GET /api/medicines/suggest?q=&limit= — The clinic's most prescribed
+    medicines matching a name prefix, each with its usual dosage, duration
+    and timing, from the in-memory catalog.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        query_param = request.args.get("q", "").strip()
+        if not query_param:
+            return success([])
+
+        try:
+            limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_SUGGESTIONS)
+        except (TypeError, ValueError):
+            limit = DEFAULT_LIMIT
+
+        return success(suggest_medicines(app, clinic_id, query_param, limit))
+
+    except Exception as e:
+        logger.error(f"Medicine suggest error: {e}")
+        return server_error(str(e))
+
+
+def rebuild(app, request):
+    """
+    POST /api/medicines/rebuild
+    Recount the clinic's medicine catalog from its prescription items.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        written, failed_batches = rebuild_medicine_catalog(app, clinic_id)
+        if failed_batches:
+            return server_error(f"Rebuilt {written} medicine(s); {failed_batches} batch(es) failed, please retry")
+        return success({"medicines": written}, f"Rebuilt catalog with {written} medicine(s)")
+
+    except Exception as e:
+        logger.error(f"Medicine catalog rebuild error: {e}")
+        return server_error(str(e))
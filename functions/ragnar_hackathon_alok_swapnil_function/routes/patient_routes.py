@@ -1,11 +1,21 @@
 import logging
 from utils.constants import TABLE_PATIENTS
 from utils.response import success, created, error, not_found, server_error
+from utils.phone import phone_key, phone_match, with_phone_key, PHONE_KEY_COLUMN
 from services.auth_service import require_clinic
-from services.search_service import search_patients
+from services.search_service import (
+    search_patients, with_search_key, patient_search_key, reindex_patient_keys, SEARCH_KEY_COLUMN,
+)
+from services.patient_index_service import search_patient_index, record_patient, DEFAULT_LIMIT
+from services.patient_summary_service import get_patient_summary, invalidate_patient_summary
+from services.import_service import import_patients as run_patient_import, IMPORT_MAX_BYTES
 
 logger = logging.getLogger(__name__)
 
+# Timeline entries per page of the patient summary
+SUMMARY_PAGE_SIZE = 20
+SUMMARY_MAX_PAGE_SIZE = 100
+
 
 def list_all(app, request):
     """GET /api/patients — List all patients for the clinic."""
@@ -54,18 +64,20 @@ def create(app, request):
 
         if not name or not phone:
             return error("Patient name and phone are required")
+        if not phone_key(phone):
+            return error("Invalid phone number")
 
         # Check for duplicate phone in same clinic
         zcql = app.zcql()
         existing = zcql.execute_query(
             f"SELECT ROWID FROM {TABLE_PATIENTS} "
-            f"WHERE clinic_id = '{clinic_id}' AND phone = '{phone}'"
+            f"WHERE clinic_id = '{clinic_id}' AND {phone_match(phone)}"
         )
         if existing and len(existing) > 0:
             return error("Patient with this phone already exists in your clinic")
 
         table = app.datastore().table(TABLE_PATIENTS)
-        row = table.insert_row({
+        row = table.insert_row(with_search_key(clinic_id, with_phone_key({
             "clinic_id": clinic_id,
             "name": name,
             "phone": phone,
@@ -74,7 +86,8 @@ def create(app, request):
             "gender": body.get("gender", ""),
             "blood_group": body.get("blood_group", ""),
             "medical_history": body.get("medical_history", ""),
-        })
+        })))
+        record_patient(app, clinic_id, row)
 
         return created({
             "id": row["ROWID"],
@@ -90,6 +103,34 @@ def create(app, request):
         return server_error(str(e))
 
 
+def import_patients(app, request):
+    """POST /api/patients/import — Bulk import patients from a CSV/XLSX upload."""
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        if request.content_length and request.content_length > IMPORT_MAX_BYTES:
+            return error(f"Import file must be smaller than {IMPORT_MAX_BYTES // (1024 * 1024)} MB", 413)
+
+        file = request.files.get("file")
+        if not file:
+            return error("Import file is required")
+
+        try:
+            report = run_patient_import(app, clinic_id, file.stream, file.filename)
+        except ValueError as ve:
+            return error(str(ve))
+
+        if report["read_error"] and not report["total_rows"]:
+            return error(report["read_error"])
+        return success(report, f"Imported {report['imported']} of {report['total_rows']} patient(s)")
+
+    except Exception as e:
+        logger.error(f"Import patients error: {e}")
+        return server_error(str(e))
+
+
 def get_one(app, request, patient_id):
     """GET /api/patients/:id — Get patient details."""
     try:
@@ -124,6 +165,42 @@ def get_one(app, request, patient_id):
         return server_error(str(e))
 
 
+def summary(app, request, patient_id):
+    """
+    GET /api/patients/:id/summary?limit=&offset= — Patient details, visit and
+    prescription counts, and one page of the combined timeline (newest first).
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        try:
+            limit = min(max(int(request.args.get("limit", SUMMARY_PAGE_SIZE)), 1), SUMMARY_MAX_PAGE_SIZE)
+            offset = max(int(request.args.get("offset", 0)), 0)
+        except (TypeError, ValueError):
+            return error("limit and offset must be numbers")
+
+        data = get_patient_summary(app, clinic_id, patient_id)
+        if data is None:
+            return not_found("Patient not found")
+
+        timeline = data["timeline"]
+        return success({
+            "patient": data["patient"],
+            "counts": data["counts"],
+            "timeline": timeline[offset:offset + limit],
+            "total": len(timeline),
+            "offset": offset,
+            "limit": limit,
+            "has_more": offset + limit < len(timeline),
+        })
+
+    except Exception as e:
+        logger.error(f"Patient summary error: {e}")
+        return server_error(str(e))
+
+
 def update(app, request, patient_id):
     """PUT /api/patients/:id — Update patient."""
     try:
@@ -134,11 +211,12 @@ def update(app, request, patient_id):
         # Verify patient belongs to this clinic
         zcql = app.zcql()
         check = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_PATIENTS} "
+            f"SELECT ROWID, name, phone, email FROM {TABLE_PATIENTS} "
             f"WHERE ROWID = '{patient_id}' AND clinic_id = '{clinic_id}'"
         )
         if not check or len(check) == 0:
             return not_found("Patient not found")
+        current = check[0][TABLE_PATIENTS]
 
         body = request.get_json(silent=True) or {}
         update_data = {"ROWID": patient_id}
@@ -147,9 +225,20 @@ def update(app, request, patient_id):
                       "blood_group", "medical_history"]:
             if field in body:
                 update_data[field] = body[field]
+        if "phone" in update_data:
+            if not phone_key(update_data["phone"]):
+                return error("Invalid phone number")
+            update_data[PHONE_KEY_COLUMN] = phone_key(update_data["phone"])
+        if any(field in update_data for field in ("name", "phone", "email")):
+            merged = dict(current, **update_data)
+            update_data[SEARCH_KEY_COLUMN] = patient_search_key(
+                clinic_id, merged.get("name"), merged.get("phone"), merged.get("email"),
+            )
 
         table = app.datastore().table(TABLE_PATIENTS)
         row = table.update_row(update_data)
+        record_patient(app, clinic_id, row)
+        invalidate_patient_summary(app, clinic_id, patient_id)
 
         return success({
             "id": row["ROWID"],
@@ -162,8 +251,39 @@ def update(app, request, patient_id):
         return server_error(str(e))
 
 
+def _search_datastore(app, clinic_id, query_param):
+    """Patients of a clinic whose name or phone contains the query (ZCQL LIKE)."""
+    term = query_param.replace("'", "''")
+    result = app.zcql().execute_query(
+        f"SELECT ROWID, name, phone, email, age, gender "
+        f"FROM {TABLE_PATIENTS} "
+        f"WHERE clinic_id = '{clinic_id}' "
+        f"AND (name LIKE '%{term}%' OR phone LIKE '%{term}%') "
+        f"ORDER BY name ASC"
+    )
+
+    patients = []
+    for row in (result or []):
+        p = row[TABLE_PATIENTS]
+        patients.append({
+            "id": p["ROWID"],
+            "name": p["name"],
+            "phone": p["phone"],
+            "email": p["email"],
+            "age": p["age"],
+            "gender": p["gender"],
+        })
+    return patients
+
+
 def search(app, request):
-    """GET /api/patients/search?q= — Search patients by name or phone."""
+    """
+    GET /api/patients/search?q=&limit= — Search patients by name prefix or
+    phone suffix, ranked, from the clinic's in-memory index. An index miss is
+    checked against the Data Store: a patient registered on another instance
+    can be missing from this one's index for a while (see
+    patient_index_service.record_patient).
+    """
     try:
         clinic_id, user = require_clinic(app, request)
         if not clinic_id:
@@ -173,35 +293,46 @@ def search(app, request):
         if not query_param:
             return error("Search query 'q' is required")
 
-        # Try Catalyst Search service first
+        try:
+            limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), 50)
+        except (TypeError, ValueError):
+            limit = DEFAULT_LIMIT
+
+        try:
+            found = search_patient_index(app, clinic_id, query_param, limit)
+            if found:
+                return success(found)
+            return success(_search_datastore(app, clinic_id, query_param)[:limit])
+        except Exception as index_err:
+            logger.warning(f"Patient index unavailable, falling back to Search: {index_err}")
+
+        # Fall back to Catalyst Search, then a ZCQL LIKE query
         search_results = search_patients(app, clinic_id, query_param)
         if search_results is not None:
             return success(search_results)
+        return success(_search_datastore(app, clinic_id, query_param))
 
-        # Fallback to ZCQL LIKE query
-        zcql = app.zcql()
-        result = zcql.execute_query(
-            f"SELECT ROWID, name, phone, email, age, gender "
-            f"FROM {TABLE_PATIENTS} "
-            f"WHERE clinic_id = '{clinic_id}' "
-            f"AND (name LIKE '%{query_param}%' OR phone LIKE '%{query_param}%') "
-            f"ORDER BY name ASC"
-        )
+    except Exception as e:
+        logger.error(f"Search patients error: {e}")
+        return server_error(str(e))
 
-        patients = []
-        for row in (result or []):
-            p = row[TABLE_PATIENTS]
-            patients.append({
-                "id": p["ROWID"],
-                "name": p["name"],
-                "phone": p["phone"],
-                "email": p["email"],
-                "age": p["age"],
-                "gender": p["gender"],
-            })
 
-        return success(patients)
+def reindex(app, request):
+    """
+    POST /api/patients/reindex — Recompute the derived lookup columns
+    (search_key, phone_key) of all patients; backfills rows created before
+    those columns existed.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        updated, failed_batches = reindex_patient_keys(app, clinic_id)
+        if failed_batches:
+            return server_error(f"Reindexed {updated} patient(s); {failed_batches} batch(es) failed, please retry")
+        return success({"updated": updated}, f"Reindexed {updated} patient(s)")
 
     except Exception as e:
-        logger.error(f"Search patients error: {e}")
+        logger.error(f"Reindex patients error: {e}")
         return server_error(str(e))
@@ -1,26 +1,55 @@
 import json
 import logging
+import re
+from datetime import timedelta, date as _date_type
 from utils.constants import (
     TABLE_PRESCRIPTIONS, TABLE_APPOINTMENTS, TABLE_DOCTORS, TABLE_PATIENTS,
     TABLE_CLINICS, STATUS_COMPLETED, ist_today,
 )
 from utils.response import success, created, error, not_found, server_error
 from services.auth_service import require_clinic
+from services.idempotency_service import run_idempotent
+from utils.parallel import run_parallel, query_task
 from services.mail_service import send_prescription_email
 from services.smart_browz_service import generate_prescription_html, generate_pdf
 from services.stratus_service import upload_prescription_pdf, get_file_download_url
 from services.sms_service import send_prescription_sms
+from services.roster_service import get_doctor
+from services.clinic_service import get_clinic_profile
+from services.patient_summary_service import invalidate_patient_summary
+from services.prescription_item_service import (
+    write_items, load_medicines, get_drug_usage, rebuild_items as run_items_rebuild,
+)
+from services.medicine_catalog_service import record_medicines, rebuild_medicine_catalog
 
 logger = logging.getLogger(__name__)
 
+# Range of the drug-usage report when the caller gives no dates
+DEFAULT_USAGE_DAYS = 90
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
 
 def create(app, request):
-    """POST /api/prescriptions — Create a new prescription."""
+    """
+    POST /api/prescriptions — Create a new prescription.
+    Honours the Idempotency-Key header, scoped to the clinic and user.
+    """
     try:
         clinic_id, user = require_clinic(app, request)
         if not clinic_id:
             return error("No clinic found", 403)
 
+        scope = f"{clinic_id}:{(user or {}).get('user_id', '')}"
+        return run_idempotent(app, request, lambda: _create(app, request, clinic_id), scope)
+
+    except Exception as e:
+        logger.error(f"Create prescription error: {e}")
+        return server_error(str(e))
+
+
+def _create(app, request, clinic_id):
+    try:
         body = request.get_json(silent=True) or {}
         appointment_id = body.get("appointment_id", "").strip()
         diagnosis = body.get("diagnosis", "").strip()
@@ -31,12 +60,15 @@ def create(app, request):
         if not appointment_id or not diagnosis:
             return error("Appointment ID and diagnosis are required")
 
-        # Get appointment details
-        zcql = app.zcql()
-        appt_result = zcql.execute_query(
-            f"SELECT ROWID, doctor_id, patient_id FROM {TABLE_APPOINTMENTS} "
-            f"WHERE ROWID = '{appointment_id}' AND clinic_id = '{clinic_id}'"
-        )
+        # Get appointment details (clinic details for email + PDF in the same round)
+        first = run_parallel({
+            "appointment": query_task(app, (
+                f"SELECT ROWID, doctor_id, patient_id, appointment_date FROM {TABLE_APPOINTMENTS} "
+                f"WHERE ROWID = '{appointment_id}' AND clinic_id = '{clinic_id}'"
+            )),
+            "clinic": lambda: get_clinic_profile(app, clinic_id),
+        })
+        appt_result = first["appointment"]
         if not appt_result or len(appt_result) == 0:
             return not_found("Appointment not found")
 
@@ -48,52 +80,62 @@ def create(app, request):
         medicines_json = json.dumps(medicines) if isinstance(medicines, list) else str(medicines)
 
         table = app.datastore().table(TABLE_PRESCRIPTIONS)
-        row = table.insert_row({
-            "clinic_id": clinic_id,
-            "appointment_id": appointment_id,
-            "doctor_id": doctor_id,
-            "patient_id": patient_id,
-            "diagnosis": diagnosis,
-            "medicines": medicines_json,
-            "advice": advice,
-            "follow_up_date": follow_up_date,
-            "prescription_url": "",
-        })
 
-        # Update appointment status to completed
-        try:
-            appt_table = app.datastore().table(TABLE_APPOINTMENTS)
-            appt_table.update_row({
-                "ROWID": appointment_id,
-                "status": STATUS_COMPLETED,
+        def insert_prescription():
+            rx_row = table.insert_row({
+                "clinic_id": clinic_id,
+                "appointment_id": appointment_id,
+                "doctor_id": doctor_id,
+                "patient_id": patient_id,
+                "diagnosis": diagnosis,
+                "medicines": medicines_json,
+                "advice": advice,
+                "follow_up_date": follow_up_date,
+                "prescription_url": "",
             })
-        except Exception as status_err:
-            logger.warning(f"Failed to update appointment status: {status_err}")
+            return rx_row
 
-        # Fetch clinic, doctor, patient details for email + PDF
-        clinic_res = zcql.execute_query(
-            f"SELECT name, address, phone FROM {TABLE_CLINICS} WHERE ROWID = '{clinic_id}'"
-        )
-        doctor_res = zcql.execute_query(
-            f"SELECT name, specialty FROM {TABLE_DOCTORS} WHERE ROWID = '{doctor_id}'"
-        )
-        patient_res = zcql.execute_query(
-            f"SELECT name, email, phone, age, gender FROM {TABLE_PATIENTS} WHERE ROWID = '{patient_id}'"
-        )
+        def complete_appointment():
+            # Update appointment status to completed
+            try:
+                app.datastore().table(TABLE_APPOINTMENTS).update_row({
+                    "ROWID": appointment_id,
+                    "status": STATUS_COMPLETED,
+                })
+            except Exception as status_err:
+                logger.warning(f"Failed to update appointment status: {status_err}")
+
+        # The doctor/patient lookups for email + PDF run alongside the insert
+        second = run_parallel({
+            "prescription": insert_prescription,
+            "doctor": lambda: get_doctor(app, clinic_id, doctor_id),
+            "patient": query_task(
+                app, f"SELECT name, email, phone, age, gender FROM {TABLE_PATIENTS} WHERE ROWID = '{patient_id}'"
+            ),
+        })
+        row = second["prescription"]
+        # Only once the prescription exists: a failed insert leaves the appointment
+        # open and counts nothing into items or the medicine catalog
+        run_parallel({
+            "status": complete_appointment,
+            # Structured copy of the medicines for hydration and drug-usage analytics
+            "items": lambda: write_items(app, row, medicines if isinstance(medicines, list) else [],
+                                         appt.get("appointment_date") or ist_today()),
+            "catalog": lambda: record_medicines(
+                app, clinic_id, medicines if isinstance(medicines, list) else [], appt.get("appointment_date"),
+            ),
+        })
+        patient_res = second["patient"]
+        invalidate_patient_summary(app, clinic_id, patient_id)
 
-        clinic_data = clinic_res[0][TABLE_CLINICS] if clinic_res else {}
-        doctor_data = doctor_res[0][TABLE_DOCTORS] if doctor_res else {}
+        clinic_data = first["clinic"] or {}
+        doctor_data = second["doctor"] or {}
         patient_data = patient_res[0][TABLE_PATIENTS] if patient_res else {}
 
         # Send prescription email (non-blocking)
         try:
             p_email = patient_data.get("email", "")
             if p_email:
-                medicines_text = "<br>".join(
-                    [f"- {m.get('name', '')} | {m.get('dosage', '')} | {m.get('duration', '')} | {m.get('instructions', '')}"
-                     for m in medicines]
-                ) if isinstance(medicines, list) else str(medicines)
-
                 send_prescription_email(
                     app,
                     patient_email=p_email,
@@ -101,8 +143,9 @@ def create(app, request):
                     doctor_name=doctor_data.get("name", ""),
                     clinic_name=clinic_data.get("name", "CareDesk"),
                     diagnosis=diagnosis,
-                    medicines_text=medicines_text,
+                    medicines=medicines,
                     advice=advice,
+                    clinic_id=clinic_id,
                 )
         except Exception as mail_err:
             logger.warning(f"Prescription mail failed: {mail_err}")
@@ -202,11 +245,7 @@ def get_one(app, request, prescription_id):
         )
         clinic_data = clinic_res[0][TABLE_CLINICS] if clinic_res else {}
 
-        medicines = rx["medicines"]
-        try:
-            medicines = json.loads(medicines)
-        except (json.JSONDecodeError, TypeError):
-            pass
+        medicines = load_medicines(app, clinic_id, [rx])[rx["ROWID"]]
 
         return success({
             "id": rx["ROWID"],
@@ -277,11 +316,7 @@ def download_pdf(app, request, prescription_id):
         )
         clinic_data = clinic_res[0][TABLE_CLINICS] if clinic_res else {}
 
-        medicines = rx["medicines"]
-        try:
-            medicines = json.loads(medicines)
-        except (json.JSONDecodeError, TypeError):
-            medicines = []
+        medicines = load_medicines(app, clinic_id, [rx])[rx["ROWID"]]
 
         html_content = generate_prescription_html({
             "clinic_name": clinic_data.get("name", "CareDesk"),
@@ -345,20 +380,16 @@ def by_patient(app, request, patient_id):
             f"ORDER BY {TABLE_PRESCRIPTIONS}.ROWID DESC"
         )
 
+        medicines = load_medicines(app, clinic_id, [row[TABLE_PRESCRIPTIONS] for row in (result or [])])
+
         prescriptions = []
         for row in (result or []):
             rx = row[TABLE_PRESCRIPTIONS]
-            medicines = rx["medicines"]
-            try:
-                medicines = json.loads(medicines)
-            except (json.JSONDecodeError, TypeError):
-                pass
-
             prescriptions.append({
                 "id": rx["ROWID"],
                 "doctor_name": row.get(TABLE_DOCTORS, {}).get("name", ""),
                 "diagnosis": rx["diagnosis"],
-                "medicines": medicines,
+                "medicines": medicines[rx["ROWID"]],
                 "advice": rx["advice"],
                 "follow_up_date": rx["follow_up_date"],
                 "created_time": rx["CREATEDTIME"],
@@ -369,3 +400,73 @@ def by_patient(app, request, patient_id):
     except Exception as e:
         logger.error(f"Get patient prescriptions error: {e}")
         return server_error(str(e))
+
+
+def _valid_date(value):
+    if not value or not _DATE_RE.match(value):
+        return False
+    try:
+        _date_type.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+def drug_usage(app, request):
+    """
+    GET /api/prescriptions/drug-usage?from=YYYY-MM-DD&to=YYYY-MM-DD&doctor_id=&name=
+    How often each medicine was prescribed, most used first, from PrescriptionItems.
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        date_to = request.args.get("to", "") or ist_today()
+        if not _valid_date(date_to):
+            return error("from and to must be dates in YYYY-MM-DD format")
+        date_from = request.args.get("from", "") or (
+            _date_type.fromisoformat(date_to) - timedelta(days=DEFAULT_USAGE_DAYS)
+        ).isoformat()
+        if not _valid_date(date_from):
+            return error("from and to must be dates in YYYY-MM-DD format")
+        if date_from > date_to:
+            return error("from must not be after to")
+        doctor_id = request.args.get("doctor_id", "").strip()
+        if doctor_id and not doctor_id.isdigit():
+            return error("Invalid doctor_id")
+        name = request.args.get("name", "").strip().replace("'", "")
+        try:
+            top_k = min(max(int(request.args.get("top", 50)), 1), 500)
+        except (TypeError, ValueError):
+            return error("top must be a number")
+
+        return success(get_drug_usage(app, clinic_id, date_from, date_to,
+                                      doctor_id or None, name or None, top_k))
+
+    except Exception as e:
+        logger.error(f"Drug usage error: {e}")
+        return server_error(str(e))
+
+
+def rebuild_items(app, request):
+    """
+    POST /api/prescriptions/items/rebuild
+    Rewrite the clinic's PrescriptionItems from the prescriptions' medicines
+    (backfills prescriptions written before items existed).
+    """
+    try:
+        clinic_id, user = require_clinic(app, request)
+        if not clinic_id:
+            return error("No clinic found", 403)
+
+        written, failed_batches = run_items_rebuild(app, clinic_id)
+        # The medicine catalog is counted from the items
+        rebuild_medicine_catalog(app, clinic_id)
+        if failed_batches:
+            return server_error(f"Rebuilt {written} item(s); {failed_batches} batch(es) failed, please retry")
+        return success({"items": written}, f"Rebuilt {written} prescription item(s)")
+
+    except Exception as e:
+        logger.error(f"Prescription items rebuild error: {e}")
+        return server_error(str(e))
@@ -1,32 +1,24 @@
-import json
 import logging
 from utils.constants import (
     TABLE_CLINICS, TABLE_DOCTORS, TABLE_APPOINTMENTS, TABLE_PATIENTS,
     TABLE_PRESCRIPTIONS, STATUS_BOOKED, STATUS_IN_QUEUE,
-    ist_today, ist_time_now,
+    SENTIMENT_NEUTRAL, SENTIMENT_PENDING, ist_today,
 )
 from utils.response import success, created, error, not_found, server_error
-from services.zia_service import analyze_sentiment, extract_keywords
+from utils.phone import phone_key, phone_match
 from services.cache_service import get_queue_state
 from services.signals_service import emit_appointment_event
-from services.sms_service import send_booking_sms
-from services.mail_service import send_appointment_confirmation
+from services.roster_service import get_active_doctors
+from services.clinic_service import get_clinic_by_slug
+from services.idempotency_service import run_idempotent
+from services.booking_service import book_appointment as run_booking, BookingError
+from services.rollup_service import RollupDelta, apply_delta
+from services.patient_summary_service import invalidate_patient_summary
+from services.prescription_item_service import load_medicines
 
 logger = logging.getLogger(__name__)
 
 
-def _get_clinic_by_slug(app, slug):
-    """Look up a clinic by its URL slug."""
-    zcql = app.zcql()
-    result = zcql.execute_query(
-        f"SELECT ROWID, name, slug, address, phone, email, logo_url "
-        f"FROM {TABLE_CLINICS} WHERE slug = '{slug}'"
-    )
-    if result and len(result) > 0:
-        return result[0][TABLE_CLINICS]
-    return None
-
-
 def list_clinics(app, request):
     """GET /api/public/clinics — List all clinics for public directory."""
     try:
@@ -73,10 +65,13 @@ def my_appointments(app, request):
 
         zcql = app.zcql()
 
+        if not phone_key(phone):
+            return error("Invalid phone number")
+
         # Find patient by phone (could be in multiple clinics)
         patient_result = zcql.execute_query(
             f"SELECT ROWID, clinic_id, name FROM {TABLE_PATIENTS} "
-            f"WHERE phone = '{phone}'"
+            f"WHERE {phone_match(phone)}"
         )
         if not patient_result or len(patient_result) == 0:
             return success([])
@@ -148,24 +143,15 @@ def my_appointments(app, request):
 def get_clinic(app, request, slug):
     """GET /api/public/clinic/:slug — Public clinic info + doctors."""
     try:
-        clinic = _get_clinic_by_slug(app, slug)
+        clinic = get_clinic_by_slug(app, slug)
         if not clinic:
             return not_found("Clinic not found")
 
         clinic_id = clinic["ROWID"]
 
         # Get active doctors
-        zcql = app.zcql()
-        doctors_result = zcql.execute_query(
-            f"SELECT ROWID, name, specialty, available_from, available_to, consultation_fee "
-            f"FROM {TABLE_DOCTORS} "
-            f"WHERE clinic_id = '{clinic_id}' AND status = 'active' "
-            f"ORDER BY name ASC"
-        )
-
         doctors = []
-        for row in (doctors_result or []):
-            d = row[TABLE_DOCTORS]
+        for d in get_active_doctors(app, clinic_id):
             doctors.append({
                 "id": d["ROWID"],
                 "name": d["name"],
@@ -194,9 +180,26 @@ def get_clinic(app, request, slug):
 
 
 def book_appointment(app, request):
-    """POST /api/public/book — Patient self-service booking."""
+    """
+    POST /api/public/book — Patient self-service booking.
+    Honours the Idempotency-Key header, scoped to the clinic; a replay also
+    needs the identical request body (patient name and phone included).
+    """
     try:
         body = request.get_json(silent=True) or {}
+        slug = body.get("clinic_slug", "").strip()
+        clinic = get_clinic_by_slug(app, slug) if slug else None
+        if not clinic:
+            return _book(app, request, body, None)
+        return run_idempotent(app, request, lambda: _book(app, request, body, clinic), f"public:{clinic['ROWID']}")
+
+    except Exception as e:
+        logger.error(f"Public booking error: {e}")
+        return server_error(str(e))
+
+
+def _book(app, request, body, clinic):
+    try:
         slug = body.get("clinic_slug", "").strip()
         doctor_id = body.get("doctor_id", "").strip()
         patient_name = body.get("patient_name", "").strip()
@@ -208,120 +211,23 @@ def book_appointment(app, request):
         if not slug or not doctor_id or not patient_name or not patient_phone:
             return error("Clinic, doctor, patient name and phone are required")
 
-        clinic = _get_clinic_by_slug(app, slug)
         if not clinic:
             return not_found("Clinic not found")
 
-        clinic_id = clinic["ROWID"]
-        zcql = app.zcql()
-
-        # Validate: appointment time is required
-        if not appt_time:
-            return error("Appointment time is required. Please select a time slot.")
-
-        # Validate: cannot book in the past
-        today_str = ist_today()
-        if appt_date < today_str:
-            return error("Cannot book appointment for a past date. Please select today or a future date.")
-
-        # Validate: same-day past time check
-        if appt_date == today_str and appt_time:
-            now = ist_time_now()
-            if appt_time <= now:
-                return error("Selected time has already passed. Please choose a later time for today's appointment.")
-
-        # Validate: doctor exists, belongs to this clinic, and is active
-        doc_check = zcql.execute_query(
-            f"SELECT ROWID, status, available_from, available_to, name FROM {TABLE_DOCTORS} "
-            f"WHERE ROWID = '{doctor_id}' AND clinic_id = '{clinic_id}'"
-        )
-        if not doc_check or len(doc_check) == 0:
-            return error("Doctor not found in this clinic.")
-        doc = doc_check[0][TABLE_DOCTORS]
-        if doc.get("status") == "inactive":
-            return error(f"Dr. {doc.get('name', '')} is currently unavailable. Please choose another doctor.")
-
-        # Validate: appointment time is within doctor's available hours
-        avail_from = doc.get("available_from", "")
-        avail_to = doc.get("available_to", "")
-        if avail_from and avail_to and appt_time:
-            if appt_time < avail_from or appt_time > avail_to:
-                return error(
-                    f"Dr. {doc.get('name', '')} is available only from {avail_from} to {avail_to}. "
-                    f"Please select a time within these hours."
-                )
-
-        # Validate: no duplicate booking for same doctor at same date+time
-        conflict = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_APPOINTMENTS} "
-            f"WHERE clinic_id = '{clinic_id}' AND doctor_id = '{doctor_id}' "
-            f"AND appointment_date = '{appt_date}' AND appointment_time = '{appt_time}' "
-            f"AND status != 'cancelled'"
-        )
-        if conflict and len(conflict) > 0:
-            return error("This time slot is already booked. Please choose a different time.")
-
-        # Find or create patient
-        patient_result = zcql.execute_query(
-            f"SELECT ROWID FROM {TABLE_PATIENTS} "
-            f"WHERE clinic_id = '{clinic_id}' AND phone = '{patient_phone}'"
-        )
-
-        if patient_result and len(patient_result) > 0:
-            patient_id = patient_result[0][TABLE_PATIENTS]["ROWID"]
-        else:
-            patient_table = app.datastore().table(TABLE_PATIENTS)
-            patient_row = patient_table.insert_row({
-                "clinic_id": clinic_id,
-                "name": patient_name,
-                "phone": patient_phone,
-                "email": patient_email,
-                "age": body.get("age", ""),
-                "gender": body.get("gender", ""),
-                "blood_group": "",
-                "medical_history": "",
-            })
-            patient_id = patient_row["ROWID"]
-
-        # Generate token with doctor initials
-        from routes.appointment_routes import _generate_token
-        token = _generate_token(app, clinic_id, appt_date, doc.get("name", ""))
-
-        # Create appointment
-        appt_table = app.datastore().table(TABLE_APPOINTMENTS)
-        row = appt_table.insert_row({
-            "clinic_id": clinic_id,
-            "doctor_id": doctor_id,
-            "patient_id": str(patient_id),
-            "appointment_date": appt_date,
-            "appointment_time": appt_time,
-            "status": STATUS_BOOKED,
-            "token_number": token,
-            "notes": body.get("notes", ""),
-            "feedback_score": "",
-            "feedback_text": "",
-            "feedback_sentiment": "",
-        })
-
-        # Send booking confirmation email
-        try:
-            if patient_email:
-                send_appointment_confirmation(
-                    app, patient_email, patient_name, doc.get("name", ""),
-                    clinic["name"], appt_date, appt_time, token
-                )
-        except Exception as mail_err:
-            logger.warning(f"Confirmation mail failed (non-critical): {mail_err}")
-
-        # Send booking confirmation SMS
         try:
-            if patient_phone:
-                send_booking_sms(
-                    patient_phone, patient_name, doc.get("name", ""),
-                    token, appt_time, appt_date, clinic["name"]
-                )
-        except Exception as sms_err:
-            logger.warning(f"SMS send failed (non-critical): {sms_err}")
+            row, ctx, token = run_booking(
+                app, clinic, doctor_id, appt_date, appt_time,
+                new_patient={
+                    "name": patient_name,
+                    "phone": patient_phone,
+                    "email": patient_email,
+                    "age": body.get("age", ""),
+                    "gender": body.get("gender", ""),
+                },
+                notes=body.get("notes", ""),
+            )
+        except BookingError as booking_err:
+            return error(str(booking_err))
 
         return created({
             "appointment_id": row["ROWID"],
@@ -340,7 +246,7 @@ def book_appointment(app, request):
 def get_queue(app, request, slug):
     """GET /api/public/queue/:slug — Public live queue display."""
     try:
-        clinic = _get_clinic_by_slug(app, slug)
+        clinic = get_clinic_by_slug(app, slug)
         if not clinic:
             return not_found("Clinic not found")
 
@@ -410,8 +316,8 @@ def submit_feedback(app, request, appointment_id):
         # Validate: appointment exists and is completed
         zcql = app.zcql()
         appt_check = zcql.execute_query(
-            f"SELECT ROWID, status, feedback_score FROM {TABLE_APPOINTMENTS} "
-            f"WHERE ROWID = '{appointment_id}'"
+            f"SELECT ROWID, clinic_id, doctor_id, patient_id, appointment_date, status, feedback_score "
+            f"FROM {TABLE_APPOINTMENTS} WHERE ROWID = '{appointment_id}'"
         )
         if not appt_check or len(appt_check) == 0:
             return not_found("Appointment not found")
@@ -421,14 +327,8 @@ def submit_feedback(app, request, appointment_id):
         if appt.get("feedback_score", ""):
             return error("Feedback has already been submitted for this appointment")
 
-        # Analyze sentiment and extract keywords using Zia
-        sentiment = "neutral"
-        keywords = []
-        if feedback_text:
-            sentiment = analyze_sentiment(app, feedback_text)
-            keywords = extract_keywords(app, feedback_text)
-
-        keywords_str = ",".join(keywords) if keywords else ""
+        # Sentiment and keywords are filled in by the enrichment cron
+        sentiment = SENTIMENT_PENDING if feedback_text else SENTIMENT_NEUTRAL
 
         table = app.datastore().table(TABLE_APPOINTMENTS)
         table.update_row({
@@ -436,9 +336,15 @@ def submit_feedback(app, request, appointment_id):
             "feedback_score": str(score),
             "feedback_text": feedback_text,
             "feedback_sentiment": sentiment,
-            "feedback_keywords": keywords_str,
+            "feedback_keywords": "",
         })
 
+        rollup = RollupDelta()
+        rollup.add_feedback(appt.get("clinic_id", ""), appt.get("doctor_id", ""),
+                            appt.get("appointment_date", ""), score_val, sentiment)
+        apply_delta(app, rollup)
+        invalidate_patient_summary(app, appt.get("clinic_id", ""), appt.get("patient_id"))
+
         # Emit signal for real-time dashboard updates
         emit_appointment_event(app, "", "feedback_received", {
             "appointment_id": appointment_id,
@@ -450,7 +356,6 @@ def submit_feedback(app, request, appointment_id):
             "appointment_id": appointment_id,
             "score": score,
             "sentiment": sentiment,
-            "keywords": keywords,
         }, "Thank you for your feedback!")
 
     except Exception as e:
@@ -490,11 +395,7 @@ def get_prescription(app, request, prescription_id):
         )
         clinic_data = clinic_res[0][TABLE_CLINICS] if clinic_res else {}
 
-        medicines = rx["medicines"]
-        try:
-            medicines = json.loads(medicines)
-        except (json.JSONDecodeError, TypeError):
-            medicines = []
+        medicines = load_medicines(app, rx["clinic_id"], [rx])[rx["ROWID"]]
 
         return success({
             "id": rx["ROWID"],
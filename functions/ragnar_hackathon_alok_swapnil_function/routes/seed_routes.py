@@ -1,43 +1,116 @@
 import logging
 import json
+from collections import defaultdict
 from utils.constants import (
     TABLE_CLINICS, TABLE_DOCTORS, TABLE_PATIENTS,
-    TABLE_APPOINTMENTS, TABLE_PRESCRIPTIONS,
+    TABLE_APPOINTMENTS, TABLE_PRESCRIPTIONS, TABLE_PRESCRIPTION_ITEMS,
     ist_today, ist_now,
 )
 from utils.response import success, error, server_error
+from utils.phone import with_phone_key
 from services.auth_service import require_clinic
+from services.bulk_service import bulk_insert, bulk_delete
+from services.prescription_item_service import item_rows, parse_medicines_json
+from services.roster_service import invalidate_roster
+from services.patient_index_service import invalidate_patient_index
+from services.medicine_catalog_service import rebuild_medicine_catalog
+from services.rollup_service import rebuild_rollups
+from services.search_service import with_search_key
+from services.booking_service import doctor_initials
 from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
 
-def _delete_all_rows(app, table_name, clinic_id):
-    """Delete all rows for a clinic from a table."""
-    zcql = app.zcql()
-    rows = zcql.execute_query(
-        f"SELECT ROWID FROM {table_name} WHERE clinic_id = '{clinic_id}'"
+def _delete_all_rows(app, table_name, clinic_id, errors=None):
+    """Delete all rows for a clinic from a table using batched delete_rows calls."""
+    _delete_matching_rows(
+        app, table_name,
+        f"SELECT ROWID FROM {table_name} WHERE clinic_id = '{clinic_id}'",
+        errors,
     )
-    if rows:
-        table = app.datastore().table(table_name)
-        for row in rows:
-            try:
-                table.delete_row(row[table_name]["ROWID"])
-            except Exception as e:
-                logger.warning(f"Delete failed for {table_name} row: {e}")
 
 
-def _delete_all_rows_no_clinic(app, table_name):
+def _delete_all_rows_no_clinic(app, table_name, errors=None):
     """Delete all rows from a table (no clinic_id filter)."""
+    _delete_matching_rows(app, table_name, f"SELECT ROWID FROM {table_name}", errors)
+
+
+def _delete_matching_rows(app, table_name, query, errors=None):
+    """
+    Repeatedly select matching ROWIDs and bulk-delete them.
+    ZCQL caps each result set, so keep going until nothing is left or a pass
+    makes no progress.
+    """
     zcql = app.zcql()
-    rows = zcql.execute_query(f"SELECT ROWID FROM {table_name}")
-    if rows:
-        table = app.datastore().table(table_name)
-        for row in rows:
-            try:
-                table.delete_row(row[table_name]["ROWID"])
-            except Exception as e:
-                logger.warning(f"Delete failed for {table_name} row: {e}")
+    while True:
+        rows = zcql.execute_query(query)
+        if not rows:
+            return
+        row_ids = [row[table_name]["ROWID"] for row in rows]
+        deleted, batch_errors = bulk_delete(app, table_name, row_ids)
+        if errors is not None:
+            errors.extend(batch_errors)
+        if deleted == 0:
+            logger.warning(f"Delete made no progress for {table_name}, stopping")
+            return
+
+
+def _insert_required(app, table_name, rows):
+    """Bulk-insert rows whose ROWIDs are needed later; any failed batch aborts the seed."""
+    inserted, errors = bulk_insert(app, table_name, rows)
+    if errors:
+        raise RuntimeError(f"Seeding {table_name} failed: {errors[0]['error']}")
+    return [row["ROWID"] for row in inserted]
+
+
+def _make_token_allocator():
+    """
+    Allocate tokens locally while seeding. The clinic's rows were just cleared,
+    so counting per date in memory matches booking_service.next_token without a query per row.
+    """
+    counters = defaultdict(int)
+
+    def allocate(date_str, doctor_name):
+        counters[date_str] += 1
+        return f"{doctor_initials(doctor_name)}-{str(counters[date_str]).zfill(3)}"
+
+    return allocate
+
+
+def _insert_appointments_and_prescriptions(app, appt_rows, rx_rows, errors):
+    """
+    Bulk-insert collected appointments, then point each prescription at its
+    appointment's new ROWID and bulk-insert those.
+    Prescriptions carry "_appt_ref", the index of their appointment in appt_rows.
+    Returns (appointments_inserted, prescriptions_inserted).
+    """
+    inserted, appt_errors = bulk_insert(app, TABLE_APPOINTMENTS, appt_rows)
+    errors.extend(appt_errors)
+
+    resolved = []
+    for rx in rx_rows:
+        appt = inserted[rx.pop("_appt_ref")]
+        if appt is None:
+            continue
+        rx["appointment_id"] = appt["ROWID"]
+        resolved.append(rx)
+
+    rx_inserted, rx_errors = bulk_insert(app, TABLE_PRESCRIPTIONS, resolved) if resolved else ([], [])
+    errors.extend(rx_errors)
+
+    visit_dates = {appt["ROWID"]: appt["appointment_date"] for appt in inserted if appt is not None}
+    items = []
+    for rx in rx_inserted:
+        if rx is not None:
+            items.extend(item_rows(rx, parse_medicines_json(rx["medicines"]), visit_dates.get(rx["appointment_id"], "")))
+    if items:
+        errors.extend(bulk_insert(app, TABLE_PRESCRIPTION_ITEMS, items)[1])
+
+    return (
+        sum(1 for row in inserted if row is not None),
+        sum(1 for row in rx_inserted if row is not None),
+    )
 
 
 def seed_demo(app, request):
@@ -49,10 +122,12 @@ def seed_demo(app, request):
 
         # ── Step 1: Clear existing data for THIS clinic ──
         logger.info("Clearing existing data...")
-        _delete_all_rows(app, TABLE_PRESCRIPTIONS, clinic_id)
-        _delete_all_rows(app, TABLE_APPOINTMENTS, clinic_id)
-        _delete_all_rows(app, TABLE_PATIENTS, clinic_id)
-        _delete_all_rows(app, TABLE_DOCTORS, clinic_id)
+        batch_errors = []
+        _delete_all_rows(app, TABLE_PRESCRIPTION_ITEMS, clinic_id, batch_errors)
+        _delete_all_rows(app, TABLE_PRESCRIPTIONS, clinic_id, batch_errors)
+        _delete_all_rows(app, TABLE_APPOINTMENTS, clinic_id, batch_errors)
+        _delete_all_rows(app, TABLE_PATIENTS, clinic_id, batch_errors)
+        _delete_all_rows(app, TABLE_DOCTORS, clinic_id, batch_errors)
         logger.info("All existing data cleared.")
 
         today = ist_now().date()
@@ -102,13 +177,11 @@ def seed_demo(app, request):
             },
         ]
 
-        doc_table = app.datastore().table(TABLE_DOCTORS)
-        doctor_ids = []
         for doc in doctors_data:
             doc["clinic_id"] = clinic_id
-            row = doc_table.insert_row(doc)
-            doctor_ids.append(row["ROWID"])
-            logger.info(f"Doctor created: {doc['name']} -> ID {row['ROWID']}")
+        doctor_ids = _insert_required(app, TABLE_DOCTORS, doctors_data)
+        invalidate_roster(app, clinic_id)
+        logger.info(f"Doctors created: {len(doctor_ids)}")
 
         # ── Step 3: Insert Patients ──
         patients_data = [
@@ -129,22 +202,20 @@ def seed_demo(app, request):
             {"name": "Kartik Bhatt", "phone": "9111111115", "email": "kartik.b@gmail.com", "age": "12", "gender": "Male", "blood_group": "O+", "medical_history": "Tonsillitis (recurring)"},
         ]
 
-        pat_table = app.datastore().table(TABLE_PATIENTS)
-        patient_ids = []
         for pat in patients_data:
             pat["clinic_id"] = clinic_id
-            row = pat_table.insert_row(pat)
-            patient_ids.append(row["ROWID"])
-            logger.info(f"Patient created: {pat['name']} -> ID {row['ROWID']}")
+        patient_ids = _insert_required(app, TABLE_PATIENTS, [with_search_key(clinic_id, with_phone_key(p)) for p in patients_data])
+        invalidate_patient_index(app, clinic_id)
+        logger.info(f"Patients created: {len(patient_ids)}")
 
-        # ── Step 4: Insert Appointments ──
-        from routes.appointment_routes import _generate_token
-        appt_table = app.datastore().table(TABLE_APPOINTMENTS)
-        rx_table = app.datastore().table(TABLE_PRESCRIPTIONS)
+        # ── Step 4: Collect Appointments + Prescriptions, then bulk-insert ──
+        next_token = _make_token_allocator()
+        appt_rows = []
+        rx_rows = []
 
         def make_appt(doc_idx, pat_idx, date_str, time, status, feedback=None):
             doc_name = doctors_data[doc_idx]["name"]
-            token = _generate_token(app, clinic_id, date_str, doc_name)
+            token = next_token(date_str, doc_name)
             row_data = {
                 "clinic_id": clinic_id,
                 "doctor_id": doctor_ids[doc_idx],
@@ -164,13 +235,13 @@ def seed_demo(app, request):
                 row_data["feedback_text"] = feedback.get("text", "")
                 row_data["feedback_sentiment"] = feedback.get("sentiment", "")
                 row_data["feedback_keywords"] = feedback.get("keywords", "")
-            row = appt_table.insert_row(row_data)
-            return row["ROWID"]
+            appt_rows.append(row_data)
+            return len(appt_rows) - 1
 
-        def make_rx(appt_id, doc_idx, pat_idx, diagnosis, medicines, advice, follow_up=""):
-            rx_table.insert_row({
+        def make_rx(appt_ref, doc_idx, pat_idx, diagnosis, medicines, advice, follow_up=""):
+            rx_rows.append({
+                "_appt_ref": appt_ref,
                 "clinic_id": clinic_id,
-                "appointment_id": appt_id,
                 "doctor_id": doctor_ids[doc_idx],
                 "patient_id": patient_ids[pat_idx],
                 "diagnosis": diagnosis,
@@ -378,12 +449,19 @@ def seed_demo(app, request):
         make_appt(3, 5, d7, "16:00", "completed",
             {"score": 4, "text": "Skin treatment working well. Happy with results.", "sentiment": "positive", "keywords": "skin,treatment,working,happy"})
 
+        appt_count, rx_count = _insert_appointments_and_prescriptions(app, appt_rows, rx_rows, batch_errors)
+        rebuild_medicine_catalog(app, clinic_id)
+        rebuild_rollups(app, clinic_id)
+
         logger.info("Demo data seeded successfully!")
 
         return success({
             "message": "Demo data seeded successfully!",
             "doctors": len(doctor_ids),
             "patients": len(patient_ids),
+            "appointments": appt_count,
+            "prescriptions": rx_count,
+            "batch_errors": batch_errors,
             "summary": {
                 "today": "17 appointments (5 completed, 2 in-consultation, 3 in-queue, 4 booked, 2 cancelled, 1 no-show)",
                 "day_1": "8 appointments (7 completed, 1 no-show)",
@@ -414,10 +492,6 @@ def seed_multi_tenant(app, request):
     try:
         zcql = app.zcql()
         clinic_table = app.datastore().table(TABLE_CLINICS)
-        doc_table = app.datastore().table(TABLE_DOCTORS)
-        pat_table = app.datastore().table(TABLE_PATIENTS)
-        appt_table = app.datastore().table(TABLE_APPOINTMENTS)
-        rx_table = app.datastore().table(TABLE_PRESCRIPTIONS)
 
         today = ist_now().date()
         today_str = today.isoformat()
@@ -492,6 +566,7 @@ def seed_multi_tenant(app, request):
         ]
 
         results = []
+        batch_errors = []
 
         for clinic_info in clinics_data:
             # Check if clinic slug already exists
@@ -501,10 +576,11 @@ def seed_multi_tenant(app, request):
             if existing and len(existing) > 0:
                 cid = existing[0][TABLE_CLINICS]["ROWID"]
                 # Clear existing data
-                _delete_all_rows(app, TABLE_PRESCRIPTIONS, cid)
-                _delete_all_rows(app, TABLE_APPOINTMENTS, cid)
-                _delete_all_rows(app, TABLE_PATIENTS, cid)
-                _delete_all_rows(app, TABLE_DOCTORS, cid)
+                _delete_all_rows(app, TABLE_PRESCRIPTION_ITEMS, cid, batch_errors)
+                _delete_all_rows(app, TABLE_PRESCRIPTIONS, cid, batch_errors)
+                _delete_all_rows(app, TABLE_APPOINTMENTS, cid, batch_errors)
+                _delete_all_rows(app, TABLE_PATIENTS, cid, batch_errors)
+                _delete_all_rows(app, TABLE_DOCTORS, cid, batch_errors)
             else:
                 # Create new clinic
                 row = clinic_table.insert_row({
@@ -519,27 +595,27 @@ def seed_multi_tenant(app, request):
                 cid = row["ROWID"]
 
             # Insert doctors
-            doctor_ids = []
             doctors = clinic_info["doctors"]
             for doc in doctors:
                 doc["clinic_id"] = cid
-                row = doc_table.insert_row(doc)
-                doctor_ids.append(row["ROWID"])
+            doctor_ids = _insert_required(app, TABLE_DOCTORS, doctors)
+            invalidate_roster(app, cid)
 
             # Insert patients
-            patient_ids = []
             patients = clinic_info["patients"]
             for pat in patients:
                 pat["clinic_id"] = cid
-                row = pat_table.insert_row(pat)
-                patient_ids.append(row["ROWID"])
+            patient_ids = _insert_required(app, TABLE_PATIENTS, [with_search_key(cid, with_phone_key(p)) for p in patients])
+            invalidate_patient_index(app, cid)
 
-            # Helper to generate tokens
-            from routes.appointment_routes import _generate_token
+            # Appointments and prescriptions are collected, then bulk-inserted
+            next_token = _make_token_allocator()
+            appt_rows = []
+            rx_rows = []
 
             def _make_appt(doc_idx, pat_idx, date_str, time, status, feedback=None):
                 doc_name = doctors[doc_idx]["name"]
-                token = _generate_token(app, cid, date_str, doc_name)
+                token = next_token(date_str, doc_name)
                 row_data = {
                     "clinic_id": cid,
                     "doctor_id": doctor_ids[doc_idx],
@@ -559,13 +635,13 @@ def seed_multi_tenant(app, request):
                     row_data["feedback_text"] = feedback.get("text", "")
                     row_data["feedback_sentiment"] = feedback.get("sentiment", "")
                     row_data["feedback_keywords"] = feedback.get("keywords", "")
-                row = appt_table.insert_row(row_data)
-                return row["ROWID"]
+                appt_rows.append(row_data)
+                return len(appt_rows) - 1
 
-            def _make_rx(appt_id, doc_idx, pat_idx, diagnosis, medicines, advice, follow_up=""):
-                rx_table.insert_row({
+            def _make_rx(appt_ref, doc_idx, pat_idx, diagnosis, medicines, advice, follow_up=""):
+                rx_rows.append({
+                    "_appt_ref": appt_ref,
                     "clinic_id": cid,
-                    "appointment_id": appt_id,
                     "doctor_id": doctor_ids[doc_idx],
                     "patient_id": patient_ids[pat_idx],
                     "diagnosis": diagnosis,
@@ -613,12 +689,18 @@ def seed_multi_tenant(app, request):
                     _make_appt(i, pat, d, f"{9+i}:30", "completed",
                         {"score": score, "text": f"Visit went well. Rating {score}/5.", "sentiment": "positive" if score >= 4 else "neutral", "keywords": "visit,well"})
 
+            appt_count, rx_count = _insert_appointments_and_prescriptions(app, appt_rows, rx_rows, batch_errors)
+            rebuild_medicine_catalog(app, cid)
+            rebuild_rollups(app, cid)
+
             results.append({
                 "clinic": clinic_info["name"],
                 "slug": clinic_info["slug"],
                 "clinic_id": cid,
                 "doctors": len(doctor_ids),
                 "patients": len(patient_ids),
+                "appointments": appt_count,
+                "prescriptions": rx_count,
             })
 
             logger.info(f"Multi-tenant seed done for: {clinic_info['name']}")
@@ -627,6 +709,7 @@ def seed_multi_tenant(app, request):
             "message": "Multi-tenant demo data seeded successfully!",
             "clinics": results,
             "total_clinics": len(results),
+            "batch_errors": batch_errors,
         })
 
     except Exception as e:
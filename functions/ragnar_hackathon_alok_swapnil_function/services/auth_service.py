@@ -3,6 +3,9 @@ from utils.constants import TABLE_CLINICS
 
 logger = logging.getLogger(__name__)
 
+# Catalyst role of the project's own administrators (not clinic admins)
+APP_ADMIN_ROLE = "App Administrator"
+
 
 def get_current_user(app):
     """Get the currently authenticated Catalyst user."""
@@ -50,6 +53,18 @@ def get_clinic_id(app, request=None):
         return None, user
 
 
+def require_app_admin(app):
+    """
+    The current user if they are an App Administrator of the Catalyst
+    project (platform-wide tools such as batch job progress), else None.
+    """
+    user = get_current_user(app)
+    if not user:
+        return None
+    role = (user.get("role_details") or {}).get("role_name", "")
+    return user if role == APP_ADMIN_ROLE else None
+
+
 def require_clinic(app, request=None):
     """
     Get clinic_id or return None. Use this in routes that require
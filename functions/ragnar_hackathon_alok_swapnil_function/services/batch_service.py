@@ -0,0 +1,310 @@
+import hmac
+import json
+import logging
+import time
+import uuid
+from urllib.parse import urlencode
+from utils.constants import TABLE_JOB_RUNS, ist_now
+from services.bulk_service import ZCQL_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Rows fetched and processed per chunk (one ZCQL page)
+DEFAULT_CHUNK_SIZE = 200
+# Work done by one invocation before it checkpoints and hands over to the next;
+# kept well inside the function timeout
+SLICE_SECONDS = 20
+# A run claimed by an invocation that stopped renewing this long ago may be taken over
+LEASE_SECONDS = 60
+# An unfinished run untouched this long (failed chunk, lost continuation) is
+# re-submitted by the next invocation of its job
+STALE_RUN_SECONDS = 600
+# A chunk that fails this many invocations in a row marks the run failed
+MAX_CHUNK_ATTEMPTS = 3
+# Job pool the continuation of an unfinished run is submitted to
+BATCH_JOB_POOL = "caredesk_batch"
+
+RUN_COLUMNS = [
+    "job_name", "run_key", "status", "last_row_id", "processed", "chunks", "invocations",
+    "stats", "last_error", "error_count", "lease_owner", "lease_until", "started_at", "finished_at",
+    "resume_token",
+]
+
+
+class BatchJob:
+    """
+    A job that walks the rows of `table` in ROWID order, `chunk_size` at a time.
+
+    `select` is the SELECT ... FROM ... [JOIN ...] part of the query,
+    `where(run_key)` the condition for one run (None walks every row), and
+    `process(app, rows, run_key)` handles one chunk and returns counters
+    ({"sent": 3}) that are summed into the run's stats. The optional
+    `finish(app, run_key, stats)` runs once after the last chunk, for work
+    done per run rather than per row.
+    """
+
+    def __init__(self, name, table, select, where, process, chunk_size=DEFAULT_CHUNK_SIZE, finish=None):
+        self.name = name
+        self.table = table
+        self.select = select
+        self.where = where
+        self.process = process
+        self.finish = finish
+        self.chunk_size = min(chunk_size, ZCQL_PAGE_SIZE)
+
+    def fetch(self, app, run_key, after_id):
+        where = self.where(run_key) if self.where else ""
+        condition = f"({where}) AND " if where else ""
+        return app.zcql().execute_query(
+            f"{self.select} WHERE {condition}{self.table}.ROWID > '{after_id}' "
+            f"ORDER BY {self.table}.ROWID ASC LIMIT {self.chunk_size}"
+        ) or []
+
+
+def _add_counts(stats, counts):
+    """Sum a chunk's counters into the run stats. Nested dicts ({"by_clinic": {...}}) sum per key."""
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            stats[key] = _add_counts(dict(stats.get(key) or {}), value)
+        else:
+            stats[key] = stats.get(key, 0) + value
+    return stats
+
+
+def _now_text():
+    return ist_now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _to_run(row):
+    run = {column: row.get(column, "") for column in RUN_COLUMNS}
+    run["ROWID"] = row["ROWID"]
+    for column in ("processed", "chunks", "invocations", "error_count"):
+        run[column] = int(run[column] or 0)
+    try:
+        run["stats"] = json.loads(run["stats"] or "{}")
+    except (json.JSONDecodeError, TypeError):
+        run["stats"] = {}
+    return run
+
+
+def _save(app, run, **changes):
+    run.update(changes)
+    row = {column: changes[column] for column in changes}
+    if "stats" in row:
+        row["stats"] = json.dumps(row["stats"])
+    for column in ("processed", "chunks", "invocations", "error_count", "lease_until"):
+        if column in row:
+            row[column] = str(row[column])
+    row["ROWID"] = run["ROWID"]
+    app.datastore().table(TABLE_JOB_RUNS).update_row(row)
+
+
+def _load_run(app, job_name, run_key):
+    rows = app.zcql().execute_query(
+        f"SELECT ROWID, {', '.join(RUN_COLUMNS)} FROM {TABLE_JOB_RUNS} "
+        f"WHERE job_name = '{job_name}' AND run_key = '{run_key}'"
+    )
+    return _to_run(rows[0][TABLE_JOB_RUNS]) if rows else None
+
+
+def _start_run(app, job_name, run_key):
+    row = app.datastore().table(TABLE_JOB_RUNS).insert_row({
+        "job_name": job_name, "run_key": run_key, "status": JOB_RUNNING, "last_row_id": "0",
+        "processed": "0", "chunks": "0", "invocations": "0", "stats": "{}", "last_error": "",
+        "error_count": "0", "lease_owner": "", "lease_until": "0",
+        "started_at": _now_text(), "finished_at": "", "resume_token": uuid.uuid4().hex,
+    })
+    return _to_run(row)
+
+
+def _summary(run, **extra):
+    return {
+        "run_id": run["ROWID"],
+        "job": run["job_name"],
+        "run_key": run["run_key"],
+        "status": run["status"],
+        "processed": run["processed"],
+        "chunks": run["chunks"],
+        "invocations": run["invocations"],
+        "stats": run["stats"],
+        "last_error": run["last_error"],
+        "started_at": run["started_at"],
+        "finished_at": run["finished_at"],
+        **extra,
+    }
+
+
+def _claim(app, run, owner):
+    """
+    Take the run's lease for this invocation. The Data Store has no
+    compare-and-set: the lease is checked on a fresh read just before
+    writing and read back after, which keeps out a claimer that arrives
+    later but not one racing within the same round trip. Jobs therefore
+    keep their chunks safe to process twice (no-show updates are
+    idempotent, mails are recorded in NotificationLog and skipped once sent).
+    """
+    current = _load_run(app, run["job_name"], run["run_key"])
+    if current is None or current["status"] != JOB_RUNNING:
+        return False
+    if current["lease_owner"] and float(current["lease_until"] or 0) > time.time():
+        return False
+    run.update(current)
+    _save(app, run, lease_owner=owner, lease_until=int(time.time() + LEASE_SECONDS),
+          invocations=run["invocations"] + 1)
+    current = _load_run(app, run["job_name"], run["run_key"])
+    return current is not None and current["lease_owner"] == owner
+
+
+def resumed_run_key(app, job, run_key, token):
+    """
+    `run_key` if `token` is the resume token of that unfinished run of `job`
+    (continuation URLs carry both), else None. Lets a handler take the run
+    key from a continuation without letting any caller choose it.
+    """
+    if not run_key or not token:
+        return None
+    run = _load_run(app, job.name, run_key)
+    if run is None or run["status"] != JOB_RUNNING or not run["resume_token"]:
+        return None
+    return run_key if hmac.compare_digest(run["resume_token"], token) else None
+
+
+def _enqueue_continuation(app, job, run, continue_url):
+    """Submit the next slice of an unfinished run to the job pool. Returns True if submitted."""
+    if not continue_url:
+        return False
+    query = urlencode({"run_key": run["run_key"], "resume_token": run["resume_token"]})
+    try:
+        app.job_scheduling().JOB.submit_job({
+            "job_name": f"{job.name}_{run['run_key']}_{run['invocations']}_{uuid.uuid4().hex[:6]}"
+                        .replace("-", "_").replace("+", "_"),
+            "jobpool_name": BATCH_JOB_POOL,
+            "target_type": "Webhook",
+            "request_method": "GET",
+            "url": f"{continue_url}?{query}",
+        })
+        return True
+    except Exception as e:
+        # A later invocation of the job re-submits it (see _resubmit_stale_runs)
+        logger.warning(f"Failed to enqueue continuation of {job.name} {run['run_key']}: {e}")
+        return False
+
+
+def _resubmit_stale_runs(app, job, run_key, continue_url):
+    """
+    Re-submit the continuation of every other unfinished run of `job` that
+    nobody has touched for STALE_RUN_SECONDS: one whose continuation could not
+    be submitted or whose retry was lost. Runs are keyed by date, so without
+    this a day left unfinished would never be picked up again.
+    """
+    rows = app.zcql().execute_query(
+        f"SELECT ROWID, {', '.join(RUN_COLUMNS)} FROM {TABLE_JOB_RUNS} "
+        f"WHERE job_name = '{job.name}' AND status = '{JOB_RUNNING}' ORDER BY ROWID ASC"
+    ) or []
+    cutoff = time.time() - STALE_RUN_SECONDS
+    for row in rows:
+        run = _to_run(row[TABLE_JOB_RUNS])
+        if run["run_key"] != run_key and float(run["lease_until"] or 0) < cutoff:
+            logger.warning(f"Re-submitting stale run {job.name} {run['run_key']}")
+            _enqueue_continuation(app, job, run, continue_url)
+
+
+def run_batch_job(app, job, run_key, continue_url=None, slice_seconds=SLICE_SECONDS):
+    """
+    Advance one run of `job` (identified by run_key, e.g. the date it covers)
+    by at most `slice_seconds` of work. Every chunk is checkpointed in JobRuns
+    (last ROWID, counters) before the next is fetched, so a timeout or crash
+    loses at most the chunk in flight. An unfinished run re-enqueues itself
+    at `continue_url` with its run_key and resume token in the query string
+    (see resumed_run_key), and so does a run whose chunk failed, until
+    MAX_CHUNK_ATTEMPTS failures in a row mark it failed. Each invocation
+    also re-submits other runs of the job left unfinished (see
+    _resubmit_stale_runs). A finished run is a no-op when invoked again.
+    Returns the run summary.
+    """
+    if continue_url:
+        try:
+            _resubmit_stale_runs(app, job, run_key, continue_url)
+        except Exception as e:
+            logger.warning(f"Stale run check for {job.name} failed: {e}")
+
+    run = _load_run(app, job.name, run_key) or _start_run(app, job.name, run_key)
+    if run["status"] != JOB_RUNNING:
+        return _summary(run, continued=False)
+
+    owner = uuid.uuid4().hex[:12]
+    if not _claim(app, run, owner):
+        logger.info(f"{job.name} {run_key} is held by another invocation")
+        return _summary(run, continued=False, busy=True)
+
+    deadline = time.monotonic() + slice_seconds
+    while True:
+        try:
+            rows = job.fetch(app, run_key, run["last_row_id"])
+            counts = job.process(app, rows, run_key) if rows else {}
+        except Exception as e:
+            error_count = run["error_count"] + 1
+            status = JOB_FAILED if error_count >= MAX_CHUNK_ATTEMPTS else JOB_RUNNING
+            logger.error(f"{job.name} {run_key} chunk after {run['last_row_id']} failed: {e}")
+            # lease_until records when the run was released, for _resubmit_stale_runs
+            _save(app, run, status=status, last_error=str(e)[:250], error_count=error_count,
+                  lease_owner="", lease_until=int(time.time()))
+            # Retry the chunk from its checkpoint in a fresh invocation
+            continued = status == JOB_RUNNING and _enqueue_continuation(app, job, run, continue_url)
+            return _summary(run, continued=continued)
+
+        stats = _add_counts(dict(run["stats"]), counts or {})
+        changes = {
+            "processed": run["processed"] + len(rows),
+            "chunks": run["chunks"] + (1 if rows else 0),
+            "stats": stats,
+            "error_count": 0,
+            "lease_until": int(time.time() + LEASE_SECONDS),
+        }
+        if rows:
+            changes["last_row_id"] = rows[-1][job.table]["ROWID"]
+
+        if len(rows) < job.chunk_size:
+            if job.finish:
+                try:
+                    job.finish(app, run_key, stats)
+                except Exception as e:
+                    # Every row is processed; the run still completes
+                    logger.error(f"{job.name} {run_key} finish step failed: {e}")
+                    changes["last_error"] = f"finish: {e}"[:250]
+            changes.update(lease_owner="", lease_until=0)
+            _save(app, run, status=JOB_DONE, finished_at=_now_text(), **changes)
+            logger.info(f"{job.name} {run_key} finished: {run['processed']} row(s), {stats}")
+            return _summary(run, continued=False)
+
+        if time.monotonic() >= deadline:
+            # Release the lease with the checkpoint so the continuation can claim it
+            changes.update(lease_owner="", lease_until=int(time.time()))
+            _save(app, run, **changes)
+            continued = _enqueue_continuation(app, job, run, continue_url)
+            logger.info(f"{job.name} {run_key} paused after {run['processed']} row(s)")
+            return _summary(run, continued=continued)
+
+        _save(app, run, **changes)
+
+
+def list_runs(app, job_name=None, limit=20):
+    """Most recent JobRuns, newest first, optionally for one job."""
+    where = f"WHERE job_name = '{job_name}' " if job_name else ""
+    rows = app.zcql().execute_query(
+        f"SELECT ROWID, {', '.join(RUN_COLUMNS)} FROM {TABLE_JOB_RUNS} {where}"
+        f"ORDER BY ROWID DESC LIMIT {limit}"
+    )
+    return [_summary(_to_run(row[TABLE_JOB_RUNS])) for row in (rows or [])]
+
+
+def get_run(app, run_id):
+    """One JobRuns entry by ROWID, or None."""
+    rows = app.zcql().execute_query(
+        f"SELECT ROWID, {', '.join(RUN_COLUMNS)} FROM {TABLE_JOB_RUNS} WHERE ROWID = '{run_id}'"
+    )
+    return _summary(_to_run(rows[0][TABLE_JOB_RUNS])) if rows else None
@@ -0,0 +1,272 @@
+import logging
+from utils.constants import (
+    TABLE_APPOINTMENTS, TABLE_PATIENTS, STATUS_BOOKED, STATUS_CANCELLED,
+    ist_today, ist_time_now,
+)
+from utils.parallel import run_parallel
+from utils.phone import phone_key, phone_match, with_phone_key
+from services.bulk_service import iter_rows
+from services.roster_service import get_doctor
+from services.patient_index_service import record_patient
+from services.patient_summary_service import invalidate_patient_summary
+from services.search_service import with_search_key
+from services.mail_service import send_appointment_confirmation
+from services.sms_service import send_booking_sms
+from services.signals_service import emit_appointment_event
+
+logger = logging.getLogger(__name__)
+
+# Round trips one booking may make, assuming warm caches (clinic profile and
+# doctor roster) and at most ZCQL_PAGE_SIZE (300) appointments that day:
+# ZCQL — the day's appointments and the patient lookup, issued together;
+# Data Store — the appointment insert, plus the patient insert for new patients.
+# A busier day pages, costing 1 + ceil(n / 300) ZCQL calls, and a cold cache
+# adds its reload. The day is read whole because tokens carry per-doctor
+# prefixes (AS-004, VM-012), so the highest number cannot come from an
+# ORDER BY token_number query.
+BOOKING_ZCQL_BUDGET = 2
+BOOKING_DATASTORE_BUDGET = 2
+
+
+class BookingError(ValueError):
+    """A booking request that fails validation; the message is shown to the user."""
+
+
+def doctor_initials(doctor_name):
+    """Get initials from doctor name. 'Alok Shukla' -> 'AS'."""
+    parts = doctor_name.strip().split()
+    if len(parts) >= 2:
+        return (parts[0][0] + parts[-1][0]).upper()
+    if parts:
+        return parts[0][:2].upper()
+    return "DR"
+
+
+def next_token(day_rows, doctor_name=""):
+    """Next token for a clinic-day, given that day's appointment rows."""
+    prefix = doctor_initials(doctor_name) if doctor_name else "T"
+    max_num = 0
+    for a in day_rows:
+        try:
+            num = int(a.get("token_number", "").split("-")[1])
+            if num > max_num:
+                max_num = num
+        except (IndexError, ValueError):
+            pass
+    return f"{prefix}-{str(max_num + 1).zfill(3)}"
+
+
+def build_context(clinic, doctor, patient, appointment_date, appointment_time, notes=""):
+    """
+    Everything a booking needs from validation through insert to notification.
+    `clinic`, `doctor` and `patient` are the rows already loaded by the caller;
+    the patient must carry ROWID, name, phone and email.
+    """
+    return {
+        "clinic": clinic,
+        "doctor": doctor,
+        "patient": patient,
+        "appointment_date": appointment_date,
+        "appointment_time": appointment_time,
+        "notes": notes,
+    }
+
+
+def validate_schedule(appointment_date, appointment_time):
+    """Check the requested slot is present and not in the past. Returns an error message or None."""
+    if not appointment_time:
+        return "Appointment time is required. Please select a time slot."
+
+    today_str = ist_today()
+    if appointment_date < today_str:
+        return "Cannot book appointment for a past date. Please select today or a future date."
+
+    if appointment_date == today_str and appointment_time <= ist_time_now():
+        return "Selected time has already passed. Please choose a later time for today's appointment."
+    return None
+
+
+def validate_doctor(doctor, appointment_time):
+    """Check the doctor exists, is active and works at the requested time. Returns an error message or None."""
+    if not doctor:
+        return "Doctor not found in this clinic."
+    name = doctor.get("name", "")
+    if doctor.get("status") == "inactive":
+        return f"Dr. {name} is currently unavailable. Please choose another doctor."
+
+    avail_from = doctor.get("available_from", "")
+    avail_to = doctor.get("available_to", "")
+    if avail_from and avail_to and appointment_time:
+        if appointment_time < avail_from or appointment_time > avail_to:
+            return (
+                f"Dr. {name} is available only from {avail_from} to {avail_to}. "
+                f"Please select a time within these hours."
+            )
+    return None
+
+
+def _day_appointments(app, clinic_id, appointment_date):
+    """Every appointment of the clinic on the date — feeds both conflict detection and the token."""
+    return [
+        row[TABLE_APPOINTMENTS]
+        for row in iter_rows(
+            app, TABLE_APPOINTMENTS, "doctor_id, appointment_time, status, token_number",
+            f"clinic_id = '{clinic_id}' AND appointment_date = '{appointment_date}'",
+        )
+    ]
+
+
+def _find_patient(app, clinic_id, patient_id=None, phone=None):
+    where = f"ROWID = '{patient_id}'" if patient_id else phone_match(phone)
+    result = app.zcql().execute_query(
+        f"SELECT ROWID, name, email, phone FROM {TABLE_PATIENTS} "
+        f"WHERE {where} AND clinic_id = '{clinic_id}'"
+    )
+    if result and len(result) > 0:
+        return result[0][TABLE_PATIENTS]
+    return None
+
+
+def _has_conflict(day_rows, doctor_id, appointment_time):
+    return any(
+        a.get("doctor_id") == str(doctor_id)
+        and a.get("appointment_time") == appointment_time
+        and a.get("status") != STATUS_CANCELLED
+        for a in day_rows
+    )
+
+
+def insert_appointment(app, ctx, token):
+    """Insert the booked appointment described by the context."""
+    return app.datastore().table(TABLE_APPOINTMENTS).insert_row({
+        "clinic_id": ctx["clinic"]["ROWID"],
+        "doctor_id": ctx["doctor"]["ROWID"],
+        "patient_id": str(ctx["patient"]["ROWID"]),
+        "appointment_date": ctx["appointment_date"],
+        "appointment_time": ctx["appointment_time"],
+        "status": STATUS_BOOKED,
+        "token_number": token,
+        "notes": ctx["notes"],
+        "feedback_score": "",
+        "feedback_text": "",
+        "feedback_sentiment": "",
+    })
+
+
+def _send_email(app, ctx, token):
+    patient = ctx["patient"]
+    if not patient.get("email"):
+        return False
+    return send_appointment_confirmation(
+        app,
+        patient_email=patient["email"],
+        patient_name=patient.get("name", ""),
+        doctor_name=ctx["doctor"].get("name", ""),
+        clinic_name=ctx["clinic"].get("name", "") or "CareDesk",
+        appointment_date=ctx["appointment_date"],
+        appointment_time=ctx["appointment_time"],
+        token_number=token,
+        clinic_id=ctx["clinic"].get("ROWID"),
+    )
+
+
+def _send_sms(ctx, token):
+    patient = ctx["patient"]
+    if not patient.get("phone"):
+        return False
+    return send_booking_sms(
+        patient["phone"], patient.get("name", ""), ctx["doctor"].get("name", ""), token,
+        ctx["appointment_time"], ctx["appointment_date"], ctx["clinic"].get("name", "") or "CareDesk",
+    )
+
+
+def send_booking_notifications(app, ctx, token, appointment_id=None):
+    """
+    Send the confirmation email and SMS and emit the booking signal
+    concurrently, from the context alone. Failures are logged, never raised.
+    """
+    clinic_id = ctx["clinic"]["ROWID"]
+
+    def guarded(name, fn):
+        def run():
+            try:
+                return fn()
+            except Exception as e:
+                logger.warning(f"Booking {name} failed (non-critical): {e}")
+                return False
+        return run
+
+    tasks = {
+        "mail": guarded("mail", lambda: _send_email(app, ctx, token)),
+        "sms": guarded("SMS", lambda: _send_sms(ctx, token)),
+    }
+    if appointment_id:
+        tasks["signal"] = guarded("signal", lambda: emit_appointment_event(app, clinic_id, "booked", {
+            "appointment_id": appointment_id,
+            "token_number": token,
+        }))
+    return run_parallel(tasks)
+
+
+def book_appointment(app, clinic, doctor_id, appointment_date, appointment_time,
+                     patient_id=None, new_patient=None, notes=""):
+    """
+    Validate and book one appointment.
+
+    Either `patient_id` (an existing patient of the clinic) or `new_patient`
+    (name, phone, email, age, gender — matched by phone, created if missing)
+    must be given. `clinic` is the clinic profile.
+    Raises BookingError with a user-facing message when validation fails.
+    Returns (appointment_row, context, token).
+    """
+    clinic_id = clinic["ROWID"]
+
+    schedule_err = validate_schedule(appointment_date, appointment_time)
+    if schedule_err:
+        raise BookingError(schedule_err)
+
+    # Doctor comes from the cached roster; validate before touching the Data Store
+    doctor = get_doctor(app, clinic_id, doctor_id)
+    doctor_err = validate_doctor(doctor, appointment_time)
+    if doctor_err:
+        raise BookingError(doctor_err)
+
+    phone = (new_patient or {}).get("phone", "")
+    if not patient_id and not phone_key(phone):
+        raise BookingError("Please enter a valid phone number")
+    lookups = run_parallel({
+        "day": lambda: _day_appointments(app, clinic_id, appointment_date),
+        "patient": lambda: _find_patient(app, clinic_id, patient_id=patient_id, phone=phone),
+    })
+
+    if _has_conflict(lookups["day"], doctor["ROWID"], appointment_time):
+        raise BookingError("This time slot is already booked. Please choose a different time.")
+
+    patient = lookups["patient"]
+    if patient_id:
+        if not patient:
+            raise BookingError("Patient not found in this clinic")
+    elif patient:
+        # Contact details given with this booking win for its notifications
+        patient = dict(patient, name=new_patient["name"], phone=phone,
+                       email=new_patient.get("email") or patient.get("email", ""))
+    else:
+        patient = app.datastore().table(TABLE_PATIENTS).insert_row(with_search_key(clinic_id, with_phone_key({
+            "clinic_id": clinic_id,
+            "name": new_patient["name"],
+            "phone": phone,
+            "email": new_patient.get("email", ""),
+            "age": new_patient.get("age", ""),
+            "gender": new_patient.get("gender", ""),
+            "blood_group": "",
+            "medical_history": "",
+        })))
+        record_patient(app, clinic_id, patient)
+
+    ctx = build_context(clinic, doctor, patient, appointment_date, appointment_time, notes)
+    token = next_token(lookups["day"], doctor.get("name", ""))
+    row = insert_appointment(app, ctx, token)
+    invalidate_patient_summary(app, clinic_id, patient["ROWID"])
+
+    send_booking_notifications(app, ctx, token, appointment_id=row["ROWID"])
+    return row, ctx, token
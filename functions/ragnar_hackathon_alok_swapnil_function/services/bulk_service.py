@@ -0,0 +1,128 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Data Store accepts at most 200 rows per insert_rows / update_rows / delete_rows call
+BATCH_SIZE = 200
+MAX_PARALLEL_BATCHES = 4
+
+# ZCQL returns at most 300 rows per query
+ZCQL_PAGE_SIZE = 300
+
+
+def _chunks(items, size):
+    """Split a list into consecutive slices of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _run_batches(app, table_name, batches, operation, max_workers):
+    """
+    Run `operation(table, batch)` for every batch with bounded parallelism.
+    Returns a list of (result, error_message) tuples in batch order.
+    """
+    def run(batch):
+        try:
+            table = app.datastore().table(table_name)
+            return operation(table, batch), None
+        except Exception as e:
+            return None, str(e)
+
+    if len(batches) <= 1 or max_workers <= 1:
+        return [run(batch) for batch in batches]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+        return list(pool.map(run, batches))
+
+
+def _write_rows(app, table_name, rows, operation, batch_size, max_workers):
+    """Shared insert/update path. Returns (rows aligned with input, batch errors)."""
+    batches = _chunks(list(rows), batch_size)
+    results = _run_batches(app, table_name, batches, operation, max_workers)
+
+    written = []
+    errors = []
+    for index, (batch, (data, err)) in enumerate(zip(batches, results)):
+        if err is None and data is not None and len(data) == len(batch):
+            written.extend(data)
+            continue
+        written.extend([None] * len(batch))
+        message = err or f"expected {len(batch)} rows, got {len(data or [])}"
+        errors.append({
+            "table": table_name,
+            "batch": index,
+            "start": index * batch_size,
+            "count": len(batch),
+            "error": message,
+        })
+        logger.warning(f"Bulk write failed for {table_name} batch {index}: {message}")
+
+    return written, errors
+
+
+def bulk_insert(app, table_name, rows, batch_size=BATCH_SIZE, max_workers=MAX_PARALLEL_BATCHES):
+    """
+    Insert rows with multi-row insert_rows calls.
+    Returns (inserted, errors): `inserted` is aligned with `rows` and holds the
+    created row (with ROWID) or None if its batch failed; `errors` has one
+    entry per failed batch.
+    """
+    return _write_rows(app, table_name, rows, lambda table, batch: table.insert_rows(batch),
+                       batch_size, max_workers)
+
+
+def bulk_update(app, table_name, rows, batch_size=BATCH_SIZE, max_workers=MAX_PARALLEL_BATCHES):
+    """Update rows (each must carry ROWID) with multi-row update_rows calls. Same return shape as bulk_insert."""
+    return _write_rows(app, table_name, rows, lambda table, batch: table.update_rows(batch),
+                       batch_size, max_workers)
+
+
+def bulk_delete(app, table_name, row_ids, batch_size=BATCH_SIZE, max_workers=MAX_PARALLEL_BATCHES):
+    """
+    Delete rows by ROWID with multi-row delete_rows calls.
+    Returns (deleted_count, errors).
+    """
+    batches = _chunks([str(rid) for rid in row_ids], batch_size)
+    results = _run_batches(app, table_name, batches,
+                           lambda table, batch: table.delete_rows(batch), max_workers)
+
+    deleted = 0
+    errors = []
+    for index, (batch, (ok, err)) in enumerate(zip(batches, results)):
+        if err is None and ok:
+            deleted += len(batch)
+            continue
+        message = err or "delete_rows returned false"
+        errors.append({
+            "table": table_name,
+            "batch": index,
+            "start": index * batch_size,
+            "count": len(batch),
+            "error": message,
+        })
+        logger.warning(f"Bulk delete failed for {table_name} batch {index}: {message}")
+
+    return deleted, errors
+
+
+def iter_rows(app, table_name, columns, where="", page_size=ZCQL_PAGE_SIZE):
+    """
+    Yield every matching row of a table, paging through ZCQL by ROWID.
+    `columns` is the select list (ROWID is always added); `where` is an
+    optional condition without the WHERE keyword.
+    """
+    zcql = app.zcql()
+    last_id = "0"
+    condition = f"({where}) AND " if where else ""
+    while True:
+        rows = zcql.execute_query(
+            f"SELECT {table_name}.ROWID, {columns} FROM {table_name} "
+            f"WHERE {condition}{table_name}.ROWID > '{last_id}' "
+            f"ORDER BY {table_name}.ROWID ASC LIMIT {page_size}"
+        )
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1][table_name]["ROWID"]
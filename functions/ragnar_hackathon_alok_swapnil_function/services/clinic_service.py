@@ -0,0 +1,72 @@
+import json
+import logging
+from utils.constants import TABLE_CLINICS
+from services.cache_service import get_cache_segment
+
+logger = logging.getLogger(__name__)
+
+CLINIC_CACHE_PREFIX = "clinic_"
+CLINIC_SLUG_CACHE_PREFIX = "clinic_slug_"
+CLINIC_CACHE_HOURS = 48
+
+CLINIC_FIELDS = ["ROWID", "name", "slug", "address", "phone", "email", "logo_url", "logo_thumbnail_url"]
+
+
+def _cache_get(app, key):
+    try:
+        result = get_cache_segment(app).get(key)
+        if result and result.get("cache_value"):
+            return result["cache_value"]
+    except Exception as e:
+        logger.error(f"Failed to read clinic cache {key}: {e}")
+    return None
+
+
+def _cache_put(app, key, value):
+    try:
+        get_cache_segment(app).put(key, value, CLINIC_CACHE_HOURS)
+    except Exception as e:
+        logger.error(f"Failed to write clinic cache {key}: {e}")
+
+
+def _load_clinic(app, where):
+    result = app.zcql().execute_query(
+        f"SELECT {', '.join(CLINIC_FIELDS)} FROM {TABLE_CLINICS} WHERE {where}"
+    )
+    if result and len(result) > 0:
+        row = result[0][TABLE_CLINICS]
+        return {field: row.get(field, "") or "" for field in CLINIC_FIELDS}
+    return None
+
+
+def get_clinic_profile(app, clinic_id):
+    """Clinic name, slug, contact details and logo, served from cache. None if not found."""
+    cached = _cache_get(app, f"{CLINIC_CACHE_PREFIX}{clinic_id}")
+    if cached:
+        return json.loads(cached)
+    clinic = _load_clinic(app, f"ROWID = '{clinic_id}'")
+    if clinic:
+        _cache_put(app, f"{CLINIC_CACHE_PREFIX}{clinic_id}", json.dumps(clinic))
+    return clinic
+
+
+def get_clinic_by_slug(app, slug):
+    """Resolve a public URL slug to the clinic profile. Slugs never change once created."""
+    clinic_id = _cache_get(app, f"{CLINIC_SLUG_CACHE_PREFIX}{slug}")
+    if clinic_id:
+        return get_clinic_profile(app, clinic_id)
+    clinic = _load_clinic(app, f"slug = '{slug}'")
+    if clinic:
+        _cache_put(app, f"{CLINIC_SLUG_CACHE_PREFIX}{slug}", clinic["ROWID"])
+        _cache_put(app, f"{CLINIC_CACHE_PREFIX}{clinic['ROWID']}", json.dumps(clinic))
+    return clinic
+
+
+def invalidate_clinic_profile(app, clinic_id):
+    """Drop the cached profile after the clinic record changes."""
+    try:
+        get_cache_segment(app).delete(f"{CLINIC_CACHE_PREFIX}{clinic_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to invalidate clinic profile: {e}")
+        return False
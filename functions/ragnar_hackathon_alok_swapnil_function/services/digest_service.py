@@ -0,0 +1,91 @@
+import logging
+from collections import Counter, defaultdict
+from utils.constants import (
+    TABLE_APPOINTMENTS, TABLE_DOCTORS,
+    STATUS_COMPLETED, STATUS_CANCELLED, STATUS_NO_SHOW,
+)
+from services.bulk_service import ZCQL_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Grouped by clinic, doctor, status and score: every digest figure comes from this one pass
+_GROUP_COLUMNS = ["clinic_id", "doctor_id", "status", "feedback_score"]
+_COUNT_COLUMN = "COUNT(ROWID)"
+
+
+def _new_day():
+    return {"statuses": Counter(), "doctors": Counter(), "score_sum": 0, "score_count": 0}
+
+
+def day_aggregates(app, clinic_ids, day):
+    """
+    Per-clinic appointment figures for one day from a single grouped query
+    (paged only if there are more than ZCQL_PAGE_SIZE groups).
+    Returns {clinic_id: {"statuses", "doctors", "score_sum", "score_count"}}.
+    """
+    days = defaultdict(_new_day)
+    if not clinic_ids:
+        return days
+    in_list = ", ".join(f"'{cid}'" for cid in clinic_ids)
+    columns = ", ".join(_GROUP_COLUMNS)
+    zcql = app.zcql()
+    offset = 0
+    while True:
+        rows = zcql.execute_query(
+            f"SELECT {columns}, {_COUNT_COLUMN} FROM {TABLE_APPOINTMENTS} "
+            f"WHERE appointment_date = '{day}' AND clinic_id IN ({in_list}) "
+            f"GROUP BY {columns} ORDER BY {columns} "
+            f"LIMIT {offset}, {ZCQL_PAGE_SIZE}"
+        ) or []
+        for row in rows:
+            group = row[TABLE_APPOINTMENTS]
+            count = int(group.get(_COUNT_COLUMN) or 0)
+            d = days[group["clinic_id"]]
+            d["statuses"][group.get("status", "")] += count
+            if group.get("doctor_id"):
+                d["doctors"][group["doctor_id"]] += count
+            try:
+                score = float(group.get("feedback_score") or "")
+            except ValueError:
+                continue
+            d["score_sum"] += score * count
+            d["score_count"] += count
+        if len(rows) < ZCQL_PAGE_SIZE:
+            return days
+        offset += ZCQL_PAGE_SIZE
+
+
+def doctor_names(app, doctor_ids):
+    """{doctor_id: name} for a set of doctors, in one IN query."""
+    ids = sorted({did for did in doctor_ids if did})
+    if not ids:
+        return {}
+    in_list = ", ".join(f"'{did}'" for did in ids)
+    rows = app.zcql().execute_query(f"SELECT ROWID, name FROM {TABLE_DOCTORS} WHERE ROWID IN ({in_list})")
+    return {row[TABLE_DOCTORS]["ROWID"]: row[TABLE_DOCTORS].get("name", "") for row in (rows or [])}
+
+
+def busiest_doctor_id(day):
+    """The doctor with the most appointments that day ("" if none)."""
+    return day["doctors"].most_common(1)[0][0] if day["doctors"] else ""
+
+
+def build_digest(day, names):
+    """The figures shown in a clinic's daily digest mail."""
+    statuses = day["statuses"]
+    total = sum(statuses.values())
+    completed = statuses.get(STATUS_COMPLETED, 0)
+    cancelled = statuses.get(STATUS_CANCELLED, 0)
+    no_shows = statuses.get(STATUS_NO_SHOW, 0)
+    busiest = busiest_doctor_id(day)
+    return {
+        "total": total,
+        "completed": completed,
+        "cancelled": cancelled,
+        "no_shows": no_shows,
+        "pending": total - completed - cancelled - no_shows,
+        "avg_feedback": round(day["score_sum"] / day["score_count"], 1) if day["score_count"] else None,
+        "feedback_count": day["score_count"],
+        "busiest_doctor": names.get(busiest, "") if busiest else "",
+        "busiest_doctor_count": day["doctors"][busiest] if busiest else 0,
+    }
@@ -0,0 +1,163 @@
+import csv
+import io
+import logging
+from utils.constants import TABLE_APPOINTMENTS, TABLE_PATIENTS
+from services.bulk_service import ZCQL_PAGE_SIZE
+from services.roster_service import get_roster
+from services.stratus_service import upload_stream, get_object_url
+
+logger = logging.getLogger(__name__)
+
+# Bytes of CSV buffered before a chunk is yielded
+CSV_CHUNK_BYTES = 64 * 1024
+# Upper bound for an export object written to Stratus
+EXPORT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Pre-signed export links stay valid for an hour
+EXPORT_LINK_SECONDS = "3600"
+
+# Free-text cells starting with these are escaped so spreadsheets do not run them as formulas
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+_FREE_TEXT_COLUMNS = {"patient_name", "notes", "feedback_text", "feedback_keywords"}
+
+DATASETS = {
+    "appointments": {
+        "columns": [
+            "appointment_id", "appointment_date", "appointment_time", "token_number", "status",
+            "doctor_id", "doctor_name", "patient_id", "patient_name", "patient_phone", "notes",
+            "feedback_score", "feedback_sentiment",
+        ],
+        "where": "",
+    },
+    "feedback": {
+        "columns": [
+            "appointment_id", "appointment_date", "doctor_id", "doctor_name", "patient_name",
+            "feedback_score", "feedback_text", "feedback_sentiment", "feedback_keywords",
+        ],
+        "where": f"{TABLE_APPOINTMENTS}.feedback_score != ''",
+    },
+}
+
+
+def iter_export_rows(app, clinic_id, dataset, date_from, date_to, page_size=ZCQL_PAGE_SIZE):
+    """
+    Yield export records (dicts keyed by the dataset's columns) for a clinic and
+    date range, ordered by date. Pages through ZCQL on (appointment_date, ROWID)
+    so only one page is held at a time.
+    """
+    spec = DATASETS[dataset]
+    doctors = {d["ROWID"]: d["name"] for d in get_roster(app, clinic_id)}
+    zcql = app.zcql()
+    conditions = [
+        f"{TABLE_APPOINTMENTS}.clinic_id = '{clinic_id}'",
+        f"{TABLE_APPOINTMENTS}.appointment_date >= '{date_from}'",
+        f"{TABLE_APPOINTMENTS}.appointment_date <= '{date_to}'",
+    ]
+    if spec["where"]:
+        conditions.append(spec["where"])
+
+    last_date, last_id = None, None
+    while True:
+        keyset = ""
+        if last_id:
+            keyset = (
+                f" AND ({TABLE_APPOINTMENTS}.appointment_date > '{last_date}' "
+                f"OR ({TABLE_APPOINTMENTS}.appointment_date = '{last_date}' "
+                f"AND {TABLE_APPOINTMENTS}.ROWID > '{last_id}'))"
+            )
+        rows = zcql.execute_query(
+            f"SELECT {TABLE_APPOINTMENTS}.ROWID, {TABLE_APPOINTMENTS}.appointment_date, "
+            f"{TABLE_APPOINTMENTS}.appointment_time, {TABLE_APPOINTMENTS}.token_number, "
+            f"{TABLE_APPOINTMENTS}.status, {TABLE_APPOINTMENTS}.doctor_id, "
+            f"{TABLE_APPOINTMENTS}.patient_id, {TABLE_APPOINTMENTS}.notes, "
+            f"{TABLE_APPOINTMENTS}.feedback_score, {TABLE_APPOINTMENTS}.feedback_text, "
+            f"{TABLE_APPOINTMENTS}.feedback_sentiment, {TABLE_APPOINTMENTS}.feedback_keywords, "
+            f"{TABLE_PATIENTS}.name, {TABLE_PATIENTS}.phone "
+            f"FROM {TABLE_APPOINTMENTS} "
+            f"LEFT JOIN {TABLE_PATIENTS} ON {TABLE_APPOINTMENTS}.patient_id = {TABLE_PATIENTS}.ROWID "
+            f"WHERE {' AND '.join(conditions)}{keyset} "
+            f"ORDER BY {TABLE_APPOINTMENTS}.appointment_date ASC, {TABLE_APPOINTMENTS}.ROWID ASC "
+            f"LIMIT {page_size}"
+        )
+        for row in (rows or []):
+            a = row[TABLE_APPOINTMENTS]
+            p = row.get(TABLE_PATIENTS) or {}
+            record = dict(a, appointment_id=a["ROWID"], doctor_name=doctors.get(a.get("doctor_id"), ""),
+                          patient_name=p.get("name", ""), patient_phone=p.get("phone", ""))
+            yield {column: record.get(column) or "" for column in spec["columns"]}
+        if not rows or len(rows) < page_size:
+            return
+        last_date = rows[-1][TABLE_APPOINTMENTS]["appointment_date"]
+        last_id = rows[-1][TABLE_APPOINTMENTS]["ROWID"]
+
+
+def _safe_cell(column, value):
+    value = str(value)
+    if column in _FREE_TEXT_COLUMNS and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(records, columns, counter=None):
+    """
+    Encode records as CSV and yield UTF-8 chunks of about CSV_CHUNK_BYTES.
+    `counter["rows"]` counts the rows in chunks already yielded.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    buffered = 0
+    for record in records:
+        writer.writerow([_safe_cell(column, record[column]) for column in columns])
+        buffered += 1
+        if buffer.tell() >= CSV_CHUNK_BYTES:
+            if counter is not None:
+                counter["rows"] += buffered
+            buffered = 0
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if counter is not None:
+        counter["rows"] += buffered
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only file-like view over an iterator of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = bytearray()
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._pending) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._pending.extend(chunk)
+        if size is None or size < 0:
+            size = len(self._pending)
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return data
+
+
+def export_to_stratus(app, clinic_id, dataset, date_from, date_to, key):
+    """
+    Write a CSV export to Stratus and return (download_url, row_count).
+    The CSV is streamed straight into a multipart upload. download_url is
+    None if the upload failed.
+    """
+    columns = DATASETS[dataset]["columns"]
+    records = iter_export_rows(app, clinic_id, dataset, date_from, date_to)
+    counter = {"rows": 0}
+
+    stored = upload_stream(app, _ChunkStream(iter_csv(records, columns, counter)), key, EXPORT_MAX_BYTES)
+
+    if not stored:
+        return None, counter["rows"]
+    logger.info(f"Export {key} written with {counter['rows']} row(s)")
+    return get_object_url(app, key, expiry_in_sec=EXPORT_LINK_SECONDS), counter["rows"]
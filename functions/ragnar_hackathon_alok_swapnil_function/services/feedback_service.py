@@ -0,0 +1,169 @@
+import logging
+import random
+import threading
+from collections import OrderedDict
+from itertools import islice
+from utils.constants import TABLE_APPOINTMENTS, SENTIMENT_NEUTRAL, SENTIMENT_PENDING
+from utils.parallel import run_parallel
+from services.bulk_service import iter_rows, bulk_update
+from utils.sentiment import classify, local_keywords, SHADOW_RATE, stats as sentiment_stats
+from services.rollup_service import RollupDelta, apply_delta
+from services.zia_service import ZIA_BATCH_SIZE, analyze_sentiment_batch, extract_keywords_batch
+
+logger = logging.getLogger(__name__)
+
+# Pending rows picked up by one enrichment run; the rest wait for the next run
+MAX_ENRICH_PER_RUN = 1000
+# Zia batches in flight at once
+ZIA_MAX_CONCURRENCY = 4
+# Results kept per warm instance for repeated texts ("Good", "Very nice doctor")
+MEMO_SIZE = 2000
+
+_memo_guard = threading.Lock()
+_memo = OrderedDict()
+
+
+def normalize_text(text):
+    """Key under which identical feedback texts share one analysis."""
+    return " ".join((text or "").lower().split())
+
+
+def _memo_get(key):
+    with _memo_guard:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    return None
+
+
+def _memo_put(key, value):
+    with _memo_guard:
+        _memo[key] = value
+        _memo.move_to_end(key)
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+
+def _analyze_batch(app, texts):
+    """Sentiment and keywords for one batch; None if either Zia call failed."""
+    results = run_parallel({
+        "sentiment": lambda: analyze_sentiment_batch(app, texts),
+        "keywords": lambda: extract_keywords_batch(app, texts),
+    })
+    if results["sentiment"] is None or results["keywords"] is None:
+        return None
+    return list(zip(results["sentiment"], results["keywords"]))
+
+
+def enrich_pending_feedback(app, limit=MAX_ENRICH_PER_RUN):
+    """
+    Analyse feedback stored with sentiment 'pending' and write the sentiment
+    and keywords back. Identical texts are analysed once. Short texts the
+    lexicon is confident about are answered offline (a SHADOW_RATE sample is
+    also checked against Zia); the rest go to Zia in batches of
+    ZIA_BATCH_SIZE with bounded concurrency. Rows whose batch failed stay
+    pending for the next run.
+    Returns a summary dict.
+    """
+    rows = [
+        row[TABLE_APPOINTMENTS]
+        for row in islice(
+            iter_rows(app, TABLE_APPOINTMENTS, "clinic_id, doctor_id, appointment_date, feedback_text",
+                      f"feedback_sentiment = '{SENTIMENT_PENDING}'"),
+            limit,
+        )
+    ]
+
+    # Group rows by normalised text; each distinct text is analysed once
+    groups = OrderedDict()
+    for appt in rows:
+        key = normalize_text(appt.get("feedback_text", ""))
+        groups.setdefault(key, {"text": appt.get("feedback_text", ""), "ids": []})["ids"].append(appt["ROWID"])
+
+    analysed = {}
+    to_analyse = []
+    # Lexicon answers double-checked against Zia, to track agreement
+    shadowed = {}
+    lexicon_hits = 0
+    for key, group in groups.items():
+        if not key:
+            analysed[key] = (SENTIMENT_NEUTRAL, [])
+            continue
+        cached = _memo_get(key)
+        if cached is not None:
+            analysed[key] = cached
+            continue
+        local = classify(group["text"])
+        if local and random.random() >= SHADOW_RATE:
+            analysed[key] = (local, local_keywords(group["text"]))
+            _memo_put(key, analysed[key])
+            lexicon_hits += 1
+            continue
+        if local:
+            shadowed[key] = local
+        to_analyse.append(key)
+    # Shadowed texts count as hits: the lexicon was confident about them
+    sentiment_stats.record("lexicon", lexicon_hits + len(shadowed))
+    sentiment_stats.record("zia", len(to_analyse) - len(shadowed))
+
+    batches = [to_analyse[i:i + ZIA_BATCH_SIZE] for i in range(0, len(to_analyse), ZIA_BATCH_SIZE)]
+    results = run_parallel(
+        {index: (lambda keys=keys: _analyze_batch(app, [groups[k]["text"] for k in keys]))
+         for index, keys in enumerate(batches)},
+        max_concurrency=ZIA_MAX_CONCURRENCY,
+    ) if batches else {}
+
+    failed_batches = 0
+    for index, keys in enumerate(batches):
+        batch_result = results.get(index)
+        if batch_result is None:
+            failed_batches += 1
+            continue
+        for key, value in zip(keys, batch_result):
+            if key in shadowed:
+                sentiment_stats.record_agreement(shadowed[key], value[0])
+            analysed[key] = value
+            _memo_put(key, value)
+
+    updates = []
+    for key, group in groups.items():
+        if key not in analysed:
+            continue
+        sentiment, keywords = analysed[key]
+        for row_id in group["ids"]:
+            updates.append({
+                "ROWID": row_id,
+                "feedback_sentiment": sentiment,
+                "feedback_keywords": ",".join(keywords),
+            })
+
+    written, errors = bulk_update(app, TABLE_APPOINTMENTS, updates) if updates else ([], [])
+    enriched = sum(1 for row in written if row is not None)
+
+    # Move the enriched rows out of 'pending' in the weekly rollups
+    appts = {appt["ROWID"]: appt for appt in rows}
+    rollup = RollupDelta()
+    for update, row in zip(updates, written):
+        if row is None:
+            continue
+        appt = appts[update["ROWID"]]
+        rollup.add_enrichment(appt.get("clinic_id", ""), appt.get("doctor_id", ""),
+                              appt.get("appointment_date", ""), update["feedback_sentiment"],
+                              update["feedback_keywords"].split(",") if update["feedback_keywords"] else [])
+    apply_delta(app, rollup)
+
+    logger.info(
+        f"Feedback enrichment: {len(rows)} pending, {len(groups)} distinct, "
+        f"{lexicon_hits} answered offline, {len(to_analyse)} sent to Zia, {enriched} enriched"
+    )
+    return {
+        "pending": len(rows),
+        "distinct_texts": len(groups),
+        "lexicon_hits": lexicon_hits,
+        "analysed": len(to_analyse),
+        "zia_batches": len(batches),
+        "failed_batches": failed_batches,
+        "enriched": enriched,
+        "errors": errors,
+        "sentiment_stats": sentiment_stats.snapshot(),
+    }
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from flask import make_response
+from services.cache_service import get_cache_segment
+from utils.response import error
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_CACHE_PREFIX = "idem_"
+# Stored responses are replayed for a day
+IDEMPOTENCY_TTL_HOURS = 24
+# An in-flight marker older than this is treated as abandoned
+IDEMPOTENCY_LOCK_SECONDS = 30
+MAX_KEY_LENGTH = 255
+
+STATE_PENDING = "pending"
+STATE_DONE = "done"
+
+# Makes the marker check-and-set atomic within one instance; keys share a
+# fixed set of locks, each held only for the cache read and write
+_KEY_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _key_lock(cache_key):
+    return _KEY_LOCKS[int(cache_key[-8:], 16) % len(_KEY_LOCKS)]
+
+
+def _cache_key(scope, path, key):
+    digest = hashlib.sha256(f"{scope}|{path}|{key}".encode("utf-8")).hexdigest()[:40]
+    return f"{IDEMPOTENCY_CACHE_PREFIX}{digest}"
+
+
+def _fingerprint(request):
+    return hashlib.sha256(request.get_data() or b"").hexdigest()
+
+
+def _read(segment, cache_key):
+    try:
+        result = segment.get(cache_key)
+        if result and result.get("cache_value"):
+            return json.loads(result["cache_value"])
+    except Exception as e:
+        logger.error(f"Failed to read idempotency record: {e}")
+    return None
+
+
+def _write(segment, cache_key, record):
+    try:
+        segment.put(cache_key, json.dumps(record), IDEMPOTENCY_TTL_HOURS)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to store idempotency record: {e}")
+        return False
+
+
+def _replay(record):
+    response = make_response(record["body"], record["status"])
+    response.headers["Content-Type"] = record.get("content_type", "application/json")
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def run_idempotent(app, request, handle, scope):
+    """
+    Run `handle()` at most once per Idempotency-Key, path and `scope`.
+    Call it from inside the route, after authentication, with a scope that
+    identifies the caller (e.g. "clinic_id:user_id") so one caller's key can
+    never replay another's stored response.
+    A successful (2xx) response is stored in the cache and replayed for
+    retries without re-running the handler; anything else is not stored, so
+    the client can correct the request and retry with the same key. A retry
+    that arrives while the first request is still running gets 409; a key
+    reused with a different body gets 422. Requests without the header run
+    normally.
+    Within one instance the in-flight marker is checked and set atomically.
+    Across instances the marker is a cache read followed by a write, so two
+    duplicates arriving at the same moment on different instances can both
+    run: collapsing them is best-effort.
+    """
+    key = (request.headers.get(IDEMPOTENCY_HEADER) or "").strip()
+    if not key:
+        return handle()
+    if len(key) > MAX_KEY_LENGTH:
+        return error(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters")
+
+    cache_key = _cache_key(scope, request.path, key)
+    fingerprint = _fingerprint(request)
+    segment = get_cache_segment(app)
+
+    with _key_lock(cache_key):
+        record = _read(segment, cache_key)
+        if record:
+            if record.get("fingerprint") != fingerprint:
+                return error(f"{IDEMPOTENCY_HEADER} was already used with a different request body", 422)
+            if record.get("state") == STATE_DONE:
+                logger.info(f"Idempotent replay for {request.path}")
+                return _replay(record)
+            if time.time() - record.get("started", 0) < IDEMPOTENCY_LOCK_SECONDS:
+                return error("A request with this Idempotency-Key is still being processed", 409)
+
+        _write(segment, cache_key, {
+            "state": STATE_PENDING,
+            "fingerprint": fingerprint,
+            "started": time.time(),
+        })
+
+    response = handle()
+
+    if 200 <= response.status_code < 300:
+        _write(segment, cache_key, {
+            "state": STATE_DONE,
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/json"),
+            "body": response.get_data(as_text=True),
+        })
+    else:
+        # Let the client retry a failed or rejected attempt
+        try:
+            segment.delete(cache_key)
+        except Exception as e:
+            logger.error(f"Failed to clear idempotency record: {e}")
+    return response
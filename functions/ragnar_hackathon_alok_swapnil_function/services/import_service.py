@@ -0,0 +1,240 @@
+"""
+Streaming patient import for CareDesk.
+Rows flow through a generator pipeline (read -> normalize -> validate ->
+dedupe) and are bulk-inserted in chunks, so memory stays bounded by the
+chunk size rather than the file size.
+"""
+
+import codecs
+import csv
+import logging
+from utils.constants import TABLE_PATIENTS, GENDERS
+from utils.phone import phone_key, PHONE_KEY_COLUMN
+from services.bulk_service import bulk_insert, iter_rows
+from services.patient_index_service import invalidate_patient_index
+from services.search_service import with_search_key
+
+logger = logging.getLogger(__name__)
+
+# openpyxl is optional — without it only CSV imports are accepted
+try:
+    from openpyxl import load_workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+IMPORT_MAX_BYTES = 25 * 1024 * 1024
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 500
+
+PATIENT_FIELDS = ["name", "phone", "email", "age", "gender", "blood_group", "medical_history"]
+
+# Spreadsheet header -> Patients column
+HEADER_ALIASES = {
+    "patient_name": "name",
+    "full_name": "name",
+    "mobile": "phone",
+    "mobile_number": "phone",
+    "phone_number": "phone",
+    "contact": "phone",
+    "email_id": "email",
+    "sex": "gender",
+    "bloodgroup": "blood_group",
+    "history": "medical_history",
+}
+
+GENDER_ALIASES = {"m": "Male", "f": "Female", "o": "Other"}
+BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
+
+
+def _normalize_header(header):
+    key = str(header or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _read_csv(stream):
+    """Yield (line_number, dict) from a CSV byte stream."""
+    # Decoded line by line so a bad byte surfaces at its own row, not a
+    # buffer's worth of rows earlier
+    decode = codecs.getincrementaldecoder("utf-8-sig")().decode
+    reader = csv.reader(decode(line) for line in stream)
+    headers = [_normalize_header(h) for h in next(reader, [])]
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        yield reader.line_num, dict(zip(headers, values))
+
+
+def _read_xlsx(stream):
+    """Yield (row_number, dict) from the first sheet of an XLSX workbook."""
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for row_number, values in enumerate(rows, 2):
+            if not any(v not in (None, "") for v in values):
+                continue
+            yield row_number, {
+                h: ("" if v is None else str(v)) for h, v in zip(headers, values)
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(file_stream, file_name):
+    """Pick a reader by file extension. Raises ValueError for unsupported files."""
+    name = (file_name or "").lower()
+    if name.endswith(".csv"):
+        return _read_csv(file_stream)
+    if name.endswith(".xlsx"):
+        if not HAS_OPENPYXL:
+            raise ValueError("XLSX import is not available. Please upload a CSV file.")
+        return _read_xlsx(file_stream)
+    raise ValueError("Unsupported file type. Please upload a .csv or .xlsx file.")
+
+
+def _clean_phone(phone):
+    return phone.strip().replace(" ", "").replace("-", "")
+
+
+def validate_row(raw):
+    """
+    Normalize one raw row into a Patients record.
+    Returns (record, None) or (None, error_message).
+    """
+    record = {field: str(raw.get(field, "") or "").strip() for field in PATIENT_FIELDS}
+
+    if not record["name"]:
+        return None, "Name is required"
+    if len(record["name"]) > 100:
+        return None, "Name is too long"
+
+    record["phone"] = _clean_phone(record["phone"])
+    digits = record["phone"].lstrip("+")
+    if not digits:
+        return None, "Phone is required"
+    if not digits.isdigit() or not 10 <= len(digits) <= 13 or not phone_key(record["phone"]):
+        return None, f"Invalid phone number '{record['phone']}'"
+    record[PHONE_KEY_COLUMN] = phone_key(record["phone"])
+
+    if record["email"] and "@" not in record["email"]:
+        return None, f"Invalid email '{record['email']}'"
+
+    if record["age"]:
+        age = record["age"].split(".")[0]
+        if not age.isdigit() or int(age) > 130:
+            return None, f"Invalid age '{record['age']}'"
+        record["age"] = age
+
+    if record["gender"]:
+        gender = record["gender"].capitalize()
+        gender = GENDER_ALIASES.get(gender.lower(), gender)
+        if gender not in GENDERS:
+            return None, f"Gender must be one of {GENDERS}"
+        record["gender"] = gender
+
+    if record["blood_group"]:
+        blood_group = record["blood_group"].upper().replace(" ", "")
+        if blood_group not in BLOOD_GROUPS:
+            return None, f"Invalid blood group '{record['blood_group']}'"
+        record["blood_group"] = blood_group
+
+    return record, None
+
+
+def fetch_clinic_phones(app, clinic_id):
+    """Load the phone key of every patient already in the clinic in one paged scan."""
+    return {
+        row[TABLE_PATIENTS].get(PHONE_KEY_COLUMN) or phone_key(row[TABLE_PATIENTS].get("phone"))
+        for row in iter_rows(app, TABLE_PATIENTS, f"phone, {PHONE_KEY_COLUMN}", f"clinic_id = '{clinic_id}'")
+    }
+
+
+def _readable(rows, report):
+    """
+    Pass rows through until the file cannot be read any further (bad
+    encoding, malformed CSV or workbook); the error is recorded in the
+    report and the import stops there, keeping the rows already read.
+    """
+    line = 1
+    try:
+        for line, raw in rows:
+            yield line, raw
+    except Exception as e:
+        logger.warning(f"Patient import stopped after row {line}: {e}")
+        report["read_error"] = f"File could not be read after row {line}: {e}"
+
+
+def _validated(rows, existing_phones, report):
+    """Validate and dedupe rows, recording rejects in the report."""
+    for line, raw in rows:
+        report["total_rows"] += 1
+        record, err = validate_row(raw)
+        if err is None and record[PHONE_KEY_COLUMN] in existing_phones:
+            err = f"Patient with phone {record['phone']} already exists"
+        if err:
+            _add_error(report, line, err)
+            continue
+        existing_phones.add(record[PHONE_KEY_COLUMN])
+        yield line, record
+
+
+def _chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _add_error(report, line, message):
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": line, "error": message})
+    else:
+        report["errors_truncated"] = True
+
+
+def import_patients(app, clinic_id, file_stream, file_name):
+    """
+    Stream a CSV/XLSX file into the Patients table for a clinic.
+    Returns a report: total_rows, imported, failed and per-row errors, plus
+    read_error when the file became unreadable part-way (rows before it are
+    still imported).
+    """
+    rows = read_rows(file_stream, file_name)
+    report = {
+        "total_rows": 0,
+        "imported": 0,
+        "failed": 0,
+        "errors": [],
+        "errors_truncated": False,
+        "read_error": "",
+    }
+
+    existing_phones = fetch_clinic_phones(app, clinic_id)
+
+    try:
+        for chunk in _chunked(_validated(_readable(rows, report), existing_phones, report), IMPORT_CHUNK_SIZE):
+            records = [with_search_key(clinic_id, dict(record, clinic_id=clinic_id)) for _, record in chunk]
+            inserted, batch_errors = bulk_insert(app, TABLE_PATIENTS, records)
+            for (line, _), row in zip(chunk, inserted):
+                if row is None:
+                    _add_error(report, line, "Insert failed, please retry this row")
+                else:
+                    report["imported"] += 1
+            if batch_errors:
+                logger.warning(f"Patient import: {len(batch_errors)} batch(es) failed for clinic {clinic_id}")
+    finally:
+        # Earlier chunks are in the Data Store even if a later one raised
+        if report["imported"]:
+            invalidate_patient_index(app, clinic_id)
+
+    logger.info(
+        f"Patient import for clinic {clinic_id}: {report['imported']} imported, "
+        f"{report['failed']} failed of {report['total_rows']}"
+    )
+    return report
@@ -1,86 +1,197 @@
+import html
 import logging
+from services.template_service import register_template, clinic_header
 
 logger = logging.getLogger(__name__)
 
+FROM_EMAIL = "noreply@catalystmailer.com"
 
-def send_appointment_confirmation(app, patient_email, patient_name, doctor_name,
-                                  clinic_name, appointment_date, appointment_time,
-                                  token_number):
-    """Send appointment confirmation email to patient."""
-    try:
-        mail = app.email()
-        subject = f"Appointment Confirmed - {clinic_name}"
-        content = f"""
+# Bodies are parsed once per container; see template_service for the {{field}} syntax.
+# {{clinic_header|raw}} is the clinic's cached <h1> (template_service.clinic_header).
+
+CONFIRMATION_MAIL = register_template("appointment_confirmation_mail", """
         <html>
         <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
             <div style="background: #0d9488; color: white; padding: 20px; text-align: center;">
-                <h1 style="margin: 0;">{clinic_name}</h1>
+                {{clinic_header|raw}}
                 <p style="margin: 5px 0 0;">Appointment Confirmation</p>
             </div>
             <div style="padding: 20px; background: #f8fafc;">
-                <p>Dear <strong>{patient_name}</strong>,</p>
+                <p>Dear <strong>{{patient_name}}</strong>,</p>
                 <p>Your appointment has been confirmed!</p>
                 <div style="background: white; border-radius: 8px; padding: 16px; margin: 16px 0;">
-                    <p><strong>Doctor:</strong> {doctor_name}</p>
-                    <p><strong>Date:</strong> {appointment_date}</p>
-                    <p><strong>Time:</strong> {appointment_time}</p>
-                    <p><strong>Token Number:</strong> <span style="font-size: 24px; color: #0d9488; font-weight: bold;">{token_number}</span></p>
+                    <p><strong>Doctor:</strong> {{doctor_name}}</p>
+                    <p><strong>Date:</strong> {{appointment_date}}</p>
+                    <p><strong>Time:</strong> {{appointment_time}}</p>
+                    <p><strong>Token Number:</strong> <span style="font-size: 24px; color: #0d9488; font-weight: bold;">{{token_number}}</span></p>
                 </div>
                 <p style="color: #64748b; font-size: 14px;">Please arrive 10 minutes before your appointment time.</p>
             </div>
         </body>
         </html>
-        """
-        mail.send_mail({
-            "from_email": "noreply@catalystmailer.com",
-            "to_email": patient_email,
-            "subject": subject,
-            "content": content,
-        })
-        logger.info(f"Confirmation email sent to {patient_email}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send confirmation email: {e}")
-        return False
-
+        """)
 
-def send_prescription_email(app, patient_email, patient_name, doctor_name,
-                            clinic_name, diagnosis, medicines_text, advice):
-    """Send prescription details via email."""
-    try:
-        mail = app.email()
-        subject = f"Your Prescription - {clinic_name}"
-        content = f"""
+PRESCRIPTION_MAIL = register_template("prescription_mail", """
         <html>
         <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
             <div style="background: #0d9488; color: white; padding: 20px; text-align: center;">
-                <h1 style="margin: 0;">{clinic_name}</h1>
+                {{clinic_header|raw}}
                 <p style="margin: 5px 0 0;">Digital Prescription</p>
             </div>
             <div style="padding: 20px; background: #f8fafc;">
-                <p>Dear <strong>{patient_name}</strong>,</p>
-                <p>Your prescription from <strong>Dr. {doctor_name}</strong>:</p>
+                <p>Dear <strong>{{patient_name}}</strong>,</p>
+                <p>Your prescription from <strong>Dr. {{doctor_name}}</strong>:</p>
                 <div style="background: white; border-radius: 8px; padding: 16px; margin: 16px 0;">
-                    <p><strong>Diagnosis:</strong> {diagnosis}</p>
+                    <p><strong>Diagnosis:</strong> {{diagnosis}}</p>
                     <hr style="border: 1px solid #e2e8f0;">
                     <p><strong>Medicines:</strong></p>
-                    <p>{medicines_text}</p>
+                    <p>{{medicines_html|raw}}</p>
                     <hr style="border: 1px solid #e2e8f0;">
-                    <p><strong>Advice:</strong> {advice}</p>
+                    <p><strong>Advice:</strong> {{advice}}</p>
                 </div>
                 <p style="color: #64748b; font-size: 14px;">This is a digitally generated prescription.</p>
             </div>
         </body>
         </html>
-        """
-        mail.send_mail({
-            "from_email": "noreply@catalystmailer.com",
-            "to_email": patient_email,
-            "subject": subject,
-            "content": content,
+        """)
+
+FOLLOW_UP_MAIL = register_template("follow_up_reminder_mail", """
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background: #0d9488; color: white; padding: 20px; text-align: center;">
+                {{clinic_header|raw}}
+                <p style="margin: 5px 0 0;">Follow-up Reminder</p>
+            </div>
+            <div style="padding: 20px; background: #f8fafc;">
+                <p>Dear <strong>{{patient_name}}</strong>,</p>
+                <p>This is a friendly reminder that you have a follow-up appointment scheduled for <strong>{{follow_up_date}}</strong> with <strong>Dr. {{doctor_name}}</strong>.</p>
+                <p>Please book your appointment at your earliest convenience.</p>
+                <p style="color: #64748b; font-size: 14px;">Wishing you good health!</p>
+            </div>
+        </body>
+        </html>
+        """)
+
+DAILY_DIGEST_MAIL = register_template("daily_digest_mail", """
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+            <div style="background: #0d9488; color: white; padding: 20px; text-align: center;">
+                <h1 style="margin: 0;">Daily Summary</h1>
+                <p style="margin: 5px 0 0;">{{clinic_name}} — {{day}}</p>
+            </div>
+            <div style="padding: 20px; background: #f8fafc;">
+                <div style="background: white; border-radius: 8px; padding: 16px; margin: 16px 0;">
+                    <p><strong>Total Appointments:</strong> {{total}}</p>
+                    <p><strong>Completed:</strong> {{completed}}</p>
+                    <p><strong>No-shows:</strong> {{no_shows}}</p>
+                    <p><strong>Cancelled:</strong> {{cancelled}}</p>
+                    <p><strong>Pending:</strong> {{pending}}</p>
+                    <hr style="border: 1px solid #e2e8f0;">
+                    <p><strong>Average Feedback:</strong> {{avg_feedback}}</p>
+                    <p><strong>Busiest Doctor:</strong> {{busiest}}</p>
+                </div>
+                <p style="color: #64748b; font-size: 14px;">This is an automated daily digest from CareDesk.</p>
+            </div>
+        </body>
+        </html>
+        """)
+
+
+def _send(app, to_email, subject, content):
+    app.email().send_mail({
+        "from_email": FROM_EMAIL,
+        "to_email": to_email,
+        "subject": subject,
+        "content": content,
+    })
+
+
+def send_appointment_confirmation(app, patient_email, patient_name, doctor_name,
+                                  clinic_name, appointment_date, appointment_time,
+                                  token_number, clinic_id=None):
+    """Send appointment confirmation email to patient."""
+    try:
+        content = CONFIRMATION_MAIL.render({
+            "clinic_header": clinic_header(clinic_id, clinic_name),
+            "patient_name": patient_name,
+            "doctor_name": doctor_name,
+            "appointment_date": appointment_date,
+            "appointment_time": appointment_time,
+            "token_number": token_number,
+        })
+        _send(app, patient_email, f"Appointment Confirmed - {clinic_name}", content)
+        logger.info(f"Confirmation email sent to {patient_email}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send confirmation email: {e}")
+        return False
+
+
+def _medicines_html(medicines):
+    """One escaped line per medicine (name | dosage | duration | instructions)."""
+    if not isinstance(medicines, list):
+        return html.escape(str(medicines or ""))
+    return "<br>".join(
+        html.escape(f"- {m.get('name', '')} | {m.get('dosage', '')} | {m.get('duration', '')} | {m.get('instructions', '')}")
+        for m in medicines
+    )
+
+
+def send_prescription_email(app, patient_email, patient_name, doctor_name,
+                            clinic_name, diagnosis, medicines, advice, clinic_id=None):
+    """Send prescription details via email. `medicines` is the prescription's list (or its text)."""
+    try:
+        content = PRESCRIPTION_MAIL.render({
+            "clinic_header": clinic_header(clinic_id, clinic_name),
+            "patient_name": patient_name,
+            "doctor_name": doctor_name,
+            "diagnosis": diagnosis,
+            "medicines_html": _medicines_html(medicines),
+            "advice": advice,
         })
+        _send(app, patient_email, f"Your Prescription - {clinic_name}", content)
         logger.info(f"Prescription email sent to {patient_email}")
         return True
     except Exception as e:
         logger.error(f"Failed to send prescription email: {e}")
         return False
+
+
+def send_daily_digest(app, clinic_email, clinic_name, day, digest):
+    """Send a clinic's end-of-day summary (see digest_service.build_digest) to its admin."""
+    try:
+        avg_feedback = f"{digest['avg_feedback']} / 5 ({digest['feedback_count']} rating(s))" \
+            if digest["avg_feedback"] is not None else "No ratings yet"
+        busiest = f"Dr. {digest['busiest_doctor']} ({digest['busiest_doctor_count']} appointment(s))" \
+            if digest["busiest_doctor"] else "—"
+        content = DAILY_DIGEST_MAIL.render({
+            **digest,
+            "clinic_name": clinic_name,
+            "day": day,
+            "avg_feedback": avg_feedback,
+            "busiest": busiest,
+        })
+        _send(app, clinic_email, f"Daily Summary - {clinic_name or 'CareDesk'} ({day})", content)
+        logger.info(f"Daily digest sent to {clinic_email}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send daily digest to {clinic_email}: {e}")
+        return False
+
+
+def send_follow_up_reminder(app, patient_email, patient_name, doctor_name,
+                            follow_up_date, clinic_name, clinic_id=None):
+    """Remind a patient of a follow-up visit their doctor asked for."""
+    try:
+        content = FOLLOW_UP_MAIL.render({
+            "clinic_header": clinic_header(clinic_id, clinic_name),
+            "patient_name": patient_name or "Patient",
+            "doctor_name": doctor_name,
+            "follow_up_date": follow_up_date,
+        })
+        _send(app, patient_email, f"Follow-up Reminder - {clinic_name}", content)
+        logger.info(f"Follow-up reminder sent to {patient_email}")
+        return True
+    except Exception as e:
+        logger.warning(f"Follow-up mail failed for {patient_email}: {e}")
+        return False
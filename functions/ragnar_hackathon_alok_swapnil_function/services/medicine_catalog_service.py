@@ -0,0 +1,374 @@
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from utils.constants import TABLE_MEDICINE_CATALOG, TABLE_PRESCRIPTION_ITEMS, ist_today
+from services.bulk_service import iter_rows, bulk_insert, bulk_update, bulk_delete
+from services.cache_service import get_cache_segment
+from services.prescription_item_service import name_key
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_PREFIX = "medcat_"
+CATALOG_CACHE_HOURS = 24
+# How often a warm catalog checks the cache for writes made on other instances
+CATALOG_CHECK_SECONDS = 30
+# A warm catalog is reloaded from the Data Store after this long regardless
+CATALOG_MAX_AGE_SECONDS = 6 * 3600
+# Dosage/duration/timing combinations kept per medicine
+COMBOS_KEPT = 8
+# Combinations returned with each suggestion
+COMBOS_SUGGESTED = 3
+# Name prefixes longer than this share one index entry
+MAX_PREFIX = 12
+DEFAULT_LIMIT = 8
+
+CATALOG_COLUMNS = ["clinic_id", "name_key", "name", "prescribed_count", "combos", "last_prescribed"]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_DOSE_SLOTS = ("morning", "afternoon", "night")
+
+
+def _frequency(med):
+    return "-".join("1" if med.get(slot) in (True, "1") else "0" for slot in _DOSE_SLOTS)
+
+
+def _combo(med):
+    """[dosage, duration, timing, frequency] of a submitted medicine or items row."""
+    timing = med.get("when") if "when" in med else med.get("timing")
+    return [
+        str(med.get("dosage", "") or "").strip(),
+        str(med.get("duration", "") or "").strip(),
+        str(timing or "").strip(),
+        _frequency(med),
+    ]
+
+
+def _add_combo(combos, combo):
+    """
+    Count one use of a combination in a bounded [combo..., count] list. When
+    the list is full the least used entry is replaced and inherits its count
+    plus one (Space-Saving), so a combination that becomes common still
+    works its way to the top.
+    """
+    for entry in combos:
+        if entry[:4] == combo:
+            entry[4] += 1
+            break
+    else:
+        if len(combos) < COMBOS_KEPT:
+            combos.append(combo + [1])
+        else:
+            weakest = min(combos, key=lambda entry: entry[4])
+            weakest[:] = combo + [weakest[4] + 1]
+    combos.sort(key=lambda entry: -entry[4])
+
+
+def _parse_combos(value):
+    try:
+        combos = json.loads(value or "[]")
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return [list(c) for c in combos if isinstance(c, list) and len(c) == 5] if isinstance(combos, list) else []
+
+
+class MedicineCatalog:
+    """
+    In-memory view of one clinic's MedicineCatalog rows with a prefix map
+    over the words of each medicine name.
+    """
+
+    def __init__(self, entries=()):
+        self._lock = threading.RLock()
+        self.entries = {}
+        self._prefixes = defaultdict(set)
+        for entry in entries:
+            self.upsert(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def upsert(self, entry):
+        """Add or replace an entry (dict with name_key, name, prescribed_count, combos)."""
+        key = entry["name_key"]
+        if not key:
+            return
+        with self._lock:
+            if key not in self.entries:
+                for token in _TOKEN_RE.findall(key):
+                    for n in range(1, min(len(token), MAX_PREFIX) + 1):
+                        self._prefixes[token[:n]].add(key)
+            self.entries[key] = entry
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        Top `limit` medicines with a name word starting with every query word,
+        most prescribed first, each with its most common combinations.
+        """
+        words = _TOKEN_RE.findall((query or "").lower())
+        if not words:
+            return []
+        with self._lock:
+            candidate_sets = []
+            for word in words:
+                keys = self._prefixes.get(word[:MAX_PREFIX], set())
+                if len(word) > MAX_PREFIX:
+                    keys = {k for k in keys if any(t.startswith(word) for t in _TOKEN_RE.findall(k))}
+                candidate_sets.append(keys)
+            candidate_sets.sort(key=len)
+            candidates = set(candidate_sets[0])
+            for keys in candidate_sets[1:]:
+                candidates &= keys
+            ranked = heapq.nsmallest(
+                limit, candidates, key=lambda k: (-self.entries[k]["prescribed_count"], k),
+            )
+            return [_suggestion(self.entries[k]) for k in ranked]
+
+
+def _suggestion(entry):
+    """A catalog entry in the shape the consultation screen fills a medicine row from."""
+    combos = [
+        {
+            "dosage": dosage,
+            "duration": duration,
+            "when": timing,
+            "morning": frequency[0:1] == "1",
+            "afternoon": frequency[2:3] == "1",
+            "night": frequency[4:5] == "1",
+            "frequency": frequency,
+            "count": count,
+        }
+        for dosage, duration, timing, frequency, count in entry["combos"][:COMBOS_SUGGESTED]
+    ]
+    # The most common combination pre-fills the row; the rest are offered as alternatives
+    top = combos[0] if combos else {}
+    return {
+        "name": entry["name"],
+        "count": entry["prescribed_count"],
+        "last_prescribed": entry.get("last_prescribed", ""),
+        "dosage": top.get("dosage", ""),
+        "duration": top.get("duration", ""),
+        "when": top.get("when", ""),
+        "morning": top.get("morning", False),
+        "afternoon": top.get("afternoon", False),
+        "night": top.get("night", False),
+        "combos": combos,
+    }
+
+
+def _to_entry(row):
+    return {
+        "ROWID": row["ROWID"],
+        "name_key": row.get("name_key", ""),
+        "name": row.get("name", ""),
+        "prescribed_count": int(row.get("prescribed_count") or 0),
+        "combos": _parse_combos(row.get("combos")),
+        "last_prescribed": row.get("last_prescribed", ""),
+    }
+
+
+def _to_row(clinic_id, entry):
+    row = {
+        "clinic_id": clinic_id,
+        "name_key": entry["name_key"],
+        "name": entry["name"],
+        "prescribed_count": str(entry["prescribed_count"]),
+        "combos": json.dumps(entry["combos"]),
+        "last_prescribed": entry.get("last_prescribed", ""),
+    }
+    if entry.get("ROWID"):
+        row["ROWID"] = entry["ROWID"]
+    return row
+
+
+class _Loaded:
+    def __init__(self, catalog, version):
+        self.catalog = catalog
+        self.version = version
+        self.loaded = time.monotonic()
+        self.checked = self.loaded
+
+
+_catalogs = {}
+_catalogs_guard = threading.Lock()
+_load_locks = defaultdict(threading.Lock)
+
+
+def _version_key(clinic_id):
+    return f"{CATALOG_CACHE_PREFIX}{clinic_id}"
+
+
+def _read_version(app, clinic_id):
+    try:
+        result = get_cache_segment(app).get(_version_key(clinic_id))
+        return (result or {}).get("cache_value") or ""
+    except Exception as e:
+        logger.error(f"Failed to read medicine catalog version: {e}")
+        return ""
+
+
+def _bump_version(app, clinic_id):
+    """Mark the clinic's catalog changed so other instances reload it. Returns the new version."""
+    version = uuid.uuid4().hex[:8]
+    try:
+        get_cache_segment(app).put(_version_key(clinic_id), version, CATALOG_CACHE_HOURS)
+    except Exception as e:
+        logger.error(f"Failed to publish medicine catalog version: {e}")
+    return version
+
+
+def get_medicine_catalog(app, clinic_id):
+    """
+    The clinic's MedicineCatalog: from this instance's memory when fresh, else
+    loaded from the MedicineCatalog table (one row per distinct medicine).
+    """
+    clinic_id = str(clinic_id)
+    loaded = _catalogs.get(clinic_id)
+    if loaded and time.monotonic() - loaded.checked < CATALOG_CHECK_SECONDS:
+        return loaded.catalog
+
+    with _load_locks[clinic_id]:
+        loaded = _catalogs.get(clinic_id)
+        now = time.monotonic()
+        if loaded and now - loaded.checked < CATALOG_CHECK_SECONDS:
+            return loaded.catalog
+
+        version = _read_version(app, clinic_id)
+        if loaded and version == loaded.version and now - loaded.loaded < CATALOG_MAX_AGE_SECONDS:
+            loaded.checked = now
+            return loaded.catalog
+
+        catalog = MedicineCatalog(
+            _to_entry(row[TABLE_MEDICINE_CATALOG])
+            for row in iter_rows(app, TABLE_MEDICINE_CATALOG, ", ".join(CATALOG_COLUMNS[1:]),
+                                 f"clinic_id = '{clinic_id}'")
+        )
+        with _catalogs_guard:
+            _catalogs[clinic_id] = _Loaded(catalog, version)
+        logger.info(f"Medicine catalog loaded for clinic {clinic_id}: {len(catalog)} medicine(s)")
+        return catalog
+
+
+def suggest_medicines(app, clinic_id, query, limit=DEFAULT_LIMIT):
+    """Most prescribed medicines of a clinic whose name matches the typed prefix."""
+    return get_medicine_catalog(app, clinic_id).suggest(query, limit)
+
+
+def record_medicines(app, clinic_id, medicines, prescribed_date=None):
+    """
+    Count the medicines of a new prescription into the clinic's catalog: one
+    query for the existing rows, then one bulk update and/or insert.
+    Concurrent prescriptions of the same medicine can lose an increment;
+    rebuild_medicine_catalog() recounts exactly. Failures are logged, never raised.
+    """
+    clinic_id = str(clinic_id)
+    prescribed_date = prescribed_date or ist_today()
+    used = {}
+    for med in medicines or []:
+        if not isinstance(med, dict):
+            continue
+        name = " ".join(str(med.get("name", "") or "").split())
+        key = name_key(name)
+        if key and key not in used:
+            used[key] = (name, _combo(med))
+    if not used:
+        return False
+
+    try:
+        in_list = ", ".join("'{}'".format(key.replace("'", "''")) for key in used)
+        current = {
+            row[TABLE_MEDICINE_CATALOG]["name_key"]: _to_entry(row[TABLE_MEDICINE_CATALOG])
+            for row in iter_rows(app, TABLE_MEDICINE_CATALOG, ", ".join(CATALOG_COLUMNS[1:]),
+                                 f"clinic_id = '{clinic_id}' AND name_key IN ({in_list})")
+        }
+
+        updates, inserts = [], []
+        for key, (name, combo) in used.items():
+            entry = current.get(key)
+            if entry is None:
+                entry = {"name_key": key, "name": name, "prescribed_count": 0, "combos": []}
+                inserts.append(entry)
+            else:
+                updates.append(entry)
+            entry["prescribed_count"] += 1
+            entry["last_prescribed"] = max(entry.get("last_prescribed") or "", prescribed_date)
+            _add_combo(entry["combos"], combo)
+
+        errors = []
+        if updates:
+            errors.extend(bulk_update(app, TABLE_MEDICINE_CATALOG, [_to_row(clinic_id, e) for e in updates])[1])
+        if inserts:
+            rows, insert_errors = bulk_insert(app, TABLE_MEDICINE_CATALOG, [_to_row(clinic_id, e) for e in inserts])
+            errors.extend(insert_errors)
+            for entry, row in zip(inserts, rows):
+                if row is not None:
+                    entry["ROWID"] = row["ROWID"]
+        if errors:
+            logger.error(f"Failed to update medicine catalog for clinic {clinic_id}: {errors[0]['error']}")
+
+        loaded = _catalogs.get(clinic_id)
+        version = _bump_version(app, clinic_id)
+        if loaded:
+            for entry in updates + inserts:
+                loaded.catalog.upsert(entry)
+            loaded.version = version
+        return not errors
+    except Exception as e:
+        logger.error(f"Failed to record medicines in catalog: {e}")
+        return False
+
+
+def rebuild_medicine_catalog(app, clinic_id):
+    """
+    Recount a clinic's catalog from its PrescriptionItems (backfills
+    prescriptions written before the catalog existed and corrects drift).
+    Returns (medicines_written, failed_batches).
+    """
+    clinic_id = str(clinic_id)
+    names = defaultdict(Counter)
+    combos = defaultdict(Counter)
+    last = {}
+    for row in iter_rows(
+        app, TABLE_PRESCRIPTION_ITEMS,
+        "name, name_key, dosage, duration, timing, morning, afternoon, night, prescribed_date",
+        f"clinic_id = '{clinic_id}'",
+    ):
+        item = row[TABLE_PRESCRIPTION_ITEMS]
+        key = item.get("name_key", "")
+        if not key:
+            continue
+        names[key][item.get("name", "")] += 1
+        combos[key][tuple(_combo(item))] += 1
+        last[key] = max(last.get(key, ""), item.get("prescribed_date") or "")
+
+    entries = [
+        {
+            "name_key": key,
+            "name": counter.most_common(1)[0][0],
+            "prescribed_count": sum(counter.values()),
+            "combos": [list(combo) + [count] for combo, count in combos[key].most_common(COMBOS_KEPT)],
+            "last_prescribed": last[key],
+        }
+        for key, counter in names.items()
+    ]
+
+    old_ids = [
+        row[TABLE_MEDICINE_CATALOG]["ROWID"]
+        for row in iter_rows(app, TABLE_MEDICINE_CATALOG, "name_key", f"clinic_id = '{clinic_id}'")
+    ]
+    if old_ids:
+        bulk_delete(app, TABLE_MEDICINE_CATALOG, old_ids)
+    inserted, errors = (
+        bulk_insert(app, TABLE_MEDICINE_CATALOG, [_to_row(clinic_id, e) for e in entries]) if entries else ([], [])
+    )
+    written = sum(1 for row in inserted if row is not None)
+
+    with _catalogs_guard:
+        _catalogs.pop(clinic_id, None)
+    _bump_version(app, clinic_id)
+    logger.info(f"Medicine catalog rebuilt for clinic {clinic_id}: {written} medicine(s)")
+    return written, len(errors)
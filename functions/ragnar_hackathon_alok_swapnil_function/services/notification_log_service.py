@@ -0,0 +1,59 @@
+import logging
+from utils.constants import TABLE_NOTIFICATION_LOG, ist_now
+from services.bulk_service import bulk_insert, ZCQL_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+KIND_FOLLOW_UP = "follow_up"
+# Keyed by clinic rather than patient: one digest per clinic per day
+KIND_DAILY_DIGEST = "daily_digest"
+
+
+def notification_key(kind, recipient_id, ref_date):
+    """
+    One notification of a kind per recipient (a patient, or a clinic for
+    digests) per date, e.g. follow_up:123:2025-01-31.
+    """
+    return f"{kind}:{recipient_id}:{ref_date}"
+
+
+def sent_keys(app, keys):
+    """The subset of `keys` already recorded in NotificationLog, in one IN query per page."""
+    keys = sorted(set(keys))
+    found = set()
+    zcql = app.zcql()
+    for i in range(0, len(keys), ZCQL_PAGE_SIZE):
+        in_list = ", ".join(f"'{key}'" for key in keys[i:i + ZCQL_PAGE_SIZE])
+        rows = zcql.execute_query(
+            f"SELECT notification_key FROM {TABLE_NOTIFICATION_LOG} WHERE notification_key IN ({in_list})"
+        )
+        found.update(row[TABLE_NOTIFICATION_LOG]["notification_key"] for row in (rows or []))
+    return found
+
+
+def record_sent(app, entries):
+    """
+    Record delivered notifications. Each entry has clinic_id, patient_id
+    ("" for clinic notifications such as digests), kind, ref_date and
+    channels (e.g. ["email", "sms"]).
+    Returns the number recorded; a failed batch is logged, and its
+    notifications may be sent again by a later run.
+    """
+    if not entries:
+        return 0
+    sent_at = ist_now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = [{
+        "clinic_id": entry["clinic_id"],
+        "patient_id": entry["patient_id"],
+        "kind": entry["kind"],
+        "ref_date": entry["ref_date"],
+        "notification_key": notification_key(entry["kind"], entry["patient_id"] or entry["clinic_id"],
+                                             entry["ref_date"]),
+        "channels": ",".join(entry["channels"]),
+        "sent_at": sent_at,
+    } for entry in entries]
+    inserted, errors = bulk_insert(app, TABLE_NOTIFICATION_LOG, rows)
+    recorded = sum(1 for row in inserted if row is not None)
+    if errors:
+        logger.error(f"Recorded {recorded} of {len(rows)} sent notification(s)")
+    return recorded
@@ -0,0 +1,357 @@
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from collections import defaultdict
+from utils.constants import TABLE_PATIENTS
+from services.bulk_service import iter_rows
+from services.cache_service import get_cache_segment
+
+logger = logging.getLogger(__name__)
+
+INDEX_CACHE_PREFIX = "patidx_"
+INDEX_CACHE_HOURS = 24
+# Cache values are kept under this size; bigger snapshots are split into chunks
+CACHE_CHUNK_BYTES = 60000
+# How often a warm index checks the cache for writes made on other instances
+INDEX_CHECK_SECONDS = 30
+# A warm index is rebuilt from the Data Store after this long regardless
+INDEX_MAX_AGE_SECONDS = 6 * 3600
+# Upserts kept in the manifest before the snapshot is rewritten
+MAX_DELTA = 50
+
+# Name prefixes longer than this share one index entry
+MAX_PREFIX = 12
+MIN_PHONE_SUFFIX = 3
+DEFAULT_LIMIT = 20
+
+RECORD_FIELDS = ["id", "name", "phone", "email", "age", "gender"]
+
+_TOKEN_RE = re.compile(r"[a-z]+|\d+")
+
+
+def _fold(text):
+    """Lowercase and strip accents."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def name_tokens(name):
+    return [t for t in _TOKEN_RE.findall(_fold(name)) if not t.isdigit()]
+
+
+def phone_digits(phone):
+    return "".join(c for c in (phone or "") if c.isdigit())
+
+
+class PatientIndex:
+    """
+    In-memory search over one clinic's patients: a prefix map over the
+    normalised name tokens and a suffix map over phone digits.
+    """
+
+    def __init__(self, records=()):
+        self._lock = threading.RLock()
+        self.records = {}
+        self._terms = {}
+        self._prefixes = defaultdict(set)
+        self._suffixes = defaultdict(set)
+        for record in records:
+            self.upsert(record)
+
+    def __len__(self):
+        return len(self.records)
+
+    def upsert(self, record):
+        """Add or replace a patient record (dict with RECORD_FIELDS)."""
+        record = {field: str(record.get(field) or "") for field in RECORD_FIELDS}
+        patient_id = record["id"]
+        if not patient_id:
+            return
+        with self._lock:
+            self.remove(patient_id)
+            tokens = name_tokens(record["name"])
+            digits = phone_digits(record["phone"])
+            prefixes = {t[:n] for t in tokens for n in range(1, min(len(t), MAX_PREFIX) + 1)}
+            suffixes = {digits[-n:] for n in range(MIN_PHONE_SUFFIX, len(digits) + 1)}
+            for prefix in prefixes:
+                self._prefixes[prefix].add(patient_id)
+            for suffix in suffixes:
+                self._suffixes[suffix].add(patient_id)
+            self.records[patient_id] = record
+            self._terms[patient_id] = (tokens, digits, prefixes, suffixes)
+
+    def remove(self, patient_id):
+        with self._lock:
+            terms = self._terms.pop(patient_id, None)
+            self.records.pop(patient_id, None)
+            if not terms:
+                return
+            _, _, prefixes, suffixes = terms
+            for prefix in prefixes:
+                self._discard(self._prefixes, prefix, patient_id)
+            for suffix in suffixes:
+                self._discard(self._suffixes, suffix, patient_id)
+
+    @staticmethod
+    def _discard(index, key, patient_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(patient_id)
+            if not ids:
+                del index[key]
+
+    def _score(self, patient_id, words, digits):
+        tokens, phone, _, _ = self._terms[patient_id]
+        score = 0
+        for i, word in enumerate(words):
+            best = 0
+            for j, token in enumerate(tokens):
+                if token == word:
+                    points = 3
+                elif token.startswith(word):
+                    points = 2
+                else:
+                    continue
+                # "ravi ku" ranks Ravi Kumar above Kumar Ravi
+                if i == j:
+                    points += 1
+                best = max(best, points)
+            score += best
+        if digits:
+            score += 5 if phone == digits else 3
+        return score
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Top `limit` patients matching every word of the query. Words match the
+        start of any name token; a run of 3+ digits matches the end of the
+        phone number ("last 4 digits"). Ranked by match quality, then name.
+        """
+        words, digit_parts = [], []
+        for token in _TOKEN_RE.findall(_fold(query)):
+            (digit_parts if token.isdigit() else words).append(token)
+        digits = "".join(digit_parts)
+        if not words and len(digits) < MIN_PHONE_SUFFIX:
+            return []
+
+        with self._lock:
+            candidate_sets = []
+            for word in words:
+                ids = self._prefixes.get(word[:MAX_PREFIX], set())
+                if len(word) > MAX_PREFIX:
+                    ids = {pid for pid in ids if any(t.startswith(word) for t in self._terms[pid][0])}
+                candidate_sets.append(ids)
+            if digits:
+                candidate_sets.append(self._suffixes.get(digits, set()))
+            candidate_sets.sort(key=len)
+            candidates = set(candidate_sets[0])
+            for ids in candidate_sets[1:]:
+                candidates &= ids
+                if not candidates:
+                    return []
+
+            ranked = heapq.nsmallest(
+                limit, candidates,
+                key=lambda pid: (-self._score(pid, words, digits), self.records[pid]["name"].lower(), pid),
+            )
+            return [dict(self.records[pid]) for pid in ranked]
+
+    def snapshot(self):
+        with self._lock:
+            return [[r[field] for field in RECORD_FIELDS] for r in self.records.values()]
+
+
+class _Entry:
+    def __init__(self, index, generation, version):
+        self.index = index
+        self.generation = generation
+        self.version = version
+        self.loaded = time.monotonic()
+        self.checked = self.loaded
+
+
+_entries = {}
+_entries_guard = threading.Lock()
+_build_locks = defaultdict(threading.Lock)
+
+
+def _manifest_key(clinic_id):
+    return f"{INDEX_CACHE_PREFIX}{clinic_id}"
+
+
+def _chunk_key(clinic_id, generation, number):
+    return f"{INDEX_CACHE_PREFIX}{clinic_id}_{generation}_{number}"
+
+
+def _to_record(values):
+    return dict(zip(RECORD_FIELDS, values))
+
+
+def _read_json(segment, key):
+    try:
+        result = segment.get(key)
+        if result and result.get("cache_value"):
+            return json.loads(result["cache_value"])
+    except Exception as e:
+        logger.error(f"Failed to read patient index cache {key}: {e}")
+    return None
+
+
+def _load_from_datastore(app, clinic_id):
+    return PatientIndex(
+        {
+            "id": p["ROWID"], "name": p.get("name"), "phone": p.get("phone"),
+            "email": p.get("email"), "age": p.get("age"), "gender": p.get("gender"),
+        }
+        for p in (
+            row[TABLE_PATIENTS]
+            for row in iter_rows(app, TABLE_PATIENTS, "name, phone, email, age, gender",
+                                 f"clinic_id = '{clinic_id}'")
+        )
+    )
+
+
+def _write_snapshot(segment, clinic_id, index):
+    """Store the index records as chunked cache values. Returns the new manifest."""
+    generation = uuid.uuid4().hex[:8]
+    chunks, current, size = [], [], 0
+    for values in index.snapshot():
+        encoded = len(json.dumps(values))
+        if current and size + encoded > CACHE_CHUNK_BYTES:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(values)
+        size += encoded + 1
+    chunks.append(current)
+
+    for number, chunk in enumerate(chunks):
+        segment.put(_chunk_key(clinic_id, generation, number), json.dumps(chunk), INDEX_CACHE_HOURS)
+    manifest = {"generation": generation, "chunks": len(chunks), "version": 0, "delta": []}
+    segment.put(_manifest_key(clinic_id), json.dumps(manifest), INDEX_CACHE_HOURS)
+    return manifest
+
+
+def _load_snapshot(segment, clinic_id, manifest):
+    """Rebuild an index from cached chunks plus the manifest delta; None if a chunk is gone."""
+    records = []
+    for number in range(manifest["chunks"]):
+        chunk = _read_json(segment, _chunk_key(clinic_id, manifest["generation"], number))
+        if chunk is None:
+            return None
+        records.extend(_to_record(values) for values in chunk)
+    index = PatientIndex(records)
+    for values in manifest.get("delta", []):
+        index.upsert(_to_record(values))
+    return index
+
+
+def get_patient_index(app, clinic_id):
+    """
+    The clinic's PatientIndex: from this instance's memory when fresh, else
+    from the cache snapshot, else built from the Data Store and cached.
+    """
+    clinic_id = str(clinic_id)
+    now = time.monotonic()
+    entry = _entries.get(clinic_id)
+    if entry and now - entry.checked < INDEX_CHECK_SECONDS:
+        return entry.index
+
+    with _build_locks[clinic_id]:
+        entry = _entries.get(clinic_id)
+        if entry and time.monotonic() - entry.checked < INDEX_CHECK_SECONDS:
+            return entry.index
+
+        segment = get_cache_segment(app)
+        manifest = _read_json(segment, _manifest_key(clinic_id))
+
+        stale = entry is not None and now - entry.loaded >= INDEX_MAX_AGE_SECONDS
+        if entry and not stale and manifest and manifest["generation"] == entry.generation:
+            # Same snapshot: pick up patients written on other instances
+            if manifest["version"] != entry.version:
+                for values in manifest.get("delta", []):
+                    entry.index.upsert(_to_record(values))
+                entry.version = manifest["version"]
+            entry.checked = time.monotonic()
+            return entry.index
+
+        # A stale index is rebuilt from the Data Store, which also refreshes the snapshot
+        index = _load_snapshot(segment, clinic_id, manifest) if manifest and not stale else None
+        if index is None:
+            index = _load_from_datastore(app, clinic_id)
+            try:
+                manifest = _write_snapshot(segment, clinic_id, index)
+            except Exception as e:
+                logger.error(f"Failed to cache patient index for clinic {clinic_id}: {e}")
+                manifest = {"generation": "", "version": 0}
+            logger.info(f"Patient index built for clinic {clinic_id}: {len(index)} patient(s)")
+
+        with _entries_guard:
+            _entries[clinic_id] = _Entry(index, manifest["generation"], manifest["version"])
+        return index
+
+
+def search_patient_index(app, clinic_id, query, limit=DEFAULT_LIMIT):
+    """Ranked top-k patients of a clinic matching a name prefix and/or phone suffix."""
+    return get_patient_index(app, clinic_id).search(query, limit)
+
+
+def record_patient(app, clinic_id, patient):
+    """
+    Reflect a created or updated patient in the index, here and (through the
+    manifest delta) on other instances. `patient` is a Patients row or a
+    record with RECORD_FIELDS. Failures are logged, never raised.
+    The manifest is read, changed and written back without a compare-and-set,
+    so two instances recording at once can lose one delta until the index is
+    next rebuilt; patient search checks the Data Store when the index has no
+    match, so such a patient is still found.
+    """
+    clinic_id = str(clinic_id)
+    record = dict(patient, id=patient.get("id") or patient.get("ROWID", ""))
+    values = [str(record.get(field) or "") for field in RECORD_FIELDS]
+    entry = _entries.get(clinic_id)
+    if entry:
+        entry.index.upsert(record)
+
+    try:
+        segment = get_cache_segment(app)
+        manifest = _read_json(segment, _manifest_key(clinic_id))
+        if not manifest:
+            # Nothing cached; the next search builds from the Data Store
+            return
+        previous = manifest["version"]
+        manifest["delta"] = [v for v in manifest.get("delta", []) if v[0] != values[0]] + [values]
+        manifest["version"] = previous + 1
+
+        if len(manifest["delta"]) > MAX_DELTA:
+            if entry and entry.generation == manifest["generation"]:
+                for delta_values in manifest["delta"]:
+                    entry.index.upsert(_to_record(delta_values))
+                manifest = _write_snapshot(segment, clinic_id, entry.index)
+                entry.generation, entry.version = manifest["generation"], manifest["version"]
+            else:
+                invalidate_patient_index(app, clinic_id)
+            return
+
+        segment.put(_manifest_key(clinic_id), json.dumps(manifest), INDEX_CACHE_HOURS)
+        if entry and entry.generation == manifest["generation"] and entry.version == previous:
+            entry.version = manifest["version"]
+    except Exception as e:
+        logger.error(f"Failed to record patient in search index: {e}")
+
+
+def invalidate_patient_index(app, clinic_id):
+    """Drop the clinic's index after bulk changes; the next search rebuilds it."""
+    clinic_id = str(clinic_id)
+    with _entries_guard:
+        _entries.pop(clinic_id, None)
+    try:
+        get_cache_segment(app).delete(_manifest_key(clinic_id))
+        return True
+    except Exception as e:
+        logger.error(f"Failed to invalidate patient index: {e}")
+        return False
@@ -0,0 +1,167 @@
+import json
+import logging
+import uuid
+from utils.constants import TABLE_PATIENTS, TABLE_APPOINTMENTS, TABLE_PRESCRIPTIONS
+from utils.parallel import run_parallel, query_task
+from services.bulk_service import iter_rows
+from services.cache_service import get_cache_segment
+from services.roster_service import get_roster
+from services.prescription_item_service import load_medicines
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_CACHE_PREFIX = "ptsum_"
+# Every write touching the patient invalidates explicitly
+SUMMARY_CACHE_HOURS = 24
+# Larger summaries are served uncached rather than split across keys
+SUMMARY_CACHE_MAX_BYTES = 60000
+
+PATIENT_FIELDS = ["ROWID", "name", "phone", "email", "age", "gender", "blood_group", "medical_history"]
+
+
+def _summary_key(clinic_id, patient_id):
+    return f"{SUMMARY_CACHE_PREFIX}{clinic_id}_{patient_id}"
+
+
+def _epoch_key(clinic_id):
+    return f"{SUMMARY_CACHE_PREFIX}epoch_{clinic_id}"
+
+
+def build_patient_summary(app, clinic_id, patient_id):
+    """
+    Load a patient with their appointments and prescriptions in one parallel
+    round. Returns None if the patient is not in the clinic, else
+    {"patient", "counts", "timeline"} with the timeline newest first.
+    """
+    scope = f"clinic_id = '{clinic_id}' AND patient_id = '{patient_id}'"
+    loaded = run_parallel({
+        "patient": query_task(app, (
+            f"SELECT {', '.join(PATIENT_FIELDS)} FROM {TABLE_PATIENTS} "
+            f"WHERE ROWID = '{patient_id}' AND clinic_id = '{clinic_id}'"
+        )),
+        "appointments": lambda: list(iter_rows(
+            app, TABLE_APPOINTMENTS,
+            "doctor_id, appointment_date, appointment_time, status, token_number, notes, feedback_score",
+            scope,
+        )),
+        "prescriptions": lambda: list(iter_rows(
+            app, TABLE_PRESCRIPTIONS,
+            "appointment_id, doctor_id, diagnosis, medicines, advice, follow_up_date, CREATEDTIME",
+            scope,
+        )),
+        "roster": lambda: get_roster(app, clinic_id),
+    })
+    if not loaded["patient"]:
+        return None
+
+    p = loaded["patient"][0][TABLE_PATIENTS]
+    patient = {field: p.get(field, "") for field in PATIENT_FIELDS}
+    patient["id"] = patient.pop("ROWID")
+    doctors = {d["ROWID"]: d["name"] for d in loaded["roster"]}
+    medicines = load_medicines(app, clinic_id, [row[TABLE_PRESCRIPTIONS] for row in loaded["prescriptions"]])
+
+    appointments = {}
+    timeline = []
+    for row in loaded["appointments"]:
+        a = row[TABLE_APPOINTMENTS]
+        entry = {
+            "type": "appointment",
+            "id": a["ROWID"],
+            "date": a.get("appointment_date", ""),
+            "time": a.get("appointment_time", ""),
+            "doctor_id": a.get("doctor_id", ""),
+            "doctor_name": doctors.get(a.get("doctor_id"), ""),
+            "status": a.get("status", ""),
+            "token_number": a.get("token_number", ""),
+            "notes": a.get("notes", ""),
+            "feedback_score": a.get("feedback_score", ""),
+            "prescription_id": "",
+        }
+        appointments[entry["id"]] = entry
+        timeline.append(entry)
+
+    for row in loaded["prescriptions"]:
+        rx = row[TABLE_PRESCRIPTIONS]
+        visit = appointments.get(rx.get("appointment_id"))
+        if visit:
+            visit["prescription_id"] = rx["ROWID"]
+        timeline.append({
+            "type": "prescription",
+            "id": rx["ROWID"],
+            "date": visit["date"] if visit else (rx.get("CREATEDTIME") or "")[:10],
+            "time": visit["time"] if visit else "",
+            "appointment_id": rx.get("appointment_id", ""),
+            "doctor_id": rx.get("doctor_id", ""),
+            "doctor_name": doctors.get(rx.get("doctor_id"), ""),
+            "diagnosis": rx.get("diagnosis", ""),
+            "medicines": medicines[rx["ROWID"]],
+            "advice": rx.get("advice", ""),
+            "follow_up_date": rx.get("follow_up_date", ""),
+        })
+
+    # Newest first; a visit is listed just above the prescription written at it
+    timeline.sort(key=lambda e: (e["date"], e["time"], e["type"] == "appointment", e["id"]), reverse=True)
+    return {
+        "patient": patient,
+        "counts": {
+            "appointments": len(appointments),
+            "prescriptions": len(loaded["prescriptions"]),
+        },
+        "timeline": timeline,
+    }
+
+
+def get_patient_summary(app, clinic_id, patient_id):
+    """The patient summary from cache, built and cached on a miss. None if not found."""
+    key = _summary_key(clinic_id, patient_id)
+    epoch = ""
+    try:
+        cached = run_parallel({
+            "summary": lambda: get_cache_segment(app).get(key),
+            "epoch": lambda: get_cache_segment(app).get(_epoch_key(clinic_id)),
+        })
+        epoch = (cached["epoch"] or {}).get("cache_value") or ""
+        value = (cached["summary"] or {}).get("cache_value")
+        if value:
+            entry = json.loads(value)
+            # Entries written before the clinic's last bulk invalidation are stale
+            if entry.get("epoch", "") == epoch:
+                return entry["summary"]
+    except Exception as e:
+        logger.error(f"Failed to read patient summary cache: {e}")
+
+    summary = build_patient_summary(app, clinic_id, patient_id)
+    if summary is None:
+        return None
+    encoded = json.dumps({"epoch": epoch, "summary": summary})
+    if len(encoded) <= SUMMARY_CACHE_MAX_BYTES:
+        try:
+            get_cache_segment(app).put(key, encoded, SUMMARY_CACHE_HOURS)
+        except Exception as e:
+            logger.error(f"Failed to cache patient summary: {e}")
+    return summary
+
+
+def invalidate_patient_summary(app, clinic_id, patient_id):
+    """Drop a patient's cached summary after a write that touches them."""
+    if not patient_id:
+        return False
+    try:
+        get_cache_segment(app).delete(_summary_key(clinic_id, patient_id))
+        return True
+    except Exception as e:
+        logger.error(f"Failed to invalidate patient summary: {e}")
+        return False
+
+
+def invalidate_clinic_summaries(app, clinic_id):
+    """
+    Drop every cached summary of a clinic at once, for bulk writes that touch
+    many patients: the clinic's epoch changes and older entries stop matching.
+    """
+    try:
+        get_cache_segment(app).put(_epoch_key(clinic_id), uuid.uuid4().hex[:8], SUMMARY_CACHE_HOURS)
+        return True
+    except Exception as e:
+        logger.error(f"Failed to invalidate clinic summaries: {e}")
+        return False
@@ -0,0 +1,215 @@
+import json
+import logging
+from collections import Counter, defaultdict
+from utils.constants import TABLE_PRESCRIPTIONS, TABLE_PRESCRIPTION_ITEMS, TABLE_APPOINTMENTS
+from services.bulk_service import iter_rows, bulk_insert, bulk_delete
+
+logger = logging.getLogger(__name__)
+
+# Prescription ids per IN (...) when hydrating many prescriptions
+HYDRATE_IN_SIZE = 50
+
+ITEM_COLUMNS = [
+    "clinic_id", "prescription_id", "doctor_id", "patient_id", "prescribed_date", "position",
+    "name", "name_key", "dosage", "morning", "afternoon", "night", "timing", "duration",
+    "notes", "instructions",
+]
+_DOSE_SLOTS = ("morning", "afternoon", "night")
+
+
+def name_key(name):
+    """Grouping key for a medicine name: lowercased, whitespace collapsed."""
+    return " ".join((name or "").lower().split())
+
+
+def parse_medicines_json(medicines):
+    """The legacy Prescriptions.medicines JSON as a list ([] if unreadable)."""
+    try:
+        parsed = json.loads(medicines or "[]")
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def item_rows(prescription, medicines, prescribed_date):
+    """PrescriptionItems rows for one prescription row and its medicines list."""
+    rows = []
+    for position, med in enumerate(medicines):
+        if not isinstance(med, dict) or not str(med.get("name", "")).strip():
+            continue
+        name = str(med["name"]).strip()
+        row = {
+            "clinic_id": prescription["clinic_id"],
+            "prescription_id": prescription["ROWID"],
+            "doctor_id": prescription.get("doctor_id", ""),
+            "patient_id": prescription.get("patient_id", ""),
+            "prescribed_date": prescribed_date,
+            "position": str(position),
+            "name": name,
+            "name_key": name_key(name),
+            "dosage": str(med.get("dosage", "") or ""),
+            "timing": str(med.get("when", "") or ""),
+            "duration": str(med.get("duration", "") or ""),
+            "notes": str(med.get("notes", "") or ""),
+            "instructions": str(med.get("instructions", "") or ""),
+        }
+        for slot in _DOSE_SLOTS:
+            row[slot] = "1" if med.get(slot) else "0"
+        rows.append(row)
+    return rows
+
+
+def write_items(app, prescription, medicines, prescribed_date):
+    """Insert the items of a newly created prescription. Returns the number written."""
+    rows = item_rows(prescription, medicines, prescribed_date)
+    if not rows:
+        return 0
+    inserted, errors = bulk_insert(app, TABLE_PRESCRIPTION_ITEMS, rows)
+    if errors:
+        logger.error(f"Failed to write items for prescription {prescription['ROWID']}: {errors[0]['error']}")
+    return sum(1 for row in inserted if row is not None)
+
+
+def _to_medicine(item):
+    """An items row back in the shape the consultation screen submits."""
+    med = {
+        "name": item.get("name", ""),
+        "dosage": item.get("dosage", ""),
+        "when": item.get("timing", ""),
+        "duration": item.get("duration", ""),
+        "notes": item.get("notes", ""),
+        "instructions": item.get("instructions", ""),
+    }
+    for slot in _DOSE_SLOTS:
+        med[slot] = item.get(slot) == "1"
+    med["frequency"] = "-".join("1" if med[slot] else "0" for slot in _DOSE_SLOTS)
+    med["frequency_label"] = ", ".join(slot.capitalize() for slot in _DOSE_SLOTS if med[slot])
+    return med
+
+
+def load_medicines(app, clinic_id, prescriptions):
+    """
+    Medicines for a list of Prescriptions rows (each with ROWID and the legacy
+    `medicines` column), hydrated from PrescriptionItems with one query per
+    HYDRATE_IN_SIZE prescriptions. Rows without items (written before the
+    table existed) fall back to their JSON. Returns {prescription_id: [medicine]}.
+    """
+    ids = [rx["ROWID"] for rx in prescriptions]
+    found = defaultdict(list)
+    for start in range(0, len(ids), HYDRATE_IN_SIZE):
+        in_list = ", ".join(f"'{pid}'" for pid in ids[start:start + HYDRATE_IN_SIZE])
+        for row in iter_rows(
+            app, TABLE_PRESCRIPTION_ITEMS, ", ".join(ITEM_COLUMNS),
+            f"clinic_id = '{clinic_id}' AND prescription_id IN ({in_list})",
+        ):
+            item = row[TABLE_PRESCRIPTION_ITEMS]
+            found[item["prescription_id"]].append(item)
+
+    medicines = {}
+    for rx in prescriptions:
+        items = found.get(rx["ROWID"])
+        if items:
+            items.sort(key=lambda i: int(i.get("position") or 0))
+            medicines[rx["ROWID"]] = [_to_medicine(i) for i in items]
+        else:
+            medicines[rx["ROWID"]] = parse_medicines_json(rx.get("medicines"))
+    return medicines
+
+
+def rebuild_items(app, clinic_id):
+    """
+    Rewrite every PrescriptionItems row of a clinic from the prescriptions'
+    medicines JSON (backfills prescriptions created before the table existed).
+    Returns (items_written, failed_batches).
+    """
+    visit_dates = {
+        row[TABLE_APPOINTMENTS]["ROWID"]: row[TABLE_APPOINTMENTS].get("appointment_date", "")
+        for row in iter_rows(app, TABLE_APPOINTMENTS, "appointment_date", f"clinic_id = '{clinic_id}'")
+    }
+    rows = []
+    for row in iter_rows(
+        app, TABLE_PRESCRIPTIONS, "clinic_id, appointment_id, doctor_id, patient_id, medicines, CREATEDTIME",
+        f"clinic_id = '{clinic_id}'",
+    ):
+        rx = row[TABLE_PRESCRIPTIONS]
+        prescribed = visit_dates.get(rx.get("appointment_id")) or (rx.get("CREATEDTIME") or "")[:10]
+        rows.extend(item_rows(rx, parse_medicines_json(rx.get("medicines")), prescribed))
+
+    old_ids = [
+        row[TABLE_PRESCRIPTION_ITEMS]["ROWID"]
+        for row in iter_rows(app, TABLE_PRESCRIPTION_ITEMS, "prescription_id", f"clinic_id = '{clinic_id}'")
+    ]
+    if old_ids:
+        bulk_delete(app, TABLE_PRESCRIPTION_ITEMS, old_ids)
+    inserted, errors = bulk_insert(app, TABLE_PRESCRIPTION_ITEMS, rows) if rows else ([], [])
+    written = sum(1 for row in inserted if row is not None)
+    logger.info(f"Prescription items rebuilt for clinic {clinic_id}: {written} item(s)")
+    return written, len(errors)
+
+
+def get_drug_usage(app, clinic_id, date_from, date_to, doctor_id=None, name=None, top_k=50):
+    """
+    How often each medicine was prescribed in a date range, aggregated from
+    PrescriptionItems: prescriptions, distinct patients and doctors, and the
+    most common dosage, duration and timing.
+    """
+    where = (
+        f"clinic_id = '{clinic_id}' AND prescribed_date >= '{date_from}' "
+        f"AND prescribed_date <= '{date_to}'"
+    )
+    if doctor_id:
+        where += f" AND doctor_id = '{doctor_id}'"
+    if name:
+        where += f" AND name_key = '{name_key(name)}'"
+
+    usage = defaultdict(lambda: {
+        "names": Counter(), "prescriptions": set(), "patients": set(), "doctors": set(),
+        "dosage": Counter(), "duration": Counter(), "timing": Counter(),
+    })
+    prescriptions = set()
+    total_items = 0
+    for row in iter_rows(
+        app, TABLE_PRESCRIPTION_ITEMS,
+        "prescription_id, doctor_id, patient_id, name, name_key, dosage, duration, timing", where,
+    ):
+        item = row[TABLE_PRESCRIPTION_ITEMS]
+        u = usage[item["name_key"]]
+        u["names"][item.get("name", "")] += 1
+        u["prescriptions"].add(item["prescription_id"])
+        u["patients"].add(item.get("patient_id", ""))
+        u["doctors"].add(item.get("doctor_id", ""))
+        for field in ("dosage", "duration", "timing"):
+            if item.get(field):
+                u[field][item[field]] += 1
+        prescriptions.add(item["prescription_id"])
+        total_items += 1
+
+    def top(counter):
+        return counter.most_common(1)[0][0] if counter else ""
+
+    medicines = sorted(
+        (
+            {
+                "name": top(u["names"]),
+                "name_key": key,
+                "count": sum(u["names"].values()),
+                "prescriptions": len(u["prescriptions"]),
+                "patients": len(u["patients"]),
+                "doctors": len(u["doctors"]),
+                "top_dosage": top(u["dosage"]),
+                "top_duration": top(u["duration"]),
+                "top_timing": top(u["timing"]),
+            }
+            for key, u in usage.items()
+        ),
+        key=lambda m: (-m["count"], m["name_key"]),
+    )
+    return {
+        "from": date_from,
+        "to": date_to,
+        "doctor_id": doctor_id or "",
+        "total_items": total_items,
+        "total_prescriptions": len(prescriptions),
+        "distinct_medicines": len(medicines),
+        "medicines": medicines[:top_k],
+    }
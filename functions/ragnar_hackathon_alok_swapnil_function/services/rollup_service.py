@@ -0,0 +1,253 @@
+import json
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import date as _date_type, timedelta
+from utils.constants import (
+    TABLE_APPOINTMENTS, TABLE_FEEDBACK_ROLLUPS,
+    SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE, SENTIMENT_NEUTRAL, SENTIMENT_PENDING,
+)
+from services.bulk_service import iter_rows, bulk_insert, bulk_update, bulk_delete
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = [SENTIMENT_POSITIVE, SENTIMENT_NEGATIVE, SENTIMENT_NEUTRAL, SENTIMENT_PENDING]
+SCORES = [1, 2, 3, 4, 5]
+# Keyword counts kept per rollup row; the long tail is dropped
+ROLLUP_KEYWORDS_KEPT = 50
+
+COUNT_FIELDS = ["feedback_count", "score_sum"] + [f"score_{s}" for s in SCORES] + SENTIMENTS
+ROLLUP_FIELDS = ["ROWID", "clinic_id", "doctor_id", "week_start"] + COUNT_FIELDS + ["keyword_counts"]
+
+# Serialises read-modify-write of rollup rows within an instance only; across
+# instances two deltas to the same row can lose an increment (see apply_delta)
+_write_lock = threading.Lock()
+
+
+def week_start(appointment_date):
+    """Monday of the week containing a YYYY-MM-DD date."""
+    day = _date_type.fromisoformat(appointment_date)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def split_keywords(keywords_str):
+    """The stored comma string as a list of keywords."""
+    return [k.strip() for k in (keywords_str or "").split(",") if k.strip()]
+
+
+class RollupDelta:
+    """Pending increments for rollup rows, keyed by (clinic_id, doctor_id, week_start)."""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+        self.keywords = defaultdict(Counter)
+
+    def add_feedback(self, clinic_id, doctor_id, appointment_date, score, sentiment, keywords=()):
+        """Count one newly submitted feedback."""
+        if not appointment_date:
+            return
+        key = (str(clinic_id), str(doctor_id), week_start(appointment_date))
+        counts = self.counts[key]
+        counts["feedback_count"] += 1
+        try:
+            score = int(score)
+        except (TypeError, ValueError):
+            score = 0
+        if score in SCORES:
+            counts["score_sum"] += score
+            counts[f"score_{score}"] += 1
+        if sentiment in SENTIMENTS:
+            counts[sentiment] += 1
+        self.keywords[key].update(k.lower() for k in keywords)
+
+    def add_enrichment(self, clinic_id, doctor_id, appointment_date, sentiment, keywords=()):
+        """Move one feedback from pending to its analysed sentiment and count its keywords."""
+        if not appointment_date:
+            return
+        key = (str(clinic_id), str(doctor_id), week_start(appointment_date))
+        counts = self.counts[key]
+        counts[SENTIMENT_PENDING] -= 1
+        if sentiment in SENTIMENTS:
+            counts[sentiment] += 1
+        self.keywords[key].update(k.lower() for k in keywords)
+
+    def keys(self):
+        return set(self.counts) | set(self.keywords)
+
+
+def _empty_rollup(clinic_id, doctor_id, week):
+    row = {"clinic_id": clinic_id, "doctor_id": doctor_id, "week_start": week, "keyword_counts": "{}"}
+    row.update({field: "0" for field in COUNT_FIELDS})
+    return row
+
+
+def _parse_rollup(row):
+    parsed = {field: row.get(field, "") for field in ("ROWID", "clinic_id", "doctor_id", "week_start")}
+    for field in COUNT_FIELDS:
+        try:
+            parsed[field] = int(row.get(field) or 0)
+        except (TypeError, ValueError):
+            parsed[field] = 0
+    try:
+        parsed["keyword_counts"] = Counter(json.loads(row.get("keyword_counts") or "{}"))
+    except ValueError:
+        parsed["keyword_counts"] = Counter()
+    return parsed
+
+
+def _serialise_rollup(parsed):
+    row = {field: parsed[field] for field in ("clinic_id", "doctor_id", "week_start")}
+    for field in COUNT_FIELDS:
+        row[field] = str(max(parsed[field], 0))
+    kept = dict(parsed["keyword_counts"].most_common(ROLLUP_KEYWORDS_KEPT))
+    row["keyword_counts"] = json.dumps({k: v for k, v in kept.items() if v > 0})
+    if parsed.get("ROWID"):
+        row["ROWID"] = parsed["ROWID"]
+    return row
+
+
+def _merge(parsed, delta, key):
+    for field, amount in delta.counts[key].items():
+        parsed[field] += amount
+    parsed["keyword_counts"].update(delta.keywords[key])
+    return _serialise_rollup(parsed)
+
+
+def _in_list(values):
+    return ", ".join(f"'{v}'" for v in sorted(values))
+
+
+def apply_delta(app, delta):
+    """
+    Add a RollupDelta to the stored rollups: one query for the affected rows,
+    then a batched update for existing rows and a batched insert for new ones.
+    The Data Store has no atomic increment, so deltas applied to the same row
+    by two instances at once can lose one of them (or insert the row twice);
+    the nightly /api/cron/rebuild-rollups run recounts every clinic from its
+    appointments and corrects that drift.
+    Returns True on success; failures are logged (rebuild_rollups repairs).
+    """
+    keys = delta.keys()
+    if not keys:
+        return True
+    clinic_ids = {k[0] for k in keys}
+    weeks = {k[2] for k in keys}
+
+    try:
+        with _write_lock:
+            existing = {}
+            for row in iter_rows(
+                app, TABLE_FEEDBACK_ROLLUPS, ", ".join(ROLLUP_FIELDS[1:]),
+                f"clinic_id IN ({_in_list(clinic_ids)}) AND week_start IN ({_in_list(weeks)})",
+            ):
+                parsed = _parse_rollup(row[TABLE_FEEDBACK_ROLLUPS])
+                existing[(parsed["clinic_id"], parsed["doctor_id"], parsed["week_start"])] = parsed
+
+            updates, inserts = [], []
+            for key in keys:
+                parsed = existing.get(key) or _parse_rollup(_empty_rollup(*key))
+                (updates if key in existing else inserts).append(_merge(parsed, delta, key))
+
+            errors = []
+            if updates:
+                errors += bulk_update(app, TABLE_FEEDBACK_ROLLUPS, updates)[1]
+            if inserts:
+                errors += bulk_insert(app, TABLE_FEEDBACK_ROLLUPS, inserts)[1]
+        if errors:
+            logger.error(f"Feedback rollup write failed for {len(errors)} batch(es)")
+            return False
+        return True
+    except Exception as e:
+        logger.error(f"Failed to update feedback rollups: {e}")
+        return False
+
+
+def rebuild_rollups(app, clinic_id):
+    """
+    Recompute every rollup of a clinic from its appointment rows.
+    Used to backfill feedback given before rollups existed, and to repair drift.
+    Returns the number of rollup rows written.
+    """
+    delta = RollupDelta()
+    for row in iter_rows(
+        app, TABLE_APPOINTMENTS,
+        "doctor_id, appointment_date, feedback_score, feedback_sentiment, feedback_keywords",
+        f"clinic_id = '{clinic_id}' AND feedback_score != ''",
+    ):
+        a = row[TABLE_APPOINTMENTS]
+        delta.add_feedback(clinic_id, a.get("doctor_id", ""), a.get("appointment_date", ""),
+                           a.get("feedback_score"), a.get("feedback_sentiment") or SENTIMENT_NEUTRAL,
+                           split_keywords(a.get("feedback_keywords")))
+
+    with _write_lock:
+        old_ids = [
+            row[TABLE_FEEDBACK_ROLLUPS]["ROWID"]
+            for row in iter_rows(app, TABLE_FEEDBACK_ROLLUPS, "week_start", f"clinic_id = '{clinic_id}'")
+        ]
+        if old_ids:
+            bulk_delete(app, TABLE_FEEDBACK_ROLLUPS, old_ids)
+
+        rows = [_merge(_parse_rollup(_empty_rollup(*key)), delta, key) for key in delta.keys()]
+        inserted, errors = bulk_insert(app, TABLE_FEEDBACK_ROLLUPS, rows) if rows else ([], [])
+
+    if errors:
+        logger.error(f"Feedback rollup rebuild for clinic {clinic_id} failed for {len(errors)} batch(es)")
+    return sum(1 for row in inserted if row is not None)
+
+
+def _nps(promoters, detractors, total):
+    """Net promoter score on a 1-5 scale: 5 promotes, 1-3 detract."""
+    return round((promoters - detractors) * 100.0 / total, 1) if total else None
+
+
+def _summarise(rollups):
+    total = sum(r["feedback_count"] for r in rollups)
+    scored = sum(r[f"score_{s}"] for r in rollups for s in SCORES)
+    score_sum = sum(r["score_sum"] for r in rollups)
+    promoters = sum(r["score_5"] for r in rollups)
+    detractors = sum(r["score_1"] + r["score_2"] + r["score_3"] for r in rollups)
+    return {
+        "total": total,
+        "average_score": round(score_sum / scored, 2) if scored else None,
+        "nps": _nps(promoters, detractors, scored),
+    }
+
+
+def get_feedback_analytics(app, clinic_id, date_from, date_to, doctor_id=None, top_k=15):
+    """
+    Feedback analytics for a clinic from the weekly rollups: totals, score
+    distribution, sentiment counts, top keywords, a per-week series and a
+    per-doctor breakdown. Dates are matched by week, so `date_from` and
+    `date_to` are widened to whole weeks.
+    """
+    where = (
+        f"clinic_id = '{clinic_id}' AND week_start >= '{week_start(date_from)}' "
+        f"AND week_start <= '{week_start(date_to)}'"
+    )
+    if doctor_id:
+        where += f" AND doctor_id = '{doctor_id}'"
+    rollups = [
+        _parse_rollup(row[TABLE_FEEDBACK_ROLLUPS])
+        for row in iter_rows(app, TABLE_FEEDBACK_ROLLUPS, ", ".join(ROLLUP_FIELDS[1:]), where)
+    ]
+
+    keywords = Counter()
+    by_week = defaultdict(list)
+    by_doctor = defaultdict(list)
+    for r in rollups:
+        keywords.update(r["keyword_counts"])
+        by_week[r["week_start"]].append(r)
+        by_doctor[r["doctor_id"]].append(r)
+
+    summary = _summarise(rollups)
+    summary.update({
+        "from": date_from,
+        "to": date_to,
+        "doctor_id": doctor_id or "",
+        "score_distribution": {str(s): sum(r[f"score_{s}"] for r in rollups) for s in SCORES},
+        "sentiment": {s: sum(r[s] for r in rollups) for s in SENTIMENTS},
+        "top_keywords": [{"keyword": k, "count": c} for k, c in keywords.most_common(top_k)],
+        "weeks": [dict(_summarise(rows), week_start=week) for week, rows in sorted(by_week.items())],
+        "doctors": [dict(_summarise(rows), doctor_id=doc) for doc, rows in by_doctor.items()],
+    })
+    return summary
@@ -0,0 +1,104 @@
+import json
+import logging
+import time
+from utils.constants import TABLE_DOCTORS
+from services.cache_service import get_cache_segment
+
+logger = logging.getLogger(__name__)
+
+ROSTER_CACHE_PREFIX = "doctors_"
+# Doctors change a few times a month; writes invalidate explicitly
+ROSTER_CACHE_HOURS = 48
+
+# A doctor missing from the cached roster reloads it at most this often per
+# clinic (per instance), so unknown doctor ids cannot force a reload per request
+MISS_REFRESH_SECONDS = 60
+
+DOCTOR_FIELDS = ["ROWID", "name", "specialty", "email", "phone", "available_from",
+                 "available_to", "consultation_fee", "status"]
+
+
+_refreshed_at = {}
+
+
+def _roster_key(clinic_id):
+    return f"{ROSTER_CACHE_PREFIX}{clinic_id}"
+
+
+def _load_roster(app, clinic_id):
+    """Read every doctor (active and inactive) of a clinic from the Data Store."""
+    result = app.zcql().execute_query(
+        f"SELECT {', '.join(DOCTOR_FIELDS)} FROM {TABLE_DOCTORS} "
+        f"WHERE clinic_id = '{clinic_id}' ORDER BY name ASC"
+    )
+    return [
+        {field: row[TABLE_DOCTORS].get(field, "") for field in DOCTOR_FIELDS}
+        for row in (result or [])
+    ]
+
+
+def _read_cached_roster(app, clinic_id):
+    try:
+        result = get_cache_segment(app).get(_roster_key(clinic_id))
+        if result and result.get("cache_value"):
+            return json.loads(result["cache_value"])
+    except Exception as e:
+        logger.error(f"Failed to read doctor roster cache: {e}")
+    return None
+
+
+def refresh_roster(app, clinic_id):
+    """Reload a clinic's roster from the Data Store and cache it."""
+    roster = _load_roster(app, clinic_id)
+    _refreshed_at[clinic_id] = time.monotonic()
+    try:
+        get_cache_segment(app).put(_roster_key(clinic_id), json.dumps(roster), ROSTER_CACHE_HOURS)
+    except Exception as e:
+        logger.error(f"Failed to cache doctor roster: {e}")
+    return roster
+
+
+def get_roster(app, clinic_id):
+    """
+    All doctors of a clinic (active and inactive), sorted by name.
+    Served from cache; loaded and cached on first use.
+    """
+    roster = _read_cached_roster(app, clinic_id)
+    if roster is None:
+        roster = refresh_roster(app, clinic_id)
+    return roster
+
+
+def get_active_doctors(app, clinic_id):
+    """Active doctors of a clinic, sorted by name."""
+    return [d for d in get_roster(app, clinic_id) if d.get("status") == "active"]
+
+
+def get_doctor(app, clinic_id, doctor_id):
+    """
+    Look up one doctor of a clinic in the roster. Returns None if the doctor
+    does not belong to the clinic. A miss reloads the roster in case the
+    cached copy predates the doctor, at most once per MISS_REFRESH_SECONDS.
+    """
+    doctor_id = str(doctor_id)
+    roster = _read_cached_roster(app, clinic_id)
+    if roster is not None:
+        for doctor in roster:
+            if doctor["ROWID"] == doctor_id:
+                return doctor
+        if time.monotonic() - _refreshed_at.get(clinic_id, float("-inf")) < MISS_REFRESH_SECONDS:
+            return None
+    for doctor in refresh_roster(app, clinic_id):
+        if doctor["ROWID"] == doctor_id:
+            return doctor
+    return None
+
+
+def invalidate_roster(app, clinic_id):
+    """Drop a clinic's cached roster after a doctor is added, changed or removed."""
+    try:
+        get_cache_segment(app).delete(_roster_key(clinic_id))
+        return True
+    except Exception as e:
+        logger.error(f"Failed to invalidate doctor roster: {e}")
+        return False
@@ -1,39 +1,108 @@
 import logging
+import re
+from utils.constants import TABLE_PATIENTS
+from utils.phone import phone_key, PHONE_KEY_COLUMN
+from services.bulk_service import iter_rows, bulk_update
 
 logger = logging.getLogger(__name__)
 
+# Search-indexed column holding the patient's terms, each prefixed with the
+# clinic, so a query for one clinic's term never matches another clinic's rows
+SEARCH_KEY_COLUMN = "search_key"
+# Trailing phone digits also indexed as their own term ("last 4 digits")
+PHONE_SUFFIX_DIGITS = 4
+
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tenant_term(clinic_id, term):
+    # ROWIDs are digits, so the "x" separator keeps clinic 12 + "3..." apart from clinic 123
+    return f"c{clinic_id}x{term}"
+
+
+def patient_search_key(clinic_id, name, phone, email):
+    """The search_key value for a patient: clinic-prefixed name, phone and email terms."""
+    terms = _TERM_RE.findall((name or "").lower())
+    digits = "".join(c for c in (phone or "") if c.isdigit())
+    if digits:
+        terms.append(digits)
+        if len(digits) > PHONE_SUFFIX_DIGITS:
+            terms.append(digits[-PHONE_SUFFIX_DIGITS:])
+    local_part = (email or "").lower().split("@")[0]
+    terms.extend(_TERM_RE.findall(local_part))
+    seen = dict.fromkeys(terms)
+    return " ".join(_tenant_term(clinic_id, t) for t in seen)
+
+
+def with_search_key(clinic_id, patient):
+    """A copy of a patient record with its search_key filled in."""
+    return dict(patient, **{SEARCH_KEY_COLUMN: patient_search_key(
+        clinic_id, patient.get("name"), patient.get("phone"), patient.get("email"),
+    )})
+
 
 def search_patients(app, clinic_id, query_text):
     """
-    Search patients using Catalyst Search service.
-    Falls back to ZCQL LIKE query if Search is not configured.
+    Search a clinic's patients using Catalyst Search on the clinic-prefixed
+    search_key column, so the engine only returns this clinic's rows.
+    Returns None if Search is not configured (caller falls back to ZCQL).
     """
+    terms = _TERM_RE.findall((query_text or "").lower())
+    if not terms:
+        return []
+    # The engine matches the most selective (longest) term; the rest are checked here
+    lead = max(terms, key=len)
     try:
         search = app.search()
-        result = search.execute_search_query(
-            query_text,
-            search_table_columns={
-                "Patients": ["name", "phone", "email"]
-            }
-        )
-
-        # Filter results by clinic_id
+        result = search.execute_search_query({
+            "search": f"{_tenant_term(clinic_id, lead)}*",
+            "search_table_columns": {TABLE_PATIENTS: [SEARCH_KEY_COLUMN]},
+        })
+
         patients = []
-        if result:
-            for item in result:
-                row = item.get("Patients", {})
-                if row.get("clinic_id") == str(clinic_id):
-                    patients.append({
-                        "id": row.get("ROWID", ""),
-                        "name": row.get("name", ""),
-                        "phone": row.get("phone", ""),
-                        "email": row.get("email", ""),
-                        "age": row.get("age", ""),
-                        "gender": row.get("gender", ""),
-                    })
+        for row in (result or {}).get(TABLE_PATIENTS, []):
+            # The prefixed terms already scope to the clinic; this guards stale rows
+            if row.get("clinic_id") != str(clinic_id):
+                continue
+            row_terms = (row.get(SEARCH_KEY_COLUMN) or "").split()
+            if not all(any(t.startswith(_tenant_term(clinic_id, q)) for t in row_terms) for q in terms):
+                continue
+            patients.append({
+                "id": row.get("ROWID", ""),
+                "name": row.get("name", ""),
+                "phone": row.get("phone", ""),
+                "email": row.get("email", ""),
+                "age": row.get("age", ""),
+                "gender": row.get("gender", ""),
+            })
         logger.info(f"Search returned {len(patients)} results for '{query_text}'")
         return patients
 
     except Exception as e:
         logger.warning(f"Catalyst Search failed, falling back to ZCQL: {e}")
         return None  # Caller should fall back to ZCQL
+
+
+def reindex_patient_keys(app, clinic_id):
+    """
+    Recompute search_key and phone_key for every patient of a clinic and
+    write the ones that changed (backfills rows created before the columns
+    existed). Returns (updated_count, failed_batches).
+    """
+    updates = []
+    for row in iter_rows(app, TABLE_PATIENTS, f"name, phone, email, {SEARCH_KEY_COLUMN}, {PHONE_KEY_COLUMN}",
+                         f"clinic_id = '{clinic_id}'"):
+        p = row[TABLE_PATIENTS]
+        keys = {
+            SEARCH_KEY_COLUMN: patient_search_key(clinic_id, p.get("name"), p.get("phone"), p.get("email")),
+            PHONE_KEY_COLUMN: phone_key(p.get("phone")),
+        }
+        if any(value != p.get(column) for column, value in keys.items()):
+            updates.append(dict(keys, ROWID=p["ROWID"]))
+
+    if not updates:
+        return 0, 0
+    updated, errors = bulk_update(app, TABLE_PATIENTS, updates)
+    count = sum(1 for row in updated if row is not None)
+    logger.info(f"Lookup keys reindexed for clinic {clinic_id}: {count} patient(s)")
+    return count, len(errors)
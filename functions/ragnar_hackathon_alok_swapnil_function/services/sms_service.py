@@ -13,6 +13,8 @@ import os
 import logging
 import requests
 from requests.auth import HTTPBasicAuth
+from utils.phone import phone_key
+from services.template_service import register_template
 
 logger = logging.getLogger(__name__)
 
@@ -36,13 +38,11 @@ def _send_sms(to_phone, body):
         logger.warning("[SMS] Twilio credentials not configured. Skipping SMS.")
         return False
 
-    # Ensure Indian format: +91XXXXXXXXXX
-    phone = to_phone.strip()
-    if not phone.startswith("+"):
-        if phone.startswith("91") and len(phone) >= 12:
-            phone = f"+{phone}"
-        else:
-            phone = f"+91{phone}"
+    # E.164, Indian numbers by default: +91XXXXXXXXXX
+    phone = phone_key(to_phone)
+    if not phone:
+        logger.warning(f"[SMS] Invalid phone number '{to_phone}'. Skipping SMS.")
+        return False
 
     try:
         url = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
@@ -66,17 +66,39 @@ def _send_sms(to_phone, body):
         return False
 
 
+BOOKING_SMS = register_template("booking_sms", (
+    "Hi {{patient_name}}! Your appointment is confirmed.\n\n"
+    "Token: {{token}}\n"
+    "Doctor: Dr. {{doctor_name}}\n"
+    "Date: {{date}}\n"
+    "Time: {{time}}\n"
+    "Clinic: {{clinic_name}}\n\n"
+    "Please arrive 10 mins early. - CareDesk"
+), is_html=False)
+
+PRESCRIPTION_SMS = register_template("prescription_sms", (
+    "Hi {{patient_name}}, your prescription from Dr. {{doctor_name}}:\n\n"
+    "Diagnosis: {{diagnosis}}\n\n"
+    "Medicines:\n{{medicines}}\n\n"
+    "Advice: {{advice}}"
+    "{{follow_up}}"
+    "\n\n- CareDesk"
+), is_html=False)
+
+FOLLOW_UP_SMS = register_template("follow_up_reminder_sms", (
+    "Hi {{patient_name}}! Reminder: Your follow-up with Dr. {{doctor_name}} "
+    "is on {{follow_up_date}}.\n\n"
+    "Please book your appointment at {{clinic_name}}.\n\n"
+    "Stay healthy! - CareDesk"
+), is_html=False)
+
+
 def send_booking_sms(phone, patient_name, doctor_name, token, time, date, clinic_name):
     """Send appointment booking confirmation SMS."""
-    body = (
-        f"Hi {patient_name}! Your appointment is confirmed.\n\n"
-        f"Token: {token}\n"
-        f"Doctor: Dr. {doctor_name}\n"
-        f"Date: {date}\n"
-        f"Time: {time}\n"
-        f"Clinic: {clinic_name}\n\n"
-        f"Please arrive 10 mins early. - CareDesk"
-    )
+    body = BOOKING_SMS.render({
+        "patient_name": patient_name, "token": token, "doctor_name": doctor_name,
+        "date": date, "time": time, "clinic_name": clinic_name,
+    })
     return _send_sms(phone, body)
 
 
@@ -92,26 +114,18 @@ def send_prescription_sms(phone, patient_name, doctor_name, diagnosis, medicines
 
     med_text = "\n".join(med_lines) if med_lines else "  See prescription for details"
 
-    body = (
-        f"Hi {patient_name}, your prescription from Dr. {doctor_name}:\n\n"
-        f"Diagnosis: {diagnosis}\n\n"
-        f"Medicines:\n{med_text}\n\n"
-        f"Advice: {advice[:100]}"
-    )
-
-    if follow_up:
-        body += f"\n\nFollow-up: {follow_up}"
-
-    body += "\n\n- CareDesk"
+    body = PRESCRIPTION_SMS.render({
+        "patient_name": patient_name, "doctor_name": doctor_name, "diagnosis": diagnosis,
+        "medicines": med_text, "advice": (advice or "")[:100],
+        "follow_up": f"\n\nFollow-up: {follow_up}" if follow_up else "",
+    })
     return _send_sms(phone, body)
 
 
 def send_followup_reminder_sms(phone, patient_name, doctor_name, follow_up_date, clinic_name):
     """Send follow-up appointment reminder SMS (2 days before)."""
-    body = (
-        f"Hi {patient_name}! Reminder: Your follow-up with Dr. {doctor_name} "
-        f"is on {follow_up_date}.\n\n"
-        f"Please book your appointment at {clinic_name}.\n\n"
-        f"Stay healthy! - CareDesk"
-    )
+    body = FOLLOW_UP_SMS.render({
+        "patient_name": patient_name, "doctor_name": doctor_name,
+        "follow_up_date": follow_up_date, "clinic_name": clinic_name,
+    })
     return _send_sms(phone, body)
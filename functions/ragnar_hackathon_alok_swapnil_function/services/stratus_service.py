@@ -4,8 +4,110 @@ import io
 
 logger = logging.getLogger(__name__)
 
+# Pillow is optional — without it logos are stored but no thumbnail is generated
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
 BUCKET_NAME = "caredesk-files"
 
+# Upload limits for streamed uploads; objects up to LOGO_MAX_BYTES go up in
+# one put_object call, larger ones as multipart uploads of UPLOAD_PART_SIZE
+LOGO_MAX_BYTES = 2 * 1024 * 1024
+UPLOAD_PART_SIZE = 5 * 1024 * 1024
+THUMBNAIL_SIZE = (128, 128)
+
+# Magic bytes -> MIME type for accepted image formats
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds its size limit."""
+
+
+def sniff_image_type(head):
+    """Detect the image MIME type from the first bytes of a file. Returns None if unknown."""
+    for signature, mime in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def iter_chunks(stream, max_bytes, chunk_size=UPLOAD_PART_SIZE):
+    """
+    Yield chunks from a file-like stream, raising UploadTooLargeError past
+    max_bytes. Never reads more than one byte past the limit.
+    """
+    total = 0
+    while True:
+        chunk = stream.read(min(chunk_size, max_bytes - total + 1))
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds {max_bytes // 1024} KB limit")
+        yield chunk
+
+
+def upload_stream(app, stream, key, max_bytes, chunk_size=UPLOAD_PART_SIZE):
+    """
+    Stream a file-like object into a Stratus bucket as a multipart upload.
+    Only one part is held in memory at a time. Returns the object key or None.
+    """
+    bucket = app.stratus().bucket(BUCKET_NAME)
+    upload_id = None
+    try:
+        upload = bucket.initiate_multipart_upload(key, {"overwrite": "true"})
+        upload_id = upload.get("upload_id", "")
+        part_number = 0
+        for part_number, chunk in enumerate(iter_chunks(stream, max_bytes, chunk_size), 1):
+            bucket.upload_part(key, upload_id, chunk, part_number, overwrite=True)
+        if part_number == 0:
+            logger.warning(f"Stratus upload skipped, empty stream: {key}")
+            return None
+        bucket.complete_multipart_upload(key, upload_id, overwrite=True)
+        logger.info(f"File streamed to Stratus: {key} ({part_number} part(s))")
+        return key
+    except UploadTooLargeError:
+        raise
+    except Exception as e:
+        logger.error(f"Stratus streamed upload failed for {key} (upload {upload_id}): {e}")
+        return None
+
+
+def upload_object(app, stream, key, max_bytes):
+    """
+    Store a small stream (at most max_bytes) as one Stratus object with a
+    single put_object call, holding at most max_bytes in memory.
+    Returns the object key, or None if the stream is empty or the upload failed.
+    """
+    body = b"".join(iter_chunks(stream, max_bytes))
+    if not body:
+        logger.warning(f"Stratus upload skipped, empty stream: {key}")
+        return None
+    try:
+        app.stratus().bucket(BUCKET_NAME).put_object(key, body, {"overwrite": "true"})
+        logger.info(f"File stored in Stratus: {key} ({len(body)} bytes)")
+        return key
+    except Exception as e:
+        logger.error(f"Stratus upload failed for {key}: {e}")
+        return None
+
 
 def upload_file(app, file_content, file_name, folder="general"):
     """Upload a file to Catalyst Stratus (Cloud Scale / File Store)."""
@@ -33,13 +135,82 @@ def get_file_download_url(app, file_id):
         return None
 
 
-def upload_clinic_logo(app, file_content, clinic_id, file_name):
-    """Upload clinic logo to Stratus."""
-    logo_name = f"logo_{clinic_id}_{file_name}"
-    return upload_file(app, file_content, logo_name, folder="logos")
+def get_object_url(app, key, expiry_in_sec="3600"):
+    """Get a pre-signed download URL for an object in the Stratus bucket."""
+    try:
+        bucket = app.stratus().bucket(BUCKET_NAME)
+        result = bucket.generate_presigned_url(key, "GET", expiry_in_sec=expiry_in_sec)
+        return result.get("signature", "") if result else None
+    except Exception as e:
+        logger.error(f"Stratus presigned URL failed for {key}: {e}")
+        return None
+
+
+def upload_clinic_logo(app, file_stream, clinic_id):
+    """
+    Store a clinic logo in Stratus in one put_object call.
+    Sniffs the first bytes to validate the image type and enforces LOGO_MAX_BYTES.
+    Returns (object_key, content_type); object_key is None on failure and
+    content_type is None when the file is not a supported image.
+    """
+    head = file_stream.read(16)
+    content_type = sniff_image_type(head)
+    if not content_type:
+        return None, None
+
+    key = f"logos/logo_{clinic_id}.{IMAGE_EXTENSIONS[content_type]}"
+    stream = _PrefixedStream(head, file_stream)
+    return upload_object(app, stream, key, LOGO_MAX_BYTES), content_type
+
+
+def upload_logo_thumbnail(app, file_stream, clinic_id):
+    """
+    Generate a small PNG thumbnail of a clinic logo and store it in Stratus.
+    The source stream must be seekable (werkzeug spools uploads to disk).
+    Returns the object key or None if Pillow is unavailable or decoding fails.
+    """
+    if not HAS_PIL:
+        logger.info("Pillow not installed — skipping logo thumbnail")
+        return None
+
+    try:
+        file_stream.seek(0)
+        with Image.open(file_stream) as img:
+            img.draft("RGB", THUMBNAIL_SIZE)
+            img.thumbnail(THUMBNAIL_SIZE)
+            buf = io.BytesIO()
+            img.save(buf, format="PNG", optimize=True)
+        key = f"logos/thumb_{clinic_id}.png"
+        buf.seek(0)
+        return upload_object(app, buf, key, LOGO_MAX_BYTES)
+    except Exception as e:
+        logger.warning(f"Logo thumbnail generation failed (non-critical): {e}")
+        return None
 
 
 def upload_prescription_pdf(app, pdf_content, prescription_id):
     """Upload a prescription PDF to Stratus."""
     pdf_name = f"prescription_{prescription_id}.pdf"
     return upload_file(app, pdf_content, pdf_name, folder="prescriptions")
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Read-only stream that replays already-consumed bytes before the rest of a source."""
+
+    def __init__(self, prefix, source):
+        self._prefix = prefix
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self._prefix:
+            if size is None or size < 0:
+                data, self._prefix = self._prefix + self._source.read(), b""
+                return data
+            data, self._prefix = self._prefix[:size], self._prefix[size:]
+            if len(data) < size:
+                data += self._source.read(size - len(data))
+            return data
+        return self._source.read(size)
@@ -0,0 +1,85 @@
+import logging
+import re
+from html import escape
+
+logger = logging.getLogger(__name__)
+
+# {{field}} is escaped for HTML templates; {{field|raw}} inserts pre-rendered markup as is
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)(\|raw)?\s*\}\}")
+
+_registry = {}
+
+# Per-clinic mail headers (clinic_header); cleared whole when full
+HEADER_CACHE_SIZE = 1024
+_headers = {}
+
+
+class Template:
+    """
+    A notification body parsed once into its literal text and slots, so a
+    render only fills the slots and joins the pieces. Values of an HTML
+    template are escaped unless the slot is marked |raw; text templates
+    (SMS) insert them as is. Missing values render as "".
+    """
+
+    def __init__(self, name, source, is_html=True):
+        self.name = name
+        self.is_html = is_html
+        # Literal text at even positions; each slot's position is filled per render
+        self._pieces = []
+        self._slots = []
+        position = 0
+        for match in _PLACEHOLDER_RE.finditer(source):
+            self._pieces.append(source[position:match.start()])
+            self._slots.append((len(self._pieces), match.group(1), is_html and not match.group(2)))
+            self._pieces.append("")
+            position = match.end()
+        self._pieces.append(source[position:])
+        self.fields = frozenset(field for _, field, _ in self._slots)
+
+    def render(self, values):
+        pieces = self._pieces.copy()
+        get = values.get
+        for index, field, escaped in self._slots:
+            value = get(field, "")
+            # Values are nearly always str already; None and numbers are converted
+            if value.__class__ is not str:
+                value = "" if value is None else str(value)
+            pieces[index] = escape(value) if escaped else value
+        return "".join(pieces)
+
+
+def clinic_header(clinic_id, clinic_name):
+    """
+    The escaped <h1> a clinic's mails open with, built once per clinic and
+    rebuilt when the clinic's name changes. Without a clinic_id it is
+    rendered uncached.
+    """
+    cached = _headers.get(clinic_id) if clinic_id else None
+    if cached is not None and cached[0] == clinic_name:
+        return cached[1]
+    header = CLINIC_HEADER.render({"clinic_name": clinic_name})
+    if clinic_id:
+        if len(_headers) >= HEADER_CACHE_SIZE:
+            _headers.clear()
+        _headers[clinic_id] = (clinic_name, header)
+    return header
+
+
+def register_template(name, source, is_html=True):
+    """Parse and register a template (once per container, at import). Returns it."""
+    template = Template(name, source, is_html)
+    _registry[name] = template
+    return template
+
+
+def get_template(name):
+    """A registered template by name; KeyError if unknown."""
+    return _registry[name]
+
+
+def render(name, **values):
+    return _registry[name].render(values)
+
+
+CLINIC_HEADER = register_template("clinic_header", '<h1 style="margin: 0;">{{clinic_name}}</h1>')
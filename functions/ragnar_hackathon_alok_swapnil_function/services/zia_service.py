@@ -55,3 +55,63 @@ def perform_ocr(app, file_path):
     except Exception as e:
         logger.error(f"OCR failed: {e}")
         return ""
+
+
+# Zia text analytics accepts a handful of documents per request
+ZIA_BATCH_SIZE = 10
+
+
+def _document_sentiment(item):
+    """Read the label from one per-document sentiment result."""
+    if not isinstance(item, dict):
+        return "neutral"
+    if item.get("sentiment"):
+        return item["sentiment"].lower()
+    predictions = item.get("sentiment_prediction") or []
+    if predictions and predictions[0].get("document_sentiment"):
+        return predictions[0]["document_sentiment"].lower()
+    return "neutral"
+
+
+def _document_keywords(item):
+    """Read keywords and keyphrases from one per-document extraction result."""
+    if not isinstance(item, dict):
+        return []
+    extracted = item.get("keyword_extractor") or {}
+    keywords = list(extracted.get("keywords") or [])
+    for phrase in extracted.get("keyphrases") or []:
+        if phrase not in keywords:
+            keywords.append(phrase)
+    return keywords
+
+
+def analyze_sentiment_batch(app, texts):
+    """
+    Sentiment for up to ZIA_BATCH_SIZE texts in one Zia call.
+    Returns labels aligned with `texts`, or None if the call failed.
+    """
+    try:
+        result = app.zia().get_sentiment_analysis(list(texts))
+        if not isinstance(result, list) or len(result) != len(texts):
+            logger.error(f"Sentiment batch returned {len(result or [])} results for {len(texts)} texts")
+            return None
+        return [_document_sentiment(item) for item in result]
+    except Exception as e:
+        logger.error(f"Batch sentiment analysis failed: {e}")
+        return None
+
+
+def extract_keywords_batch(app, texts):
+    """
+    Keywords for up to ZIA_BATCH_SIZE texts in one Zia call.
+    Returns keyword lists aligned with `texts`, or None if the call failed.
+    """
+    try:
+        result = app.zia().get_keyword_extraction(list(texts))
+        if not isinstance(result, list) or len(result) != len(texts):
+            logger.error(f"Keyword batch returned {len(result or [])} results for {len(texts)} texts")
+            return None
+        return [_document_keywords(item) for item in result]
+    except Exception as e:
+        logger.error(f"Batch keyword extraction failed: {e}")
+        return None
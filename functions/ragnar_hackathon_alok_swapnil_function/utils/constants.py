@@ -4,6 +4,11 @@ TABLE_DOCTORS = "Doctors"
 TABLE_PATIENTS = "Patients"
 TABLE_APPOINTMENTS = "Appointments"
 TABLE_PRESCRIPTIONS = "Prescriptions"
+TABLE_FEEDBACK_ROLLUPS = "FeedbackRollups"
+TABLE_PRESCRIPTION_ITEMS = "PrescriptionItems"
+TABLE_MEDICINE_CATALOG = "MedicineCatalog"
+TABLE_JOB_RUNS = "JobRuns"
+TABLE_NOTIFICATION_LOG = "NotificationLog"
 
 # Appointment status flow
 STATUS_BOOKED = "booked"
@@ -39,6 +44,8 @@ GENDERS = ["Male", "Female", "Other"]
 SENTIMENT_POSITIVE = "positive"
 SENTIMENT_NEGATIVE = "negative"
 SENTIMENT_NEUTRAL = "neutral"
+# Stored on submission until the enrichment cron has analysed the text
+SENTIMENT_PENDING = "pending"
 
 # IST timezone helpers (Catalyst servers run in UTC)
 from datetime import datetime, timezone, timedelta, date as _date_type
@@ -0,0 +1,181 @@
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Queries slower than this are logged with their shape and row count
+SLOW_QUERY_MS = float(os.environ.get("CAREDESK_SLOW_QUERY_MS", "300"))
+
+# Data Store table methods that make a network round trip
+DATASTORE_METHODS = {
+    "insert_row", "insert_rows", "update_row", "update_rows", "delete_row",
+    "delete_rows", "get_row", "get_paged_rows", "get_all_rows",
+}
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """Reduce a ZCQL query to its shape: literals become ?, IN lists collapse to IN (...)."""
+    shape = _STRING_LITERAL_RE.sub("?", query)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("IN (...)", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+class RequestStats:
+    """Round-trip counters for one request. Safe to update from worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.zcql_count = 0
+        self.zcql_ms = 0.0
+        self.zcql_rows = 0
+        self.datastore_count = 0
+        self.datastore_ms = 0.0
+        self.shapes = {}
+        self.slow_queries = 0
+
+    def record_query(self, query, elapsed_ms, rows):
+        shape = normalize_query(query)
+        with self._lock:
+            self.zcql_count += 1
+            self.zcql_ms += elapsed_ms
+            self.zcql_rows += rows
+            entry = self.shapes.setdefault(shape, {"count": 0, "ms": 0.0, "rows": 0})
+            entry["count"] += 1
+            entry["ms"] += elapsed_ms
+            entry["rows"] += rows
+            if elapsed_ms >= SLOW_QUERY_MS:
+                self.slow_queries += 1
+        if elapsed_ms >= SLOW_QUERY_MS:
+            logger.warning(f"Slow ZCQL query ({elapsed_ms:.0f}ms, {rows} rows): {shape}")
+
+    def record_datastore(self, table_name, method, elapsed_ms):
+        with self._lock:
+            self.datastore_count += 1
+            self.datastore_ms += elapsed_ms
+        if elapsed_ms >= SLOW_QUERY_MS:
+            logger.warning(f"Slow Data Store call ({elapsed_ms:.0f}ms): {table_name}.{method}")
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def server_timing(self, partial=False):
+        """
+        Value for the Server-Timing response header. A streamed response sends
+        its headers before the body runs, so its timings are marked partial.
+        """
+        with self._lock:
+            value = (
+                f'zcql;dur={self.zcql_ms:.1f};desc="{self.zcql_count} queries", '
+                f'datastore;dur={self.datastore_ms:.1f};desc="{self.datastore_count} calls", '
+                f"total;dur={self.elapsed_ms():.1f}"
+            )
+        if partial:
+            value += ', partial;desc="streamed body not included"'
+        return value
+
+    def summary(self, method, path, status_code, streamed=False):
+        """
+        Structured per-request summary for the access log. For a streamed
+        response, take it once the body is done (response.call_on_close).
+        """
+        with self._lock:
+            repeated = {
+                shape: entry["count"] for shape, entry in self.shapes.items() if entry["count"] > 1
+            }
+            return {
+                "method": method,
+                "path": path,
+                "status": status_code,
+                "duration_ms": round(self.elapsed_ms(), 1),
+                "zcql_queries": self.zcql_count,
+                "zcql_ms": round(self.zcql_ms, 1),
+                "zcql_rows": self.zcql_rows,
+                "zcql_shapes": len(self.shapes),
+                "repeated_shapes": repeated,
+                "datastore_calls": self.datastore_count,
+                "datastore_ms": round(self.datastore_ms, 1),
+                "slow_queries": self.slow_queries,
+                "streamed": streamed,
+            }
+
+
+class _InstrumentedZcql:
+    def __init__(self, zcql, stats):
+        self._zcql = zcql
+        self._stats = stats
+
+    def execute_query(self, query):
+        start = time.perf_counter()
+        rows = None
+        try:
+            rows = self._zcql.execute_query(query)
+            return rows
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            self._stats.record_query(query, elapsed_ms, len(rows) if isinstance(rows, list) else 0)
+
+    def __getattr__(self, name):
+        return getattr(self._zcql, name)
+
+
+class _InstrumentedTable:
+    def __init__(self, table, table_name, stats):
+        self._table = table
+        self._table_name = table_name
+        self._stats = stats
+
+    def __getattr__(self, name):
+        attr = getattr(self._table, name)
+        if name not in DATASTORE_METHODS:
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000.0
+                self._stats.record_datastore(self._table_name, name, elapsed_ms)
+        return timed
+
+
+class _InstrumentedDatastore:
+    def __init__(self, datastore, stats):
+        self._datastore = datastore
+        self._stats = stats
+
+    def table(self, table_name):
+        return _InstrumentedTable(self._datastore.table(table_name), table_name, self._stats)
+
+    def __getattr__(self, name):
+        return getattr(self._datastore, name)
+
+
+class InstrumentedApp:
+    """
+    Wraps the Catalyst app so every ZCQL query and Data Store table call made
+    while serving a request is counted and timed in a RequestStats.
+    """
+
+    def __init__(self, app, stats):
+        self._app = app
+        self.stats = stats
+
+    def zcql(self):
+        return _InstrumentedZcql(self._app.zcql(), self.stats)
+
+    def datastore(self):
+        return _InstrumentedDatastore(self._app.datastore(), self.stats)
+
+    def __getattr__(self, name):
+        return getattr(self._app, name)
@@ -0,0 +1,77 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for independent ZCQL / Data Store calls within a handler
+POOL_SIZE = 16
+# How many tasks one fan-out may have in flight at once
+MAX_CONCURRENCY_PER_REQUEST = 6
+
+_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="caredesk-fanout")
+_worker = threading.local()
+
+
+def _run_task(fn):
+    _worker.active = True
+    try:
+        return fn()
+    finally:
+        _worker.active = False
+
+
+def run_parallel(tasks, max_concurrency=MAX_CONCURRENCY_PER_REQUEST):
+    """
+    Run independent callables concurrently on the shared pool.
+    `tasks` maps a name to a zero-argument callable; returns {name: result}.
+    If any task raises, the remaining tasks still finish and the first
+    failure (in task order) is re-raised.
+    Calls made from inside a pool task run inline so nested fan-outs
+    cannot starve the pool.
+    """
+    names = list(tasks)
+    if len(names) <= 1 or max_concurrency <= 1 or getattr(_worker, "active", False):
+        return {name: tasks[name]() for name in names}
+
+    results = {}
+    failures = {}
+    pending = {}
+    queue = iter(names)
+
+    def submit_next():
+        name = next(queue, None)
+        if name is not None:
+            pending[_pool.submit(_run_task, tasks[name])] = name
+
+    for _ in range(min(max_concurrency, len(names))):
+        submit_next()
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = pending.pop(future)
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failures[name] = e
+            submit_next()
+
+    if failures:
+        first = next(name for name in names if name in failures)
+        logger.warning(f"Parallel task '{first}' failed: {failures[first]}")
+        raise failures[first]
+    return results
+
+
+def query_task(app, query):
+    """A run_parallel task that executes one ZCQL query on its own zcql client."""
+    return lambda: app.zcql().execute_query(query)
+
+
+def run_queries(app, queries, max_concurrency=MAX_CONCURRENCY_PER_REQUEST):
+    """Run independent ZCQL queries concurrently. Maps {name: query} to {name: rows}."""
+    return run_parallel(
+        {name: query_task(app, query) for name, query in queries.items()},
+        max_concurrency=max_concurrency,
+    )
@@ -0,0 +1,74 @@
+"""
+Canonical phone keys.
+
+Patients type the same number many ways ("98765 43210", "+919876543210",
+"09876543210"). phone_key() maps them all to one E.164 string, which is
+stored next to the raw phone in Patients.phone_key and used for every
+lookup by phone (see phone_match for rows written before the column existed).
+"""
+
+DEFAULT_COUNTRY_CODE = "91"
+# Length of a national number in the default country, without trunk prefix
+NATIONAL_DIGITS = 10
+# E.164 allows at most 15 digits after the "+"
+MAX_E164_DIGITS = 15
+MIN_E164_DIGITS = 8
+
+PHONE_KEY_COLUMN = "phone_key"
+
+
+def phone_key(phone):
+    """
+    The E.164 form of a phone number ("+919876543210"), or "" when the
+    input cannot be a phone number. Numbers without a country code are
+    taken to be in DEFAULT_COUNTRY_CODE.
+    """
+    raw = (phone or "").strip()
+    digits = "".join(c for c in raw if c.isdigit())
+    if not digits:
+        return ""
+
+    if raw.startswith("+"):
+        pass
+    elif digits.startswith("00"):
+        # International dialling prefix
+        digits = digits[2:]
+    elif len(digits) == NATIONAL_DIGITS + 1 and digits.startswith("0"):
+        # Trunk prefix: 09876543210
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+    elif len(digits) == NATIONAL_DIGITS:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    elif not (digits.startswith(DEFAULT_COUNTRY_CODE)
+              and len(digits) == len(DEFAULT_COUNTRY_CODE) + NATIONAL_DIGITS):
+        digits = DEFAULT_COUNTRY_CODE + digits.lstrip("0")
+
+    if not MIN_E164_DIGITS <= len(digits) <= MAX_E164_DIGITS:
+        return ""
+    return f"+{digits}"
+
+
+def with_phone_key(patient):
+    """A copy of a patient record with its phone_key filled in."""
+    return dict(patient, **{PHONE_KEY_COLUMN: phone_key(patient.get("phone"))})
+
+
+def _legacy_forms(phone, key):
+    """Ways a number was commonly stored in Patients.phone before phone_key existed."""
+    forms = {(phone or "").strip(), key, key[1:]}
+    if key.startswith("+" + DEFAULT_COUNTRY_CODE) and len(key) == len(DEFAULT_COUNTRY_CODE) + NATIONAL_DIGITS + 1:
+        national = key[-NATIONAL_DIGITS:]
+        forms.update({national, "0" + national})
+    return sorted(form.replace("'", "''") for form in forms if form)
+
+
+def phone_match(phone, table=""):
+    """
+    ZCQL condition matching patients by phone: on phone_key, or on the raw
+    phone column for rows whose phone_key is still empty (written before the
+    column existed and not yet backfilled by POST /api/patients/reindex).
+    `table` qualifies the columns in a JOIN. Call only with a valid phone.
+    """
+    key = phone_key(phone)
+    prefix = f"{table}." if table else ""
+    in_list = ", ".join(f"'{form}'" for form in _legacy_forms(phone, key))
+    return f"({prefix}{PHONE_KEY_COLUMN} = '{key}' OR {prefix}phone IN ({in_list}))"
@@ -0,0 +1,176 @@
+import os
+import re
+import threading
+
+# Longer texts tend to mix praise and complaints; leave those to Zia
+MAX_WORDS = 12
+# Fraction of confident lexicon answers also sent to Zia to measure agreement
+SHADOW_RATE = float(os.environ.get("CAREDESK_SENTIMENT_SHADOW_RATE", "0.05"))
+
+# Word weights, tuned on the feedback_text / feedback_sentiment pairs we hold
+POSITIVE = {
+    "good": 1, "great": 1.5, "excellent": 2, "best": 2, "amazing": 2, "fantastic": 2,
+    "nice": 1, "helpful": 1.5, "thorough": 1.5, "professional": 1, "courteous": 1,
+    "friendly": 1, "gentle": 1, "kind": 1, "caring": 1.5, "polite": 1,
+    "recommend": 1.5, "recommended": 1.5, "grateful": 2, "thanks": 1, "thank": 1,
+    "happy": 1.5, "satisfied": 1.5, "better": 1, "improvement": 1, "improved": 1,
+    "quick": 1, "quickly": 1, "effective": 1, "clearly": 1, "clear": 0.5,
+    "knowledgeable": 1.5, "comfortable": 1, "lifesaver": 2, "saved": 1.5, "bless": 1.5,
+    "loves": 1.5, "love": 1.5, "cleared": 1, "fine": 0.5, "well": 0.5, "consistently": 0.5,
+    "wonderful": 2, "superb": 2, "awesome": 2, "perfect": 2, "smooth": 1, "relieved": 1,
+}
+NEGATIVE = {
+    "bad": 1.5, "rude": 2, "late": 1.5, "wait": 1, "waited": 1, "waiting": 1, "delay": 1.5,
+    "delayed": 1.5, "crowded": 1.5, "rushed": 1.5, "unacceptable": 2, "poor": 1.5,
+    "worst": 2, "terrible": 2, "horrible": 2, "awful": 2, "dirty": 1.5, "long": 0.5,
+    "expensive": 1, "unhelpful": 2, "careless": 2, "disappointed": 2, "disappointing": 2,
+    "slow": 1, "ignored": 2, "unprofessional": 2, "pathetic": 2, "waste": 2, "pain": 0.5,
+    "worse": 1.5, "mess": 1.5, "chaotic": 1.5, "angry": 1.5, "unhappy": 2,
+}
+# Words that mark a lukewarm text on their own ("okay", "average experience")
+NEUTRAL = {"okay", "ok", "average", "decent", "alright", "mediocre", "so-so"}
+
+NEGATORS = {"not", "no", "never", "hardly", "without", "nothing", "nor"}
+INTENSIFIERS = {"very": 1.5, "really": 1.5, "extremely": 2, "so": 1.5, "too": 1.5,
+                "super": 1.5, "highly": 1.5, "truly": 1.5, "most": 1.5}
+# A negator flips the polarity of the next three words; a clause break ends it sooner
+NEGATION_WINDOW = 3
+CLAUSE_BREAKS = {".", ",", "!", "?", ";", "but"}
+# "could have been better", "should be faster", "I wish...": the sentiment words
+# describe what did not happen, so their polarity cannot be read off directly
+MODALS = {"could", "should", "would", "might"}
+MODAL_VERBS = {"have", "ve", "be", "been"}
+WISHES = {"wish", "wished", "hoped", "expected"}
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "is", "was", "were", "are", "be", "been", "to",
+    "of", "in", "on", "at", "for", "with", "my", "me", "i", "we", "our", "it", "this",
+    "that", "he", "she", "his", "her", "they", "you", "your", "dr", "doctor", "had",
+    "has", "have", "all", "as", "by", "from", "up", "so", "very", "really", "too", "bit",
+} | NEGATORS
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:-[a-z]+)?|[.,!?;]")
+
+
+def tokenize(text):
+    """Lowercase word and punctuation tokens; "didn't" becomes "did not"."""
+    return _TOKEN_RE.findall((text or "").lower().replace("n't", " not"))
+
+
+def classify(text):
+    """
+    Lexicon sentiment for short feedback.
+    Returns "positive", "negative" or "neutral" when the text is short and
+    every sentiment word points the same way, otherwise None (ask Zia).
+    Negators ("not good", "wasn't rude") flip the words that follow them;
+    counterfactuals ("could have been better") are left to Zia.
+    """
+    tokens = tokenize(text)
+    words = [t for t in tokens if t.isalpha() or "-" in t]
+    if not words or len(words) > MAX_WORDS:
+        return None
+    if _counterfactual(words):
+        return None
+
+    positive = negative = 0.0
+    neutral_marks = 0
+    negate_until = -1
+    boost = 1.0
+    for index, token in enumerate(tokens):
+        if token in CLAUSE_BREAKS:
+            negate_until = -1
+            boost = 1.0
+            continue
+        if token in NEGATORS:
+            negate_until = index + NEGATION_WINDOW
+            continue
+        if token in INTENSIFIERS:
+            boost = INTENSIFIERS[token]
+            continue
+        negated = index <= negate_until
+        if token in NEUTRAL:
+            neutral_marks += 1
+        elif POSITIVE.get(token):
+            if negated:
+                negative += POSITIVE[token]
+            else:
+                positive += POSITIVE[token] * boost
+        elif NEGATIVE.get(token):
+            if negated:
+                # "not bad", "no wait" read as mildly good, never glowing
+                positive += 0.5
+            else:
+                negative += NEGATIVE[token] * boost
+        boost = 1.0
+
+    if positive and negative:
+        return None
+    if neutral_marks:
+        return "neutral" if not positive and not negative else None
+    if positive >= 1:
+        return "positive"
+    if negative >= 1:
+        return "negative"
+    return None
+
+
+def _counterfactual(words):
+    """True for wishes and modal + have/be phrases ("should not have been", "could've")."""
+    for index, word in enumerate(words):
+        if word in WISHES:
+            return True
+        if word in MODALS:
+            following = words[index + 1:index + 3]
+            if following[:1] == ["not"]:
+                following = following[1:]
+            if following[:1] and following[0] in MODAL_VERBS:
+                return True
+    return False
+
+
+def local_keywords(text, limit=5):
+    """Content words of a short text, in order, for texts that skip Zia."""
+    keywords = []
+    for token in tokenize(text):
+        if len(token) > 2 and token.isalpha() and token not in STOPWORDS and token not in keywords:
+            keywords.append(token)
+    return keywords[:limit]
+
+
+class SentimentStats:
+    """How often the lexicon answered, and how often it agreed with Zia when both ran."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lexicon = 0
+        self.zia = 0
+        self.compared = 0
+        self.agreed = 0
+
+    def record(self, source, count=1):
+        with self._lock:
+            if source == "lexicon":
+                self.lexicon += count
+            else:
+                self.zia += count
+
+    def record_agreement(self, lexicon_label, zia_label):
+        with self._lock:
+            self.compared += 1
+            if lexicon_label == zia_label:
+                self.agreed += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.lexicon + self.zia
+            return {
+                "lexicon": self.lexicon,
+                "zia": self.zia,
+                "hit_ratio": round(self.lexicon / total, 3) if total else None,
+                "compared": self.compared,
+                "agreement": round(self.agreed / self.compared, 3) if self.compared else None,
+            }
+
+
+# Counters for this instance; the enrichment cron reports them
+stats = SentimentStats()